@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+"""Measure cold import time of the pint_models modules.
+
+Each module is imported in a fresh interpreter with -X importtime and
+the best cumulative time over several runs is reported.
+
+Usage (with pint_models installed, e.g. pip install -e .):
+
+    python benchmarks/bench_import.py [runs]
+"""
+
+import subprocess
+import sys
+
+MODULES = [
+    'pint_models',
+    'pint_models.registry',
+    'pint_models.database',
+    'pint_models.models',
+]
+
+
+def import_time(module):
+    """Return the cumulative import time of a module in microseconds"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import %s' % module],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True
+    )
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split('|')]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1])
+    raise RuntimeError('No import time reported for %s' % module)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for module in MODULES:
+        best = min(import_time(module) for _ in range(runs))
+        print('%-24s %8.1f ms' % (module, best / 1000.0))
+
+
+if __name__ == '__main__':
+    main()
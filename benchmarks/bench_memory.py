@@ -0,0 +1,82 @@
+#!/usr/bin/python3
+"""Compare the memory used by an image table held in process.
+
+Measures, with tracemalloc, the bytes/row of ORM instances, of the
+dicts returned by PintBase.serialize_rows() and of a
+CompactImageTable holding the same rows.
+
+Usage (with pint_models installed, e.g. pip install -e .):
+
+    python benchmarks/bench_memory.py [rows]
+"""
+
+import datetime
+import gc
+import sys
+import tracemalloc
+
+from pint_models.catalog import CompactImageTable
+from pint_models.models import AmazonImagesModel, ImageState
+
+REGIONS = ['us-east-1', 'us-east-2', 'us-west-1', 'us-west-2',
+           'eu-central-1', 'eu-west-1', 'ap-northeast-1', 'sa-east-1']
+STATES = list(ImageState)
+
+
+def make_rows(count):
+    published = datetime.date(2024, 1, 1)
+    for index in range(count):
+        yield {
+            'id': 'ami-%08d' % index,
+            'name': 'suse-sles-15-sp6-v2024%04d-hvm-ssd-x86_64' % index,
+            'state': STATES[index % len(STATES)],
+            'replacementname': None,
+            'publishedon': published + datetime.timedelta(days=index % 365),
+            'deprecatedon': None,
+            'deletedon': None,
+            # Built per row, as strings read from the DB would be
+            'changeinfo': ''.join(
+                ['https://publiccloudimagechangeinfo.suse.com/', 'x/']
+            ),
+            'region': ''.join([REGIONS[index % len(REGIONS)]]),
+            'replacementid': None,
+            'changeseq': index,
+        }
+
+
+def orm_objects(count):
+    return [AmazonImagesModel(**row) for row in make_rows(count)]
+
+
+def dicts(count):
+    columns = AmazonImagesModel.__table__.columns.keys()
+    return AmazonImagesModel.serialize_rows(
+        [tuple(row[key] for key in columns) for row in make_rows(count)],
+        keys=columns
+    )
+
+
+def compact(count):
+    return CompactImageTable(AmazonImagesModel, make_rows(count))
+
+
+def measure(name, function, count):
+    gc.collect()
+    tracemalloc.start()
+    data = function(count)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del data
+    print('%-16s %10.0f bytes/row %12d bytes' % (name, size / count, size))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    measure('ORM objects', orm_objects, count)
+    measure('dicts', dicts, count)
+    measure('compact', compact, count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+"""Compare the per-query overhead of the image lookups.
+
+Measures microseconds per images-by-region-and-state query against
+an in-memory SQLite DB holding a few rows, so that building and
+compiling the statement dominates: a select() compiled on every call
+(by an engine without a compiled cache), a select() looked up in the
+compiled cache by its cache key, and images_by_location(), which
+reuses a statement built once with bind parameters. A lambda_stmt()
+is measured too, as SQLAlchemy's other way of skipping statement
+construction.
+
+Usage (with pint_models installed, e.g. pip install -e .):
+
+    python benchmarks/bench_queries.py [queries]
+"""
+
+import datetime
+import sys
+import time
+
+from sqlalchemy import create_engine, lambda_stmt, select
+from sqlalchemy.orm import sessionmaker
+
+from pint_models.models import AmazonImagesModel, Base, ImageState
+from pint_models.queries import images_by_location
+
+REGIONS = ['us-east-1', 'us-west-2', 'eu-west-1']
+
+
+def make_session(query_cache_size=500):
+    engine = create_engine('sqlite://', query_cache_size=query_cache_size)
+    Base.metadata.create_all(bind=engine,
+                             tables=[AmazonImagesModel.__table__])
+    session = sessionmaker(bind=engine)()
+    session.add_all(
+        AmazonImagesModel(
+            id='ami-%08d' % index,
+            name='suse-sles-15-sp6-v2024%04d-hvm-ssd-x86_64' % index,
+            state=ImageState.active,
+            publishedon=datetime.date(2024, 1, 1),
+            region=REGIONS[index % len(REGIONS)]
+        )
+        for index in range(30)
+    )
+    session.commit()
+    return session
+
+
+def select_images(session, region, state):
+    return session.scalars(
+        select(AmazonImagesModel)
+        .where(AmazonImagesModel.region == region,
+               AmazonImagesModel.state == state)
+    ).all()
+
+
+def lambda_images(session, region, state):
+    return session.scalars(lambda_stmt(
+        lambda: select(AmazonImagesModel)
+        .where(AmazonImagesModel.region == region,
+               AmazonImagesModel.state == state)
+    )).all()
+
+
+def catalog_images(session, region, state):
+    return images_by_location(session, AmazonImagesModel, region, state)
+
+
+def measure(name, function, session, count):
+    start = time.perf_counter()
+    for index in range(count):
+        function(session, REGIONS[index % len(REGIONS)], ImageState.active)
+    elapsed = time.perf_counter() - start
+    print('%-16s %10.1f usec/query' % (name, elapsed / count * 1e6))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    session = make_session()
+
+    measure('uncached select', select_images, make_session(0), count)
+    measure('cached select', select_images, session, count)
+    measure('lambda_stmt', lambda_images, session, count)
+    measure('query catalog', catalog_images, session, count)
+
+
+if __name__ == '__main__':
+    main()
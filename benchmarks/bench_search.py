@@ -0,0 +1,103 @@
+#!/usr/bin/python3
+"""Compare image name search with and without trigram indexes.
+
+Loads a few hundred thousand images into amazonimages, then times
+search_images() with the pg_trgm indexes against the same substring
+search forced to scan the table (the ILIKE path used when pg_trgm is
+unavailable). The DB given by DATABASE_URI must be one that may be
+freely modified; the amazonimages table is recreated.
+
+Usage (with pint_models installed, e.g. pip install -e .):
+
+    DATABASE_URI=postgresql://... python benchmarks/bench_search.py [rows]
+"""
+
+import datetime
+import os
+import sys
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from pint_models.indexes import create_trigram_indexes
+from pint_models.loader import copy_rows
+from pint_models.models import AmazonImagesModel, has_trigram_extension
+from pint_models.search import clear_trigram_cache, search_images
+
+TERMS = ('sles-15-sp6', 'byos', 'sap-v2024', 'x86_64-hvm-ssd-01234')
+REPEAT = 5
+
+
+def make_rows(count):
+    published = datetime.date(2020, 1, 1)
+    flavors = ('', '-byos', '-sap', '-chost', '-hpc')
+    for index in range(count):
+        yield {
+            'id': 'ami-%08d' % index,
+            'name': 'suse-sles-%d-sp%d%s-v%s-x86_64-hvm-ssd-%05d' % (
+                12 + index % 4,
+                index % 7,
+                flavors[index % len(flavors)],
+                (published + datetime.timedelta(days=index % 1500)).strftime(
+                    '%Y%m%d'
+                ),
+                index % 100000
+            ),
+            'state': 'active',
+            'publishedon': published + datetime.timedelta(days=index % 1500),
+            'region': 'region-%d' % (index % 25),
+        }
+
+
+def measure(name, session, term):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        images = search_images(session, term, model=AmazonImagesModel,
+                               limit=50)
+    elapsed = (time.perf_counter() - start) / REPEAT
+    print('%-10s %-24s %8.1f ms %4d matches' % (
+        name, term, elapsed * 1000, len(images)
+    ))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    engine = create_engine(os.environ['DATABASE_URI'])
+
+    table = AmazonImagesModel.__table__
+    table.drop(bind=engine, checkfirst=True)
+    table.create(bind=engine)
+
+    session = sessionmaker(bind=engine)()
+    copy_rows(session, AmazonImagesModel, make_rows(count))
+    session.commit()
+    session.execute(text('ANALYZE amazonimages'))
+
+    clear_trigram_cache()
+    with engine.connect() as connection:
+        trigram = has_trigram_extension(connection)
+    if not trigram:
+        try:
+            create_trigram_indexes(engine)
+            trigram = True
+        except Exception as error:
+            print('pg_trgm unavailable, timing the scan only: %s' % error)
+    session.commit()
+    clear_trigram_cache()
+
+    for term in TERMS:
+        if trigram:
+            measure('trigram', session, term)
+
+        session.execute(text('SET LOCAL enable_bitmapscan = off'))
+        session.execute(text('SET LOCAL enable_indexscan = off'))
+        measure('scan', session, term)
+        session.rollback()
+
+    session.close()
+    table.drop(bind=engine)
+
+
+if __name__ == '__main__':
+    main()
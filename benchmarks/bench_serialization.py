@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+"""Compare row serialization throughput.
+
+Measures rows/sec of the naive per-row getattr() loop over
+__table__.columns against PintBase.to_dict() on ORM instances and
+PintBase.serialize_rows() on Core result row tuples.
+
+Usage (with pint_models installed, e.g. pip install -e .):
+
+    python benchmarks/bench_serialization.py [rows]
+"""
+
+import datetime
+import enum
+import sys
+import time
+
+from pint_models.models import AmazonImagesModel, ImageState
+
+
+def make_images(count):
+    published = datetime.date(2024, 1, 1)
+    return [
+        AmazonImagesModel(
+            id='ami-%08d' % index,
+            name='suse-sles-15-sp6-v2024%04d-hvm-ssd-x86_64' % index,
+            state=ImageState.active,
+            replacementname=None,
+            publishedon=published + datetime.timedelta(days=index % 365),
+            changeinfo='https://publiccloudimagechangeinfo.suse.com/x/',
+            region='us-east-1'
+        )
+        for index in range(count)
+    ]
+
+
+def naive(images):
+    rows = []
+    for image in images:
+        row = {}
+        for key in image.__table__.columns.keys():
+            value = getattr(image, key)
+            if isinstance(value, enum.Enum):
+                value = str(value)
+            elif isinstance(value, datetime.date):
+                value = value.isoformat()
+            row[key] = value
+        rows.append(row)
+    return rows
+
+
+def to_dict(images):
+    return [image.to_dict() for image in images]
+
+
+def serialize_rows(rows):
+    return AmazonImagesModel.serialize_rows(rows)
+
+
+def measure(name, function, data):
+    start = time.perf_counter()
+    function(data)
+    elapsed = time.perf_counter() - start
+    print('%-16s %12.0f rows/sec' % (name, len(data) / elapsed))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    images = make_images(count)
+    columns = AmazonImagesModel.__table__.columns.keys()
+    rows = [tuple(getattr(image, key) for key in columns)
+            for image in images]
+
+    measure('naive getattr', naive, images)
+    measure('to_dict', to_dict, images)
+    measure('serialize_rows', serialize_rows, rows)
+
+
+if __name__ == '__main__':
+    main()
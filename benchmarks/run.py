@@ -0,0 +1,227 @@
+#!/usr/bin/python3
+"""Run the benchmark suite against a synthetic catalog.
+
+Generates a synthetic catalog for every table (see
+benchmarks/synthetic.py), loads it into the DB given by DATABASE_URI,
+which must be one that may be freely modified as all tables are
+recreated, and measures:
+
+    insert         bulk_upsert() throughput per table, rows/sec, or
+                   that of copy_rows() for the tables keyed on a
+                   generated id, which upserts can't match on
+    list           images_by_location() and servers_by_region()
+                   latency per location and state, median and p95 ms
+    serialization  full table SELECT plus serialize_rows(), rows/sec
+    import         cold import time of the pint_models modules, ms
+    memory         bytes per image held as ORM objects and in a
+                   CompactImageTable
+
+The results are written as JSON, to stdout or the given file, so
+that runs against different versions can be compared.
+
+Usage (with pint_models installed, e.g. pip install -e .):
+
+    DATABASE_URI=postgresql://... python benchmarks/run.py \
+        [--per-location N] [--servers-per-region N] [--output FILE]
+"""
+
+import argparse
+import datetime
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import sqlalchemy
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from bench_import import MODULES, import_time
+import pint_models
+from pint_models.bulk import bulk_upsert, get_conflict_columns
+from pint_models.catalog import CompactImageTable
+from pint_models.database import get_psql_server_version
+from pint_models.loader import copy_rows
+from pint_models.models import Base, ImageState
+from pint_models.queries import images_by_location, servers_by_region
+from pint_models.registry import TABLE_NAMES, models
+from synthetic import IMAGE_LOCATIONS, synthetic_catalog
+
+
+def latencies(function, calls, repeat):
+    """Return the median and p95 latency, in ms, of a set of calls"""
+    timings = []
+    for _ in range(repeat):
+        for args in calls:
+            start = time.perf_counter()
+            function(*args)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'calls': len(timings),
+        'median_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[math.ceil(len(timings) * 0.95) - 1], 3),
+    }
+
+
+def bench_insert(session, catalog):
+    results = {}
+    for model, rows in catalog.items():
+        upsert = set(get_conflict_columns(model)) <= set(rows[0])
+        start = time.perf_counter()
+        if upsert:
+            bulk_upsert(session, model, rows)
+        else:
+            copy_rows(session, model, rows)
+        session.commit()
+        elapsed = time.perf_counter() - start
+        results[model.__tablename__] = {
+            'method': 'bulk_upsert' if upsert else 'copy_rows',
+            'rows': len(rows),
+            'rows_per_second': round(len(rows) / elapsed),
+        }
+    return results
+
+
+def bench_list(session, repeat):
+    results = {}
+    for model in models('images'):
+        provider = TABLE_NAMES[model.__tablename__][0]
+        calls = [
+            (session, model, location, state)
+            for location in IMAGE_LOCATIONS[provider]
+            for state in (None, ImageState.active, ImageState.deleted)
+        ]
+        results[model.__tablename__] = latencies(
+            images_by_location, calls, repeat
+        )
+
+    for model in models('servers'):
+        regions = session.execute(
+            select(model.region).distinct()
+        ).scalars().all()
+        calls = [(session, model, region) for region in regions]
+        results[model.__tablename__] = latencies(
+            servers_by_region, calls, repeat
+        )
+
+    session.rollback()
+    return results
+
+
+def bench_serialization(session):
+    results = {}
+    for model in models():
+        start = time.perf_counter()
+        rows = model.serialize_rows(session.execute(select(model.__table__)))
+        elapsed = time.perf_counter() - start
+        results[model.__tablename__] = {
+            'rows': len(rows),
+            'rows_per_second': round(len(rows) / elapsed) if rows else None,
+        }
+    return results
+
+
+def bench_import(runs):
+    return {
+        module: round(min(import_time(module) for _ in range(runs)) / 1000, 1)
+        for module in MODULES
+    }
+
+
+def traced_size(function):
+    """Return the memory held by the result of a function, in bytes"""
+    gc.collect()
+    tracemalloc.start()
+    data = function()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del data
+    return size
+
+
+def bench_memory(session):
+    results = {}
+    for model in models('images'):
+        count = session.execute(
+            select(func.count()).select_from(model.__table__)
+        ).scalar()
+        if not count:
+            continue
+
+        orm = traced_size(
+            lambda: session.scalars(select(model)).all()
+        )
+        session.expunge_all()
+        compact = traced_size(lambda: CompactImageTable(
+            model, session.execute(select(model.__table__)).mappings()
+        ))
+        results[model.__tablename__] = {
+            'rows': count,
+            'orm_bytes_per_row': round(orm / count),
+            'compact_bytes_per_row': round(compact / count),
+        }
+    session.rollback()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--per-location', type=int, default=1000,
+                        help='images per provider location')
+    parser.add_argument('--servers-per-region', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='repetitions of the list queries')
+    parser.add_argument('--import-runs', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='file to write the results to')
+    args = parser.parse_args()
+
+    engine = create_engine(os.environ['DATABASE_URI'])
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    catalog = synthetic_catalog(
+        per_location=args.per_location,
+        servers_per_region=args.servers_per_region,
+        seed=args.seed
+    )
+
+    results = {
+        'started': datetime.datetime.now(
+            datetime.timezone.utc
+        ).isoformat(),
+        'pint_models': pint_models.__version__,
+        'python': platform.python_version(),
+        'sqlalchemy': sqlalchemy.__version__,
+        'postgres': get_psql_server_version(session),
+        'config': vars(args),
+        'insert': bench_insert(session, catalog),
+    }
+    session.commit()
+    results['list'] = bench_list(session, args.repeat)
+    results['serialization'] = bench_serialization(session)
+    results['memory'] = bench_memory(session)
+    results['import_ms'] = bench_import(args.import_runs)
+
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,266 @@
+# Copyright (c) 2026 SUSE LLC
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import datetime
+import ipaddress
+import random
+
+from pint_models.models import (
+    ImageState,
+    ServerType,
+    VersionsModel,
+    image_dates_error,
+)
+from pint_models.registry import TABLE_NAMES, models
+
+# Image locations (regions, projects or environments) per provider,
+# None standing for providers whose images have no location.
+IMAGE_LOCATIONS = {
+    'alibaba': ('cn-beijing', 'eu-central-1', 'us-west-1'),
+    'amazon': ('us-east-1', 'us-west-2', 'eu-central-1', 'eu-west-1',
+               'ap-northeast-1'),
+    'google': ('suse-cloud', 'suse-byos-cloud', 'suse-sap-cloud'),
+    'microsoft': ('PublicAzure', 'USGovernment', 'ChinaCloud'),
+    'oracle': (None,),
+}
+
+SERVER_REGIONS = {
+    'amazon': IMAGE_LOCATIONS['amazon'],
+    'google': ('us-central1', 'europe-west1', 'asia-east1'),
+}
+
+# Canonical names of the Microsoft regions per environment
+MICROSOFT_REGIONS = {
+    'PublicAzure': ('eastus', 'westeurope', 'southeastasia'),
+    'USGovernment': ('usgovvirginia',),
+    'ChinaCloud': ('chinanorth',),
+}
+
+# Share of the images in each state
+DEFAULT_STATE_MIX = {
+    ImageState.active: 0.5,
+    ImageState.inactive: 0.15,
+    ImageState.deprecated: 0.2,
+    ImageState.deleted: 0.15,
+}
+
+_FIRST_PUBLISHED = datetime.date(2018, 1, 1)
+
+_IMAGE_IDS = {
+    'alibaba': 'm-%017x',
+    'amazon': 'ami-%017x',
+    'oracle': 'ocid1.image.oc1..%024x',
+}
+
+_IPV4_BASE = int(ipaddress.IPv4Address('10.0.0.0'))
+_IPV6_BASE = int(ipaddress.IPv6Address('2001:db8::'))
+
+
+def synthetic_images(model, per_location=100, locations=None,
+                     state_mix=None, seed=0):
+    """Generate realistic rows of an image table
+
+    Publication dates are spread over the years since 2018, with
+    deprecation and deletion dates, and replacement images, as
+    fitting the state of each image.
+
+    Args:
+        model (ProviderImageBase): The image model
+        per_location (int): Number of images per location
+        locations (list, optional): The regions, projects or
+            environments, defaults to IMAGE_LOCATIONS
+        state_mix (dict, optional): ImageState to share of the
+            images, defaults to DEFAULT_STATE_MIX
+        seed (int): Seed making the generated rows reproducible
+
+    Returns:
+        [generator]: A dict per image, all with the same keys
+    """
+    provider = TABLE_NAMES[model.__tablename__][0]
+    if locations is None:
+        locations = IMAGE_LOCATIONS[provider]
+    if model.location_column is None:
+        locations = (None,)
+    states, weights = zip(*(state_mix or DEFAULT_STATE_MIX).items())
+
+    rand = random.Random(seed)
+    columns = model.__table__.columns
+    serial = 0
+
+    for location in locations:
+        for _ in range(per_location):
+            serial += 1
+            state = rand.choices(states, weights)[0]
+            published = _FIRST_PUBLISHED + datetime.timedelta(
+                days=rand.randrange(2500)
+            )
+            name = 'suse-sles-%d-sp%d%s-v%s-%s-%06d' % (
+                12 + serial % 4,
+                serial % 7,
+                rand.choice(('', '-byos', '-sap', '-chost', '-hpc')),
+                published.strftime('%Y%m%d'),
+                rand.choice(('x86_64', 'arm64')),
+                serial
+            )
+
+            deprecated = deleted = None
+            replacement = None
+            if state in (ImageState.deprecated, ImageState.deleted):
+                deprecated = published + datetime.timedelta(
+                    days=rand.randrange(30, 400)
+                )
+                replacement = serial + 1
+            if state == ImageState.deleted:
+                deleted = deprecated + datetime.timedelta(
+                    days=rand.randrange(1, 200)
+                )
+            error = image_dates_error(name, published, deprecated, deleted)
+            if error:
+                raise ValueError(error)
+
+            row = {
+                'name': name,
+                'state': state,
+                'replacementname': None,
+                'publishedon': published,
+                'deprecatedon': deprecated,
+                'deletedon': deleted,
+                'changeinfo': (
+                    'https://publiccloudimagechangeinfo.suse.com/%s/%s/' % (
+                        provider, name
+                    )
+                ),
+                'replacementid': None,
+                'urn': 'SUSE:sles-15-sp%d:gen2:%s' % (
+                    serial % 7, published.strftime('%Y.%m.%d')
+                ),
+            }
+            if provider in _IMAGE_IDS:
+                row['id'] = _IMAGE_IDS[provider] % serial
+            if replacement is not None:
+                row['replacementname'] = '%s-%06d' % (
+                    name.rsplit('-', 1)[0], replacement
+                )
+                if provider in _IMAGE_IDS:
+                    row['replacementid'] = _IMAGE_IDS[provider] % replacement
+            if model.location_column:
+                row[model.location_column] = location
+
+            yield {k: v for k, v in row.items() if k in columns}
+
+
+def synthetic_servers(model, per_region=10, regions=None,
+                      update_share=0.2, ipv6_share=0.5, seed=0):
+    """Generate rows of a servers table
+
+    Every server gets a distinct IPv4 address, and some an IPv6 one.
+
+    Args:
+        model (ProviderServerBase): The servers model
+        per_region (int): Number of servers per region
+        regions (list, optional): The regions, defaults to
+            SERVER_REGIONS or, for Microsoft, MICROSOFT_REGIONS
+        update_share (float): Share of update (rather than region)
+            servers
+        ipv6_share (float): Share of servers with an IPv6 address
+        seed (int): Seed making the generated rows reproducible
+
+    Returns:
+        [generator]: A dict per server, all with the same keys
+    """
+    provider = TABLE_NAMES[model.__tablename__][0]
+    if regions is None:
+        regions = SERVER_REGIONS.get(provider) or [
+            region for names in MICROSOFT_REGIONS.values()
+            for region in names
+        ]
+
+    rand = random.Random(seed)
+    serial = 0
+    for region in regions:
+        for _ in range(per_region):
+            serial += 1
+            update = rand.random() < update_share
+            yield {
+                'type': ServerType.update if update else ServerType.region,
+                'shape': None,
+                'name': 'smt-%s-%d.susecloud.net' % (region, serial)
+                if update else None,
+                'ip': str(ipaddress.IPv4Address(_IPV4_BASE + serial)),
+                'ipv6': str(ipaddress.IPv6Address(_IPV6_BASE + serial))
+                if rand.random() < ipv6_share else None,
+                'region': region,
+            }
+
+
+def synthetic_region_map(regions=None):
+    """Generate the rows of the Microsoft region map
+
+    Each region is mapped under its canonical name and a capitalized
+    alias, e.g. westeurope and Westeurope.
+
+    Args:
+        regions (dict, optional): Environment to canonical region
+            names, defaults to MICROSOFT_REGIONS
+
+    Returns:
+        [generator]: A dict per region name
+    """
+    for environment, names in (regions or MICROSOFT_REGIONS).items():
+        for canonicalname in names:
+            for region in (canonicalname, canonicalname.title()):
+                yield {
+                    'environment': environment,
+                    'region': region,
+                    'canonicalname': canonicalname,
+                }
+
+
+def synthetic_catalog(per_location=100, servers_per_region=10,
+                      state_mix=None, seed=0):
+    """Generate a synthetic catalog for every provider table
+
+    Args:
+        per_location (int): Number of images per image location
+        servers_per_region (int): Number of servers per region
+        state_mix (dict, optional): ImageState to share of the
+            images, defaults to DEFAULT_STATE_MIX
+        seed (int): Seed making the generated rows reproducible
+
+    Returns:
+        [dict]: Model class to the list of its rows, including a
+            VersionsModel entry for every table
+    """
+    catalog = {}
+    for model in models('images'):
+        catalog[model] = list(synthetic_images(
+            model, per_location, state_mix=state_mix, seed=seed
+        ))
+    for model in models('servers'):
+        catalog[model] = list(synthetic_servers(
+            model, servers_per_region, seed=seed
+        ))
+    for model in models('regionmap'):
+        catalog[model] = list(synthetic_region_map())
+
+    catalog[VersionsModel] = [
+        {'tablename': model.__tablename__, 'version': 1}
+        for model in list(catalog)
+    ]
+    return catalog
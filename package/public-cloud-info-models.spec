@@ -30,12 +30,12 @@ License:        Apache-2.0
 URL:            https://github.com/SUSE-Enceladus/public-cloud-info-models
 Source:         %{name}-%{version}.tar.gz
 BuildRequires:  python-rpm-macros
-BuildRequires:  %{pythons}-SQLAlchemy
+BuildRequires:  %{pythons}-SQLAlchemy >= 2.0
 BuildRequires:  %{pythons}-psycopg2
 BuildRequires:  %{pythons}-pip
 BuildRequires:  %{pythons}-setuptools
 BuildRequires:  %{pythons}-wheel
-Requires:       %{pythons}-SQLAlchemy
+Requires:       %{pythons}-SQLAlchemy >= 2.0
 Requires:       %{pythons}-psycopg2
 BuildArch:      noarch
 
@@ -1,3 +1,21 @@
+import importlib
+
 __author__ = """SUSE"""
 __email__ = 'public-cloud-dev@susecloud.net'
 __version__ = '0.3.0'
+
+# Names importable from the package itself, resolved on first access
+# so that importing pint_models stays cheap.
+_LAZY_ATTRIBUTES = {
+    'get_model': 'pint_models.registry',
+    'get_model_by_tablename': 'pint_models.registry',
+    'init_db': 'pint_models.database',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    raise AttributeError(
+        'module %s has no attribute %s' % (repr(__name__), repr(name))
+    )
@@ -0,0 +1,207 @@
+# Copyright (c) 2026 SUSE LLC
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import logging
+
+from sqlalchemy import literal_column, or_
+from sqlalchemy.dialects.postgresql import insert
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def get_conflict_columns(model):
+    """Return the column names used to detect an existing row
+
+    Models with a unique constraint (e.g. MicrosoftImagesModel's
+    name + environment) are keyed on the first such constraint,
+    since their primary key is a generated surrogate that ingest
+    rows do not carry. All other models are keyed on their
+    primary key.
+
+    Args:
+        model (PintBase): The model class rows are being upserted into
+
+    Returns:
+        [list]: Column names making up the conflict target
+    """
+    constraints = model.unique_constraints()
+    if constraints:
+        return [c.name for c in constraints[0].columns]
+
+    return [c.name for c in model.__table__.primary_key.columns]
+
+
+def build_upsert_statement(model, rows, conflict_columns=None):
+    """Construct an INSERT ... ON CONFLICT DO UPDATE statement
+
+    The DO UPDATE is guarded by an IS DISTINCT FROM check on every
+    updated column so that rows whose content is unchanged are not
+    rewritten, and therefore don't leave dead tuples behind.
+
+    Args:
+        model (PintBase): The model class rows are being upserted into
+        rows (list): A list of dicts, all having the same keys
+        conflict_columns (list, optional): Column names to use as
+            the conflict target, defaults to get_conflict_columns()
+
+    Returns:
+        [Insert]: The upsert statement, returning an 'inserted' flag
+            for every row that was inserted or updated
+    """
+    if conflict_columns is None:
+        conflict_columns = get_conflict_columns(model)
+
+    table = model.__table__
+    keys = list(rows[0].keys())
+    for row in rows:
+        if set(row.keys()) != set(keys):
+            raise ValueError(
+                '%s rows must all provide the same columns' % (
+                    table.name
+                )
+            )
+
+    unknown = set(keys) - set(table.columns.keys())
+    if unknown:
+        raise ValueError(
+            '%s has no column(s) %s' % (
+                table.name,
+                ', '.join(sorted(unknown))
+            )
+        )
+
+    stmt = insert(table).values(rows)
+    update_columns = [k for k in keys if k not in conflict_columns]
+
+    if update_columns:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=conflict_columns,
+            set_={k: stmt.excluded[k] for k in update_columns},
+            where=or_(*[
+                table.c[k].is_distinct_from(stmt.excluded[k])
+                for k in update_columns
+            ])
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=conflict_columns)
+
+    # xmax is only zero for a freshly inserted row version
+    return stmt.returning(literal_column('(xmax = 0)').label('inserted'))
+
+
+def bulk_upsert(session, model, rows, batch_size=DEFAULT_BATCH_SIZE,
+                conflict_columns=None):
+    """Insert or update rows in batches
+
+    Rows are written with one INSERT ... ON CONFLICT DO UPDATE
+    statement per batch rather than one ORM flush per row. Since no
+    ORM objects are created, the model's @validates hooks are not
+    run; image rows are instead checked and normalized (e.g. given
+    the changeinfo trailing '/' the table's CHECK constraint expects)
+    by validate_image_rows() before each batch is written. A
+    ValueError is raised for invalid rows and for rows repeating the
+    key of an earlier row, so that no row is silently dropped. The
+    caller is responsible for committing the session, or rolling it
+    back on error.
+
+    Args:
+        session (Session): DB session to execute the statements with
+        model (PintBase): The model class rows are being upserted into
+        rows (iterable): Dicts mapping column names to values
+        batch_size (int): Maximum number of rows per statement
+        conflict_columns (list, optional): Column names to use as
+            the conflict target, defaults to get_conflict_columns()
+
+    Returns:
+        [dict]: Counts of 'inserted', 'updated' and 'unchanged' rows
+    """
+    if batch_size < 1:
+        raise ValueError('batch_size must be a positive integer')
+
+    if conflict_columns is None:
+        conflict_columns = get_conflict_columns(model)
+
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+
+    # Postgres rejects an ON CONFLICT DO UPDATE that touches the same
+    # row twice, and a later row would otherwise replace an earlier
+    # one unnoticed, so repeated keys are rejected. Rows without a
+    # (complete) key, e.g. for a generated id, are always inserted.
+    keys = set()
+    batch = []
+    for index, row in enumerate(rows):
+        key = tuple(row.get(c) for c in conflict_columns)
+        if None not in key:
+            if key in keys:
+                raise ValueError('%s row %d repeats the key %s' % (
+                    model.__tablename__, index, repr(key)
+                ))
+            keys.add(key)
+        batch.append(row)
+
+        if len(batch) >= batch_size:
+            _upsert_batch(session, model, batch, conflict_columns, counts,
+                          index + 1 - len(batch))
+            batch = []
+
+    if batch:
+        _upsert_batch(session, model, batch, conflict_columns, counts,
+                      index + 1 - len(batch))
+
+    logger.debug(
+        '%s bulk upsert: %d inserted, %d updated, %d unchanged',
+        model.__tablename__,
+        counts['inserted'],
+        counts['updated'],
+        counts['unchanged']
+    )
+
+    return counts
+
+
+def _upsert_batch(session, model, rows, conflict_columns, counts, first):
+    """Validate and execute a single upsert batch, accumulating its counts
+
+    first is the index of the batch's first row among all the rows
+    being upserted, for the error messages.
+    """
+    from pint_models.models import ProviderImageBase
+
+    if issubclass(model, ProviderImageBase):
+        from pint_models.validation import validate_image_rows
+
+        rows, errors = validate_image_rows(model, rows)
+        if errors:
+            raise ValueError('%s has invalid rows: %s' % (
+                model.__tablename__,
+                '; '.join(
+                    'row %d: %s' % (first + index, error)
+                    for index, error in errors
+                )
+            ))
+
+    stmt = build_upsert_statement(model, rows, conflict_columns)
+    written = session.execute(stmt).scalars().all()
+
+    inserted = sum(1 for flag in written if flag)
+    counts['inserted'] += inserted
+    counts['updated'] += len(written) - inserted
+    counts['unchanged'] += len(rows) - len(written)
@@ -0,0 +1,247 @@
+# Copyright (c) 2026 SUSE LLC
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import collections
+import enum
+import json
+import logging
+import pickle
+import threading
+
+from pint_models.queries import filtered_select
+from pint_models.versions import VersionTracker
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBackend(object):
+    """In-process LRU cache storage bounded by entry count and size
+
+    Values are stored pickled, so that the size bound reflects the
+    memory actually used and callers can't mutate cached results.
+
+    Args:
+        max_entries (int, optional): Maximum number of cached entries
+        max_bytes (int, optional): Maximum total size of the cached
+            (pickled) values
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                return None
+            self._entries.move_to_end(key)
+        return pickle.loads(data)
+
+    def set(self, key, value):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if self.max_bytes is not None and len(data) > self.max_bytes:
+            logger.debug('Not caching %s, %d bytes is over the limit',
+                         key, len(data))
+            self.delete(key)
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = data
+            self._bytes += len(data)
+
+            while (self.max_entries is not None and
+                   len(self._entries) > self.max_entries) or \
+                    (self.max_bytes is not None and
+                     self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            data = self._entries.pop(key, None)
+            if data is not None:
+                self._bytes -= len(data)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'evictions': self.evictions,
+            }
+
+
+class RedisBackend(object):
+    """Cache storage shared between workers via Redis
+
+    Any client providing the redis-py get/set/delete/scan_iter
+    methods can be used, e.g. a local Redis or a compatible
+    stand-in.
+
+    Args:
+        client: The Redis client
+        prefix (string): Prefix for all cache keys
+        ttl (int, optional): Expiry of cached entries in seconds,
+            letting Redis' own eviction bound the memory used
+    """
+
+    def __init__(self, client, prefix='pint_models:', ttl=None):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key):
+        data = self.client.get(self.prefix + key)
+        if data is None:
+            return None
+        return pickle.loads(data)
+
+    def set(self, key, value):
+        self.client.set(
+            self.prefix + key,
+            pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+            ex=self.ttl
+        )
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+    def stats(self):
+        return {}
+
+
+class QueryCache(object):
+    """Read-through cache of table listings keyed on the versions table
+
+    Query results are cached per model and filter set, and are
+    served until the model's VersionsModel.version changes. The
+    versions table is queried at most once every check_interval
+    seconds, so changes may take up to that long to be noticed.
+    Tables without a versions entry are never cached.
+
+    Args:
+        backend (optional): Cache storage, defaults to a MemoryBackend
+        check_interval (float): Minimum number of seconds between
+            queries of the versions table
+    """
+
+    def __init__(self, backend=None, check_interval=30):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.tracker = VersionTracker(check_interval=check_interval)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, session, model, **filters):
+        """Return the rows of a model's table matching the filters
+
+        Args:
+            session (Session): DB session to query with on a miss
+            model (PintBase): The model class to list
+            **filters: Column name to value, or to a list of values
+
+        Returns:
+            [list]: A dict per matching row
+        """
+        version = self.tracker.version(session, model.__tablename__)
+        key = self.make_key(model, filters)
+
+        if version is not None:
+            cached = self.backend.get(key)
+            if cached is not None and cached[0] == version:
+                self._count('hits')
+                return cached[1]
+
+        self._count('misses')
+        rows = query_rows(session, model, **filters)
+
+        if version is not None:
+            self.backend.set(key, (version, rows))
+
+        return rows
+
+    def clear(self):
+        """Drop all cached entries"""
+        self.backend.clear()
+        self.tracker.invalidate()
+
+    def stats(self):
+        """Return the hit and miss counters along with backend stats"""
+        stats = {'hits': self.hits, 'misses': self.misses}
+        stats.update(self.backend.stats())
+        return stats
+
+    @staticmethod
+    def make_key(model, filters):
+        """Return the cache key of a model and filter set"""
+        return '%s:%s' % (
+            model.__tablename__,
+            json.dumps(
+                {k: _key_value(v) for k, v in filters.items()},
+                sort_keys=True,
+                default=str
+            )
+        )
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+def query_rows(session, model, **filters):
+    """Return the rows of a model's table matching the filters
+
+    Args:
+        session (Session): DB session to query with
+        model (PintBase): The model class to list
+        **filters: Column name to value, or to a list of values
+
+    Returns:
+        [list]: A dict per matching row
+    """
+    query = filtered_select(model, filters)
+    return [dict(row) for row in session.execute(query).mappings()]
+
+
+def _key_value(value):
+    """Normalize a filter value for use in a cache key"""
+    if isinstance(value, enum.Enum):
+        return value.name
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sorted((_key_value(v) for v in value), key=str)
+    return value
@@ -0,0 +1,301 @@
+# Copyright (c) 2026 SUSE LLC
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import array
+import datetime
+import sys
+import time
+
+from sqlalchemy import Date, Enum, select
+
+from pint_models.registry import TABLE_NAMES, models
+from pint_models.versions import VersionTracker
+
+# Value encodings of CompactImageTable columns
+TEXT = 'text'
+SYMBOL = 'symbol'
+ENUM = 'enum'
+DATE = 'date'
+
+# Columns with few distinct values, besides the location column,
+# which are stored once and referenced by number
+SYMBOL_COLUMNS = ('changeinfo',)
+
+
+class CompactImageTable(object):
+    """Column oriented, compact copy of the rows of an image table
+
+    Enum values are stored as small ints and dates as ordinals in
+    arrays, and the location (region, project or environment) and
+    other repetitive strings are interned and stored as numbers, so
+    a row takes a fraction of the memory of an ORM instance. Use
+    indices() to find rows, and row() to get them as dicts of the
+    same plain values as PintBase.to_dict().
+
+    Args:
+        model (ProviderImageBase): The image model the rows are from
+        rows (iterable): Mappings of column name to value
+        version (optional): The table version the rows belong to
+    """
+
+    __slots__ = ('model', 'version', 'names', 'encodings', 'columns',
+                 'symbols', 'members', 'count', '_views')
+
+    def __init__(self, model, rows, version=None):
+        self.model = model
+        self.version = version
+        self.names = tuple(c.name for c in model.__table__.columns)
+        self.encodings = tuple(
+            _encoding(model, column) for column in model.__table__.columns
+        )
+        self.columns = tuple(_new_column(e) for e in self.encodings)
+        self.symbols = tuple(
+            [None] if e == SYMBOL else None for e in self.encodings
+        )
+        self.members = tuple(
+            tuple(c.type.enum_class) if e == ENUM else None
+            for e, c in zip(self.encodings, model.__table__.columns)
+        )
+        self.count = 0
+        self._views = None
+
+        codes = tuple(
+            {None: 0} if e == SYMBOL else
+            {m: i for i, m in enumerate(self.members[index])}
+            if e == ENUM else None
+            for index, e in enumerate(self.encodings)
+        )
+
+        for row in rows:
+            for index, name in enumerate(self.names):
+                value = row[name]
+                encoding = self.encodings[index]
+                if encoding == SYMBOL:
+                    code = codes[index].get(value)
+                    if code is None:
+                        code = len(self.symbols[index])
+                        codes[index][value] = code
+                        self.symbols[index].append(sys.intern(value))
+                    value = code
+                elif encoding == ENUM:
+                    value = codes[index][
+                        _enum_member(self.members[index][0], value)
+                    ]
+                elif encoding == DATE:
+                    value = value.toordinal() if value is not None else 0
+                self.columns[index].append(value)
+            self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    def indices(self, location=None, state=None):
+        """Return the numbers of the rows in a location and/or state
+
+        Args:
+            location (string, optional): The region, project or
+                environment, ignored by tables without a location
+            state (ImageState, optional): The image state, or its value
+
+        Returns:
+            [array]: The row numbers, in load order
+        """
+        location_index = self._index(self.model.location_column)
+        if location_index is None:
+            location = None
+        if location is None and state is None:
+            return array.array('I', range(self.count))
+
+        views = self._get_views()
+        state_index = self._index('state')
+
+        location_code = None
+        if location is not None:
+            try:
+                location_code = self.symbols[location_index].index(location)
+            except ValueError:
+                return array.array('I')
+
+        state_code = None
+        if state is not None:
+            members = self.members[state_index]
+            state_code = members.index(_enum_member(members[0], state))
+
+        return views.get((location_code, state_code), array.array('I'))
+
+    def row(self, index):
+        """Return a row as a dict of plain (JSON compatible) values"""
+        values = {}
+        for position, name in enumerate(self.names):
+            value = self.columns[position][index]
+            encoding = self.encodings[position]
+            if encoding == SYMBOL:
+                value = self.symbols[position][value]
+            elif encoding == ENUM:
+                value = self.members[position][value].value
+            elif encoding == DATE:
+                value = datetime.date.fromordinal(value).isoformat() \
+                    if value else None
+            values[name] = value
+        return values
+
+    def rows(self, location=None, state=None):
+        """Yield the rows in a location and/or state as dicts"""
+        for index in self.indices(location, state):
+            yield self.row(index)
+
+    def _index(self, name):
+        return self.names.index(name) if name in self.names else None
+
+    def _get_views(self):
+        """Build, once, the row numbers per location and state"""
+        if self._views is not None:
+            return self._views
+
+        location_index = self._index(self.model.location_column)
+        state_index = self._index('state')
+        locations = self.columns[location_index] \
+            if location_index is not None else None
+        states = self.columns[state_index]
+
+        views = {}
+        for index in range(self.count):
+            location = locations[index] if locations is not None else None
+            keys = {(location, states[index]), (location, None),
+                    (None, states[index])}
+            keys.discard((None, None))
+            for key in keys:
+                view = views.get(key)
+                if view is None:
+                    view = views[key] = array.array('I')
+                view.append(index)
+
+        self._views = views
+        return views
+
+
+class ImageCatalog(object):
+    """Compact in-memory copy of all image tables for long-lived workers
+
+    refresh() reloads only the tables whose VersionsModel entry moved,
+    checking the versions table at most every check_interval seconds.
+    Tables without a versions entry are reloaded every check_interval
+    seconds instead.
+
+    Args:
+        check_interval (float): Minimum number of seconds between
+            queries of the versions table
+    """
+
+    def __init__(self, check_interval=30):
+        self.tracker = VersionTracker(check_interval=check_interval)
+        self.tables = {}
+        self._loaded_at = {}
+
+    def refresh(self, session, force=False):
+        """Reload the image tables whose version changed
+
+        Args:
+            session (Session): DB session to query with
+            force (bool): Reload all tables regardless of versions
+
+        Returns:
+            [list]: The names of the reloaded tables
+        """
+        versions = self.tracker.versions(session)
+        reloaded = []
+
+        for model in models('images'):
+            tablename = model.__tablename__
+            version = versions.get(tablename)
+            loaded = self.tables.get(tablename)
+            if not force and not self.tracker.is_stale(
+                    loaded.version if loaded else None,
+                    self._loaded_at.get(tablename),
+                    version):
+                continue
+
+            result = session.execute(select(model.__table__)).mappings()
+            # Swapped in as a whole, so readers see either version
+            self.tables[tablename] = CompactImageTable(
+                model, result, version=version
+            )
+            self._loaded_at[tablename] = time.monotonic()
+            reloaded.append(tablename)
+
+        return reloaded
+
+    def images(self, provider=None, location=None, state=None):
+        """Yield the images matching the filters as dicts
+
+        Args:
+            provider (string, optional): The provider name
+            location (string, optional): The region, project or
+                environment
+            state (ImageState, optional): The image state, or its value
+
+        Returns:
+            [generator]: A dict per image, including its provider
+        """
+        for table in list(self.tables.values()):
+            model_provider = TABLE_NAMES[table.model.__tablename__][0]
+            if provider not in (None, model_provider):
+                continue
+            if location is not None and table.model.location_column is None:
+                continue
+
+            for row in table.rows(location, state):
+                row['provider'] = model_provider
+                yield row
+
+    def __len__(self):
+        return sum(len(table) for table in list(self.tables.values()))
+
+
+def _encoding(model, column):
+    """Return how a column's values are stored"""
+    if isinstance(column.type, Enum) and column.type.enum_class:
+        return ENUM
+    if isinstance(column.type, Date):
+        return DATE
+    if column.name == model.location_column or \
+            column.name in SYMBOL_COLUMNS:
+        return SYMBOL
+    return TEXT
+
+
+def _new_column(encoding):
+    if encoding == SYMBOL:
+        return array.array('I')
+    if encoding == ENUM:
+        return array.array('B')
+    if encoding == DATE:
+        return array.array('l')
+    return []
+
+
+def _enum_member(member, value):
+    """Return the enum member of a value, name or member"""
+    enum_class = type(member)
+    if isinstance(value, enum_class):
+        return value
+    try:
+        return enum_class[value]
+    except KeyError:
+        return enum_class(value)
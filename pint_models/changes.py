@@ -0,0 +1,215 @@
+# Copyright (c) 2026 SUSE LLC
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import collections
+import logging
+
+from sqlalchemy import inspect, select, text
+
+from pint_models.models import (
+    Base,
+    CHANGE_COLUMN,
+    CHANGE_FUNCTIONS,
+    CHANGE_SEQUENCE,
+    ChangeTombstoneModel,
+    SCHEMA_LOCK,
+    change_trigger_statements,
+)
+
+logger = logging.getLogger(__name__)
+
+# The last change number drawn, and the lowest number held by a
+# running transaction, which is below those of all its changes (see
+# pint_next_changeseq()). Read in this order, any change numbered up
+# to the lower of the two is either committed or rolled back. Shared
+# advisory locks taken by others on bigint keys count as held too.
+LAST_CHANGE_QUERY = text(
+    'SELECT CASE WHEN is_called THEN last_value ELSE last_value - 1 END '
+    'FROM pint_change_seq'
+)
+HELD_CHANGE_QUERY = text(
+    'SELECT min((classid::bigint << 32) | objid::bigint) FROM pg_locks '
+    "WHERE locktype = 'advisory' AND objsubid = 1 AND mode = 'ShareLock' "
+    'AND database = (SELECT oid FROM pg_database '
+    'WHERE datname = current_database())'
+)
+
+# The rows changed and keys deleted since a cursor, the cursor to
+# pass to the next changes_since() call, and whether more changes
+# are pending beyond the limit.
+ChangeSet = collections.namedtuple(
+    'ChangeSet', ['changed', 'deleted', 'cursor', 'more']
+)
+
+
+def changes_since(session, model, cursor=0, limit=1000):
+    """Return the changes to a table since a previous call
+
+    Rows are numbered by the changeseq column, from a sequence shared
+    by all tables, on every insert or update, and deleted rows leave
+    a tombstone numbered the same way. Start with a cursor of 0 to
+    get the entire table, then pass the returned cursor to the next
+    call. Keys deleted and then inserted again within the returned
+    changes are only listed as changed, so the changes and deletes
+    can be applied in either order.
+
+    Transactions may commit their changes out of order, so changes
+    numbered after those of a transaction still running are held
+    back until it ends, rather than moving the cursor past changes
+    yet to be committed. For this to work, the session must use the
+    default READ COMMITTED isolation level.
+
+    Args:
+        session (Session): DB session to query with
+        model (PintBase): An image or server model class
+        cursor (int): The cursor returned by the previous call
+        limit (int): Maximum number of changes to return
+
+    Returns:
+        [ChangeSet]: The changed rows, as dicts of plain values, the
+            keys of the deleted rows, as dicts of key column values,
+            the new cursor and whether more changes are pending
+    """
+    table = model.__table__
+    if CHANGE_COLUMN not in table.c:
+        raise ValueError(
+            '%s has no %s column' % (table.name, CHANGE_COLUMN)
+        )
+
+    # All on the primary's connection, as replicas neither share its
+    # locks nor necessarily have its latest changes
+    connection = session.connection()
+    final = connection.execute(LAST_CHANGE_QUERY).scalar()
+    held = connection.execute(HELD_CHANGE_QUERY).scalar()
+    if held is not None:
+        final = min(final, held)
+
+    sequence = table.c[CHANGE_COLUMN]
+    rows = connection.execute(
+        select(table)
+        .where(sequence > cursor, sequence <= final)
+        .order_by(sequence)
+        .limit(limit + 1)
+    )
+    serialize = model.row_serializer(list(rows.keys()))
+    changes = [
+        (row._mapping[CHANGE_COLUMN], 0, serialize(row)) for row in rows
+    ]
+
+    tombstones = ChangeTombstoneModel.__table__
+    changes.extend(
+        (changeseq, 1, rowkey) for changeseq, rowkey in connection.execute(
+            select(tombstones.c.changeseq, tombstones.c.rowkey)
+            .where(
+                tombstones.c.tablename == table.name,
+                tombstones.c.changeseq > cursor,
+                tombstones.c.changeseq <= final
+            )
+            .order_by(tombstones.c.changeseq)
+            .limit(limit + 1)
+        )
+    )
+
+    changes.sort(key=lambda change: change[:2])
+    more = len(changes) > limit
+    changes = changes[:limit]
+
+    changed = [row for _, deleted, row in changes if not deleted]
+    deleted = [key for _, deleted, key in changes if deleted]
+    if changed and deleted:
+        key_columns = sorted(deleted[0])
+        present = set(
+            tuple(row[name] for name in key_columns) for row in changed
+        )
+        deleted = [
+            key for key in deleted
+            if tuple(key[name] for name in key_columns) not in present
+        ]
+
+    return ChangeSet(
+        changed=changed,
+        deleted=deleted,
+        cursor=changes[-1][0] if changes else cursor,
+        more=more
+    )
+
+
+def upgrade_change_tracking(engine):
+    """Add change tracking to tables created without it
+
+    Tables created before the changeseq column was added to the
+    image and server models lack it, so the models can't read them.
+    The column, its index and the change tracking triggers are added
+    to every such table, and their existing rows are numbered as
+    changed. The sequence, functions and tombstone table are created
+    if missing too. Tables that are already tracked are left as they
+    are, so this can be run on every deployment, as
+    init_db(create_all=True) does. Concurrent runs wait for each
+    other on an advisory lock.
+
+    Args:
+        engine (Engine): The DB engine
+
+    Returns:
+        [list]: The names of the upgraded tables
+    """
+    upgraded = []
+
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        quote = connection.dialect.identifier_preparer.quote
+
+        connection.exec_driver_sql(SCHEMA_LOCK)
+        CHANGE_SEQUENCE.create(bind=connection, checkfirst=True)
+        for statement in CHANGE_FUNCTIONS:
+            connection.exec_driver_sql(statement)
+        ChangeTombstoneModel.__table__.create(bind=connection,
+                                              checkfirst=True)
+
+        for table in Base.metadata.sorted_tables:
+            if CHANGE_COLUMN not in table.c or \
+                    not inspector.has_table(table.name):
+                continue
+            columns = [c['name'] for c in inspector.get_columns(table.name)]
+            if CHANGE_COLUMN in columns:
+                continue
+
+            connection.exec_driver_sql(
+                'ALTER TABLE %s ADD COLUMN %s BIGINT' % (
+                    quote(table.name), quote(CHANGE_COLUMN)
+                )
+            )
+            connection.exec_driver_sql(
+                'UPDATE %s SET %s = pint_next_changeseq()' % (
+                    quote(table.name), quote(CHANGE_COLUMN)
+                )
+            )
+            for index in table.indexes:
+                if CHANGE_COLUMN in index.columns:
+                    index.create(bind=connection, checkfirst=True)
+            for statement in change_trigger_statements(
+                    table.name,
+                    [column.name for column in table.primary_key.columns],
+                    quote):
+                connection.exec_driver_sql(statement)
+
+            logger.info('%s: added change tracking', table.name)
+            upgraded.append(table.name)
+
+    return upgraded
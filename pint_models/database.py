@@ -17,13 +17,58 @@
 # specific language governing permissions and limitations
 # under the License.
 
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import re
-
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import scoped_session, sessionmaker
-from pint_models.models import Base
+import ssl
+import threading
+import weakref
+
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+
+from pint_models.instrumentation import (
+    SLOW_QUERY_LOGGER,
+    QueryStats,
+    instrument_engine,
+)
+
+# Connection pool settings that can be provided via init_db()
+# arguments, the dbconfig dict or the environment, mapped to the
+# corresponding environment variable and value parser.
+POOL_OPTIONS = {
+    'pool_size': ('POSTGRES_POOL_SIZE', int),
+    'max_overflow': ('POSTGRES_MAX_OVERFLOW', int),
+    'pool_timeout': ('POSTGRES_POOL_TIMEOUT', float),
+    'pool_recycle': ('POSTGRES_POOL_RECYCLE', int),
+    'pool_pre_ping': ('POSTGRES_POOL_PRE_PING', bool),
+    'pool_use_lifo': ('POSTGRES_POOL_USE_LIFO', bool),
+    # Disable client side pooling, e.g. when connecting via pgbouncer
+    'null_pool': ('POSTGRES_NULL_POOL', bool),
+}
+
+# Driver of postgresql:// URLs that don't name one, which SQLAlchemy
+# 2.1 would otherwise connect with psycopg (version 3), not a
+# dependency of this package.
+DEFAULT_POSTGRES_DRIVER = 'psycopg2'
+
+# Statements taking at least this many seconds are logged when
+# init_db() instruments the engine without an explicit threshold.
+DEFAULT_SLOW_QUERY_THRESHOLD = 0.5
+
+_pool_counters = weakref.WeakKeyDictionary()
+
+# The file, listener and handler set up by create_db_logger()
+_db_log = None
+_db_log_lock = threading.Lock()
+
+# Engines and scoped sessions reset in child processes after a fork
+_fork_engines = weakref.WeakSet()
+_fork_sessions = weakref.WeakSet()
 
 
 def get_environ_entry(key_name):
@@ -33,25 +78,74 @@ def get_environ_entry(key_name):
 
 
 def create_db_logger(outputfile):
-    """Function to setup logging of SQL statements
+    """Function to setup logging of slow and sampled SQL statements
+
+    Statements are handed to a background thread via a queue, so
+    that writing the log file doesn't slow down the queries. Which
+    statements are logged is set by the slow_query_threshold and
+    query_sample_rate arguments of init_db(). Calling it again with
+    the same file reuses the listener, and with another file replaces
+    it, so that statements are only logged once.
 
     Args:
         outputfile (filepath): The filepath where the SQL statements will be
             logged
+
+    Returns:
+        [QueueListener]: The listener writing to the file, or None if
+            no outputfile was provided
     """
+    global _db_log
+
     if not outputfile:
-        return
+        return None
+
+    path = os.path.abspath(outputfile)
+    db_logger = logging.getLogger(SLOW_QUERY_LOGGER)
+
+    with _db_log_lock:
+        if _db_log is not None:
+            if _db_log[0] == path:
+                return _db_log[1]
+            _close_db_logger()
 
-    db_log_file_name = outputfile
-    db_handler_log_level = logging.INFO
-    db_logger_log_level = logging.DEBUG
+        db_handler = logging.FileHandler(path)
+        db_handler.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)s %(message)s'
+        ))
 
-    db_handler = logging.FileHandler(db_log_file_name)
-    db_handler.setLevel(db_handler_log_level)
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, db_handler)
+        listener.start()
+        atexit.register(listener.stop)
+
+        handler = logging.handlers.QueueHandler(log_queue)
+        db_logger.addHandler(handler)
+        db_logger.setLevel(logging.INFO)
+        _db_log = (path, listener, handler)
+
+    return listener
+
+
+def close_db_logger():
+    """Stop logging SQL statements to the create_db_logger() file"""
+    with _db_log_lock:
+        _close_db_logger()
+
+
+def _close_db_logger():
+    global _db_log
+
+    if _db_log is None:
+        return
 
-    db_logger = logging.getLogger('sqlalchemy')
-    db_logger.addHandler(db_handler)
-    db_logger.setLevel(db_logger_log_level)
+    _, listener, handler = _db_log
+    logging.getLogger(SLOW_QUERY_LOGGER).removeHandler(handler)
+    atexit.unregister(listener.stop)
+    listener.stop()
+    for file_handler in listener.handlers:
+        file_handler.close()
+    _db_log = None
 
 
 def create_postgres_url_from_config(dbconfig):
@@ -95,8 +189,168 @@ def create_postgres_url_from_env():
     )
 
 
+def get_pool_options_from_config(dbconfig):
+    """Extract connection pool settings from provided config
+
+    Args:
+        dbconfig: (dict): A dictionary of config settings, which may
+            include any of the POOL_OPTIONS keys
+
+    Returns:
+        [dict]: The pool settings that were specified
+    """
+    return {
+        key: _parse_option(parse, dbconfig[key])
+        for key, (_, parse) in POOL_OPTIONS.items()
+        if dbconfig.get(key) is not None
+    }
+
+
+def get_pool_options_from_env():
+    """Extract connection pool settings from environment settings
+
+    Returns:
+        [dict]: The pool settings that were specified
+    """
+    return {
+        key: _parse_option(parse, os.environ[env_name])
+        for key, (env_name, parse) in POOL_OPTIONS.items()
+        if os.environ.get(env_name)
+    }
+
+
+def create_db_engine(engine_url, echo=None, hide_parameters=None,
+                     pool_options=None, query_cache_size=None):
+    """Create the DB engine with the requested pool settings
+
+    Postgres URLs without a driver, e.g. postgresql://..., use the
+    DEFAULT_POSTGRES_DRIVER.
+
+    Args:
+        engine_url (string): Postgres connection string
+        echo (bool): Whether or not all statements are logged to the
+            default log handler
+        hide_parameters (bool): Whether or not to hide statement
+            parameters in log messages and error reports
+        pool_options (dict, optional): Connection pool settings, see
+            POOL_OPTIONS. If null_pool is set, connections are not
+            pooled and the other pool settings are ignored.
+        query_cache_size (int, optional): Number of compiled statements
+            cached by the engine, defaults to SQLAlchemy's 500
+
+    Returns:
+        [Engine]: The DB engine
+    """
+    engine_args = _get_pool_args(pool_options)
+    if query_cache_size is not None:
+        engine_args['query_cache_size'] = query_cache_size
+
+    url = make_url(engine_url)
+    if url.drivername == 'postgresql':
+        url = url.set(
+            drivername='postgresql+%s' % DEFAULT_POSTGRES_DRIVER
+        )
+
+    engine = create_engine(
+        url,
+        echo=echo,
+        hide_parameters=hide_parameters,
+        **engine_args
+    )
+    _track_pool_events(engine)
+    _make_fork_safe(engine)
+
+    return engine
+
+
+def reset_after_fork():
+    """Drop the connections and sessions inherited from a parent process
+
+    Called automatically in the child after os.fork() (e.g. by
+    gunicorn or multiprocessing), for all engines made by
+    create_db_engine(), init_db() and init_async_db(). The pooled
+    connections are dereferenced without being closed, leaving the
+    parent's connections intact, and new ones are made by the child
+    on first use. The sessions of the scoped_sessions returned by
+    init_db() are discarded as well, so that the child lazily creates
+    its own.
+
+    Sessions shouldn't be in the middle of a transaction when forking.
+    """
+    for db_session in list(_fork_sessions):
+        db_session.registry.clear()
+    for engine in list(_fork_engines):
+        engine.dispose(close=False)
+
+
+def pool_stats(db_session):
+    """Return connection pool statistics
+
+    Args:
+        db_session (scoped_session): DB session as returned by
+            init_db(), or a (sync or async) engine
+
+    Returns:
+        [dict]: The current pool size, checked in, checked out and
+            overflow connection counts (None for an unpooled engine),
+            along with counters of connects, checkouts, checkins and
+            invalidations, and the peak number of checked out
+            connections seen so far
+    """
+    engine = db_session.get_bind() if hasattr(db_session, 'get_bind') \
+        else db_session
+    engine = getattr(engine, 'sync_engine', engine)
+    pool = engine.pool
+
+    stats = {
+        'size': None,
+        'checked_in': None,
+        'checked_out': None,
+        'overflow': None,
+    }
+    if hasattr(pool, 'checkedout'):
+        stats.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': max(pool.overflow(), 0),
+        })
+
+    stats.update(_pool_counters.get(engine, {}))
+    return stats
+
+
+def get_replica_urls(dbconfig=None):
+    """Return the read replica connection strings, if any
+
+    Replicas are taken from the replica_urls list of the dbconfig
+    dict, if provided, or else from the comma separated
+    DATABASE_REPLICA_URIS environment setting.
+
+    Args:
+        dbconfig: (dict, optional): A dictionary of config settings
+
+    Returns:
+        [list]: Postgres connection strings
+    """
+    if dbconfig:
+        return list(dbconfig.get('replica_urls') or [])
+
+    return [
+        url.strip()
+        for url in os.environ.get('DATABASE_REPLICA_URIS', '').split(',')
+        if url.strip()
+    ]
+
+
 def init_db(dbconfig=None, outputfile=None, echo=None,
-            hide_parameters=None, create_all=False):
+            hide_parameters=None, create_all=False, pool_size=None,
+            max_overflow=None, pool_timeout=None, pool_recycle=None,
+            pool_pre_ping=None, pool_use_lifo=None, null_pool=None,
+            replica_urls=None, replica_strategy='round-robin',
+            max_replica_lag=None, instrument=None,
+            slow_query_threshold=None, query_sample_rate=None,
+            partition_images=False, query_cache_size=None):
     # import all modules here that might define models so that
     # they will be registered properly on the metadata.  Otherwise
     # you will have to import them first before calling init_db()
@@ -105,7 +359,8 @@ def init_db(dbconfig=None, outputfile=None, echo=None,
     Args:
         config (dict): A dictionary of config settings
             that are required to connect to the Postgres DB
-        outputfile (filepath): File location to log SQL statements
+        outputfile (filepath): File location to log slow and sampled
+            SQL statements
         echo (bool): Whether or not all statements are logged to the
             default log handler
             https://docs.sqlalchemy.org/en/14/core/engines.html#sqlalchemy.create_engine.params.echo
@@ -113,43 +368,244 @@ def init_db(dbconfig=None, outputfile=None, echo=None,
             will not be logged to INFO leverl log messages or in
             logged representation of error reports.
             https://docs.sqlalchemy.org/en/14/core/engines.html#sqlalchemy.create_engine.params.hide_parameters
+        create_all (bool): Whether or not to create missing tables,
+            and add change tracking to tables created by releases
+            without it (see upgrade_change_tracking())
+        pool_size (int): Number of connections kept open in the pool
+        max_overflow (int): Number of connections allowed in excess
+            of pool_size
+        pool_timeout (float): Seconds to wait for a pooled connection
+            before giving up
+        pool_recycle (int): Seconds after which a pooled connection
+            is replaced
+        pool_pre_ping (bool): Whether or not to test connections for
+            liveness on checkout, e.g. to survive DB failovers
+        pool_use_lifo (bool): Reuse the most recently returned
+            connection first rather than the oldest one
+        null_pool (bool): Disable client side connection pooling, e.g.
+            when connecting through pgbouncer
+
+        Pool settings that are not provided are taken from the
+        dbconfig dict, if provided, or else from the POSTGRES_POOL_*
+        environment settings (see POOL_OPTIONS).
+
+        replica_urls (list): Connection strings of read replicas,
+            defaults to get_replica_urls(). If any are provided,
+            reads are routed to the replicas (see RoutingSession).
+        replica_strategy (string): How to pick a replica for a read,
+            either 'round-robin' or 'least-connections'
+        max_replica_lag (float): Read from the primary instead of any
+            replica lagging by more than this many seconds
+        instrument (bool): Whether or not to record statement latency
+            and pool wait statistics (see query_stats()), enabled by
+            default if any of outputfile, slow_query_threshold or
+            query_sample_rate are provided
+        slow_query_threshold (float): Log statements taking at least
+            this many seconds, defaults to DEFAULT_SLOW_QUERY_THRESHOLD
+        query_sample_rate (float): Fraction of all statements to log
+            regardless of their duration, e.g. 1 to log every one
+        partition_images (bool): Whether create_all creates missing
+            image tables partitioned by state (see
+            create_partitioned_image_tables())
+        query_cache_size (int): Number of compiled statements cached
+            per engine, to be raised if the cache misses often under
+            a varied query load (see the cache stats logged by echo)
 
     Returns:
         [scoped_session]: DB scoped_session to use for DB SQL operations
     """
+    # The ORM and the models are only imported here so that tools only
+    # needing the connection helpers don't pay for importing them.
+    from sqlalchemy.orm import scoped_session, sessionmaker
+    from pint_models.models import Base
+    from pint_models.routing import ReplicaSet, RoutingSession
 
     # Setup a dedicated DB logger if a target output file was provided
     create_db_logger(outputfile)
 
-    # Create the DB engine, either from provided settings, or
-    # using relevant environment settings.
-    if dbconfig:
-        engine_url = create_postgres_url_from_config(dbconfig)
-    elif os.environ.get('DATABASE_URI', None):
-        engine_url = os.environ['DATABASE_URI']
-    else:
-        engine_url = create_postgres_url_from_env()
-
-    engine = create_engine(
+    engine_url, pool_options = _get_engine_settings(dbconfig, {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_recycle': pool_recycle,
+        'pool_pre_ping': pool_pre_ping,
+        'pool_use_lifo': pool_use_lifo,
+        'null_pool': null_pool,
+    })
+
+    engine = create_db_engine(
         engine_url,
         echo=echo,
-        hide_parameters=hide_parameters
+        hide_parameters=hide_parameters,
+        pool_options=pool_options,
+        query_cache_size=query_cache_size
     )
 
-    db_session = scoped_session(sessionmaker(autocommit=False,
-                                             autoflush=False,
-                                             bind=engine))
+    if instrument is None:
+        instrument = any(
+            option is not None
+            for option in (outputfile, slow_query_threshold,
+                           query_sample_rate)
+        )
+    stats = None
+    if instrument:
+        stats = QueryStats(
+            slow_query_threshold=(
+                DEFAULT_SLOW_QUERY_THRESHOLD
+                if slow_query_threshold is None else slow_query_threshold
+            ),
+            sample_rate=query_sample_rate or 0.0
+        )
+        instrument_engine(engine, stats)
+
+    if replica_urls is None:
+        replica_urls = get_replica_urls(dbconfig)
+
+    if replica_urls:
+        replica_engines = [
+            create_db_engine(
+                url,
+                echo=echo,
+                hide_parameters=hide_parameters,
+                pool_options=pool_options,
+                query_cache_size=query_cache_size
+            )
+            for url in replica_urls
+        ]
+        if stats is not None:
+            for replica_engine in replica_engines:
+                instrument_engine(replica_engine, stats)
+
+        replicas = ReplicaSet(
+            replica_engines,
+            strategy=replica_strategy,
+            max_lag=max_replica_lag
+        )
+        db_session = scoped_session(sessionmaker(class_=RoutingSession,
+                                                 autoflush=False,
+                                                 bind=engine,
+                                                 replicas=replicas))
+    else:
+        db_session = scoped_session(sessionmaker(autocommit=False,
+                                                 autoflush=False,
+                                                 bind=engine))
+    _fork_sessions.add(db_session)
     Base.query = db_session.query_property()
 
     if create_all:
+        if partition_images:
+            from pint_models.partitioning import (
+                create_partitioned_image_tables,
+            )
+            create_partitioned_image_tables(engine)
         Base.metadata.create_all(bind=engine)
+        if engine.dialect.name == 'postgresql':
+            from pint_models.changes import upgrade_change_tracking
+            upgrade_change_tracking(engine)
 
     return db_session
 
 
+def create_async_postgres_url(engine_url):
+    """Convert a Postgres connection string for use with asyncpg
+
+    asyncpg doesn't understand the libpq sslmode and sslrootcert
+    parameters, so they are translated to its ssl connect argument.
+
+    Args:
+        engine_url (string): Postgres connection string
+
+    Returns:
+        [tuple]: The asyncpg connection URL and a dict of any
+            additional connect arguments
+    """
+    url = make_url(engine_url).set(drivername='postgresql+asyncpg')
+    query = dict(url.query)
+    ssl_mode = query.pop('sslmode', None)
+    ssl_root_cert = query.pop('sslrootcert', None)
+
+    connect_args = {}
+    if ssl_root_cert and ssl_mode not in (None, 'disable', 'allow'):
+        context = ssl.create_default_context(cafile=ssl_root_cert)
+        if ssl_mode != 'verify-full':
+            context.check_hostname = False
+        connect_args['ssl'] = context
+    elif ssl_mode:
+        query['ssl'] = ssl_mode
+
+    return url.set(query=query), connect_args
+
+
+def init_async_db(dbconfig=None, echo=None, hide_parameters=None,
+                  pool_size=None, max_overflow=None, pool_timeout=None,
+                  pool_recycle=None, pool_pre_ping=None,
+                  pool_use_lifo=None, null_pool=None):
+    """Setup an asyncio DB session factory
+
+    The connection settings are resolved in the same way as for
+    init_db(), but connections are made using the asyncpg driver,
+    which must be installed along with SQLAlchemy's asyncio extra
+    (see the async extra of this package).
+
+    Args:
+        dbconfig (dict): A dictionary of config settings
+            that are required to connect to the Postgres DB
+        echo (bool): Whether or not all statements are logged to the
+            default log handler
+        hide_parameters (bool): Whether or not to hide statement
+            parameters in log messages and error reports
+        pool_size, max_overflow, pool_timeout, pool_recycle,
+        pool_pre_ping, pool_use_lifo, null_pool: Connection pool
+            settings, as for init_db()
+
+    Returns:
+        [async_sessionmaker]: Factory for AsyncSession instances
+    """
+    from sqlalchemy.ext.asyncio import (
+        async_sessionmaker,
+        create_async_engine,
+    )
+
+    engine_url, pool_options = _get_engine_settings(dbconfig, {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_recycle': pool_recycle,
+        'pool_pre_ping': pool_pre_ping,
+        'pool_use_lifo': pool_use_lifo,
+        'null_pool': null_pool,
+    })
+    async_url, connect_args = create_async_postgres_url(engine_url)
+
+    engine = create_async_engine(
+        async_url,
+        echo=echo,
+        hide_parameters=hide_parameters,
+        connect_args=connect_args,
+        **_get_pool_args(pool_options)
+    )
+    _track_pool_events(engine.sync_engine)
+    _make_fork_safe(engine.sync_engine)
+
+    return async_sessionmaker(bind=engine,
+                              autoflush=False,
+                              expire_on_commit=False)
+
+
 def get_psql_server_version(db_session):
     """Return the psql server version"""
     result = db_session.execute(text("select version()"))
+    return _parse_psql_server_version(result)
+
+
+async def get_psql_server_version_async(db_session):
+    """Return the psql server version using an AsyncSession"""
+    result = await db_session.execute(text("select version()"))
+    return _parse_psql_server_version(result)
+
+
+def _parse_psql_server_version(result):
+    """Extract the psql server version from a version() query result"""
     for row in result:
         version = re.search(r'PostgreSQL\s+\d+.\d+', str(row))
         if version:
@@ -157,6 +613,124 @@ def get_psql_server_version(db_session):
     return version.group(0)
 
 
+def _get_engine_settings(dbconfig, overrides):
+    """Resolve the connection string and pool settings to use
+
+    Args:
+        dbconfig (dict): A dictionary of config settings, or None to
+            use the DATABASE_URI or POSTGRES_* environment settings
+        overrides (dict): Pool settings explicitly provided by the
+            caller, None values are ignored
+
+    Returns:
+        [tuple]: The connection string and pool settings
+    """
+    # Create the DB engine, either from provided settings, or
+    # using relevant environment settings.
+    if dbconfig:
+        engine_url = create_postgres_url_from_config(dbconfig)
+        pool_options = get_pool_options_from_config(dbconfig)
+    elif os.environ.get('DATABASE_URI', None):
+        engine_url = os.environ['DATABASE_URI']
+        pool_options = get_pool_options_from_env()
+    else:
+        engine_url = create_postgres_url_from_env()
+        pool_options = get_pool_options_from_env()
+
+    pool_options.update(
+        {k: v for k, v in overrides.items() if v is not None}
+    )
+    return engine_url, pool_options
+
+
+def _get_pool_args(pool_options):
+    """Convert pool settings into engine creation arguments"""
+    pool_options = dict(pool_options or {})
+    unknown = set(pool_options) - set(POOL_OPTIONS)
+    if unknown:
+        raise ValueError(
+            'Unknown pool option(s) %s' % ', '.join(sorted(unknown))
+        )
+
+    if not pool_options.pop('null_pool', False):
+        return pool_options
+
+    engine_args = {'poolclass': NullPool}
+    if pool_options.get('pool_pre_ping') is not None:
+        engine_args['pool_pre_ping'] = pool_options['pool_pre_ping']
+    return engine_args
+
+
+def _parse_option(parse, value):
+    """Parse a config or environment setting with the given type"""
+    if parse is bool and not isinstance(value, bool):
+        return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+    return parse(value)
+
+
+def _track_pool_events(engine):
+    """Count connection pool events for pool_stats()"""
+    counters = {
+        'connects': 0,
+        'checkouts': 0,
+        'checkins': 0,
+        'invalidations': 0,
+        'peak_checked_out': 0,
+    }
+    _pool_counters[engine] = counters
+
+    def on_connect(dbapi_connection, connection_record):
+        counters['connects'] += 1
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        counters['checkouts'] += 1
+        if hasattr(engine.pool, 'checkedout'):
+            counters['peak_checked_out'] = max(
+                counters['peak_checked_out'],
+                engine.pool.checkedout()
+            )
+
+    def on_checkin(dbapi_connection, connection_record):
+        counters['checkins'] += 1
+
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        counters['invalidations'] += 1
+
+    event.listen(engine, 'connect', on_connect)
+    event.listen(engine, 'checkout', on_checkout)
+    event.listen(engine, 'checkin', on_checkin)
+    event.listen(engine, 'invalidate', on_invalidate)
+
+
+def _make_fork_safe(engine):
+    """Keep an engine's connections from being used across processes
+
+    Besides resetting the engine after os.fork() (see
+    reset_after_fork()), connections are tagged with the PID of the
+    process which made them, and a connection checked out in another
+    process is discarded, without closing it, in favour of a new one.
+    """
+    _fork_engines.add(engine)
+
+    def on_connect(dbapi_connection, connection_record):
+        connection_record.info['pid'] = os.getpid()
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        pid = os.getpid()
+        if connection_record.info.get('pid', pid) != pid:
+            connection_record.dbapi_connection = None
+            connection_proxy.dbapi_connection = None
+            raise exc.DisconnectionError(
+                'Connection record belongs to pid %s, '
+                'attempting to check out in pid %s' % (
+                    connection_record.info['pid'], pid
+                )
+            )
+
+    event.listen(engine, 'connect', on_connect)
+    event.listen(engine, 'checkout', on_checkout)
+
+
 def _create_postgres_url(db_user, db_password, db_name, db_host,
                          db_port=5432, db_ssl_mode=None,
                          db_root_cert=None):
@@ -199,3 +773,7 @@ def _create_postgres_url(db_user, db_password, db_name, db_host,
                 'host': db_host,
                 'port': db_port,
                 'ssl': ssl_mode})
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_after_fork)
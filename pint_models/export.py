@@ -0,0 +1,140 @@
+# Copyright (c) 2026 SUSE LLC
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import functools
+import json
+from xml.sax.saxutils import quoteattr
+
+from pint_models.models import ProviderImageBase, ProviderServerBase
+from pint_models.queries import filtered_select
+
+DEFAULT_CHUNK_SIZE = 1000
+
+FORMATS = (None, 'json', 'xml')
+
+
+def stream_rows(session, model, filters=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                format=None):
+    """Stream the rows of a model's table using a server side cursor
+
+    Rows are fetched chunk_size at a time and are never turned into
+    ORM objects, so memory use doesn't grow with the table size.
+    The session's connection is held until the generator is
+    exhausted or closed.
+
+    Args:
+        session (Session): DB session to query with
+        model (PintBase): The model class to export
+        filters (dict, optional): Column name to value, or to a list
+            of values any of which may match
+        chunk_size (int): Number of rows fetched per round trip
+        format (string, optional): None to yield a read-only mapping
+            per row, 'json' to yield a JSON object string per row, or
+            'xml' to yield an XML element string per row
+
+    Returns:
+        [generator]: The rows in the requested format
+    """
+    # Checked here rather than in the generator, so that invalid
+    # arguments are reported by the call rather than the first read.
+    if format not in FORMATS:
+        raise ValueError('Invalid export format %s' % repr(format))
+
+    query = filtered_select(model, filters).execution_options(
+        stream_results=True,
+        yield_per=chunk_size
+    )
+    return _stream_rows(session, model, query, chunk_size, format)
+
+
+def _stream_rows(session, model, query, chunk_size, format):
+    """Run a stream_rows() query, yielding its rows as they arrive"""
+    result = session.execute(query)
+    # Closed also when the consumer stops early, so that the server
+    # side cursor doesn't stay open until the session ends
+    try:
+        if format is None:
+            for partition in result.mappings().partitions(chunk_size):
+                for row in partition:
+                    yield row
+            return
+
+        serialize = model.row_serializer(list(result.keys()))
+        if format == 'json':
+            formatter = _json_fragment
+        else:
+            formatter = functools.partial(_xml_fragment, _xml_tag(model))
+
+        for partition in result.partitions(chunk_size):
+            for row in partition:
+                yield formatter(serialize(row))
+    finally:
+        result.close()
+
+
+def stream_images(session, model, filters=None,
+                  chunk_size=DEFAULT_CHUNK_SIZE, format=None):
+    """Stream the rows of a ProviderImageBase model, see stream_rows()"""
+    if not issubclass(model, ProviderImageBase):
+        raise ValueError('%s is not an image model' % model.__name__)
+    return stream_rows(session, model, filters, chunk_size, format)
+
+
+def stream_servers(session, model, filters=None,
+                   chunk_size=DEFAULT_CHUNK_SIZE, format=None):
+    """Stream the rows of a ProviderServerBase model, see stream_rows()"""
+    if not issubclass(model, ProviderServerBase):
+        raise ValueError('%s is not a server model' % model.__name__)
+    return stream_rows(session, model, filters, chunk_size, format)
+
+
+def json_array(fragments):
+    """Wrap streamed JSON fragments into the chunks of a JSON array"""
+    yield '['
+    for index, fragment in enumerate(fragments):
+        yield fragment if index == 0 else ',' + fragment
+    yield ']'
+
+
+def xml_document(fragments, root):
+    """Wrap streamed XML fragments into the chunks of an XML document"""
+    yield '<?xml version="1.0" encoding="UTF-8"?><%s>' % root
+    for fragment in fragments:
+        yield fragment
+    yield '</%s>' % root
+
+
+def _json_fragment(values):
+    return json.dumps(values)
+
+
+def _xml_fragment(tag, values):
+    return '<%s %s/>' % (tag, ' '.join(
+        '%s=%s' % (k, quoteattr(str(v)))
+        for k, v in values.items()
+        if v is not None
+    ))
+
+
+def _xml_tag(model):
+    if issubclass(model, ProviderImageBase):
+        return 'image'
+    if issubclass(model, ProviderServerBase):
+        return 'server'
+    return model.__tablename__
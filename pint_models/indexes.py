@@ -0,0 +1,239 @@
+# Copyright (c) 2026 SUSE LLC
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import logging
+import re
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
+
+logger = logging.getLogger(__name__)
+
+_CREATE_INDEX = re.compile(r'^CREATE (UNIQUE )?INDEX ')
+
+INVALID_INDEXES_QUERY = text(
+    'SELECT c.relname FROM pg_index i '
+    'JOIN pg_class c ON c.oid = i.indexrelid '
+    'JOIN pg_namespace n ON n.oid = c.relnamespace '
+    'WHERE NOT i.indisvalid AND n.nspname = current_schema()'
+)
+
+
+def missing_indexes(engine, metadata=None):
+    """Return the declared indexes that don't exist (validly) in the DB
+
+    Indexes left invalid by an interrupted concurrent build are
+    reported as missing too. Trigram indexes are left out if the
+    pg_trgm extension isn't installed.
+
+    Args:
+        engine (Engine): The DB engine
+        metadata (MetaData, optional): The metadata declaring the
+            indexes, defaults to that of the pint_models models
+
+    Returns:
+        [list]: The missing Index objects
+    """
+    from pint_models.models import Base, has_trigram_extension
+    if metadata is None:
+        metadata = Base.metadata
+
+    inspector = inspect(engine)
+    with engine.connect() as connection:
+        invalid = set(connection.execute(INVALID_INDEXES_QUERY).scalars())
+        trigram = has_trigram_extension(connection)
+
+    missing = []
+    for table in metadata.sorted_tables:
+        if not table.indexes or not inspector.has_table(table.name):
+            continue
+
+        existing = set(
+            index['name'] for index in inspector.get_indexes(table.name)
+        ) - invalid
+        missing.extend(
+            index for index in sorted(table.indexes, key=lambda i: i.name)
+            if index.name not in existing and
+            (trigram or not index.info.get('trigram'))
+        )
+
+    return missing
+
+
+def create_index_statement(index, dialect, concurrently=True):
+    """Return the CREATE INDEX statement for an index
+
+    Args:
+        index (Index): The index to create
+        dialect (Dialect): The DB dialect to compile for
+        concurrently (bool): Whether to build the index without
+            blocking writes to the table
+
+    Returns:
+        [string]: The SQL statement
+    """
+    sql = str(CreateIndex(index).compile(dialect=dialect))
+    if concurrently:
+        sql = _CREATE_INDEX.sub(r'CREATE \1INDEX CONCURRENTLY ', sql)
+    return sql
+
+
+def create_missing_indexes(engine, metadata=None, concurrently=True):
+    """Create the declared indexes missing from an existing DB
+
+    Unlike Base.metadata.create_all(), which only creates indexes
+    along with new tables, this adds indexes declared after a table
+    was created. By default they are built with CREATE INDEX
+    CONCURRENTLY, which doesn't block writes but can't run inside a
+    transaction, so each statement is run in autocommit mode. Invalid
+    leftovers of an earlier failed concurrent build are dropped and
+    rebuilt.
+
+    Postgres can't build the index of a partitioned table (see
+    create_partitioned_image_tables()) concurrently. Such an index is
+    instead created on the table alone, then built concurrently on
+    each partition and attached to it, the usual way of adding an
+    index to a partitioned table without blocking writes.
+
+    Args:
+        engine (Engine): The DB engine
+        metadata (MetaData, optional): The metadata declaring the
+            indexes, defaults to that of the pint_models models
+        concurrently (bool): Whether to build the indexes without
+            blocking writes to the tables
+
+    Returns:
+        [list]: The names of the created indexes
+    """
+    return _create_indexes(
+        engine, missing_indexes(engine, metadata), concurrently
+    )
+
+
+def _create_indexes(engine, indexes, concurrently):
+    """Create indexes in autocommit mode, rebuilding invalid ones"""
+    from pint_models.partitioning import is_partitioned, partition_names
+
+    created = []
+
+    with engine.connect() as connection:
+        connection = connection.execution_options(
+            isolation_level='AUTOCOMMIT'
+        )
+        quote = connection.dialect.identifier_preparer.quote
+        invalid = set(connection.execute(INVALID_INDEXES_QUERY).scalars())
+
+        for index in indexes:
+            partitions = []
+            if is_partitioned(connection, index.table.name):
+                partitions = partition_names(connection, index.table.name)
+
+            if index.name in invalid:
+                logger.warning('Rebuilding invalid index %s', index.name)
+                # The index of a partitioned table can't be dropped
+                # concurrently either
+                connection.exec_driver_sql('DROP INDEX %s%s' % (
+                    'CONCURRENTLY ' if concurrently and not partitions
+                    else '',
+                    quote(index.name)
+                ))
+
+            logger.info('Creating index %s on %s',
+                        index.name, index.table.name)
+            if concurrently and partitions:
+                _create_partitioned_index(connection, index, partitions)
+            else:
+                connection.exec_driver_sql(create_index_statement(
+                    index, connection.dialect, concurrently
+                ))
+            created.append(index.name)
+
+    return created
+
+
+def _create_partitioned_index(connection, index, partitions):
+    """Create the index of a partitioned table one partition at a time
+
+    The index is first created on the partitioned table alone, which
+    leaves it invalid, until the index built concurrently on each
+    partition has been attached to it.
+    """
+    quote = connection.dialect.identifier_preparer.quote
+    statement = create_index_statement(index, connection.dialect, False)
+    target = 'INDEX %s ON %s ' % (quote(index.name), quote(index.table.name))
+
+    connection.exec_driver_sql(statement.replace(
+        target,
+        'INDEX %s ON ONLY %s ' % (quote(index.name), quote(index.table.name)),
+        1
+    ))
+
+    for partition in partitions:
+        name = '%s_%s' % (index.name, _partition_suffix(index, partition))
+        # Left over by an earlier, interrupted build
+        connection.exec_driver_sql(
+            'DROP INDEX CONCURRENTLY IF EXISTS %s' % quote(name)
+        )
+        connection.exec_driver_sql(statement.replace(
+            target,
+            'INDEX CONCURRENTLY %s ON %s ' % (quote(name), quote(partition)),
+            1
+        ))
+        connection.exec_driver_sql('ALTER INDEX %s ATTACH PARTITION %s' % (
+            quote(index.name), quote(name)
+        ))
+
+
+def _partition_suffix(index, partition):
+    """Return what a partition's name adds to that of its table"""
+    prefix = index.table.name + '_'
+    if partition.startswith(prefix):
+        return partition[len(prefix):]
+    return partition
+
+
+def create_trigram_indexes(engine, metadata=None, concurrently=True):
+    """Install pg_trgm and create the missing trigram indexes
+
+    Creating the extension requires the CREATE privilege on the DB,
+    pg_trgm being a trusted extension.
+
+    Args:
+        engine (Engine): The DB engine
+        metadata (MetaData, optional): The metadata declaring the
+            indexes, defaults to that of the pint_models models
+        concurrently (bool): Whether to build the indexes without
+            blocking writes to the tables
+
+    Returns:
+        [list]: The names of the created indexes
+    """
+    from pint_models.models import TRIGRAM_EXTENSION
+
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            'CREATE EXTENSION IF NOT EXISTS %s' % TRIGRAM_EXTENSION
+        )
+
+    return _create_indexes(
+        engine,
+        [i for i in missing_indexes(engine, metadata)
+         if i.info.get('trigram')],
+        concurrently
+    )
@@ -0,0 +1,421 @@
+# Copyright (c) 2026 SUSE LLC
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import bisect
+import functools
+import logging
+import random
+import re
+import threading
+import time
+import weakref
+
+from sqlalchemy import event
+
+# Statements over the slow query threshold, and sampled statements,
+# are logged here. create_db_logger() attaches a non-blocking queue
+# handler writing them to a file.
+SLOW_QUERY_LOGGER = 'pint_models.slow_query'
+
+# Histogram bucket upper bounds in seconds, as used by Prometheus
+# client libraries by default
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# Statements whose fingerprint would exceed the max_fingerprints
+# limit of a QueryStats are counted under this one instead.
+OTHER_FINGERPRINT = 'other'
+
+_FINGERPRINT_RULES = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'%\(\w+\)s|%s|\$\d+|(?<![:\w]):\w+|\?'), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\s+'), ' '),
+    (re.compile(r'\bIN \(\?(?:, \?)*\)', re.IGNORECASE), 'IN (?)'),
+    (re.compile(r'(\(\?(?:, \?)*\))(?:, \1)+'), r'\1, ...'),
+)
+
+slow_query_log = logging.getLogger(SLOW_QUERY_LOGGER)
+
+_engine_stats = weakref.WeakKeyDictionary()
+
+
+@functools.lru_cache(maxsize=2048)
+def fingerprint(statement):
+    """Return the normalized form of an SQL statement
+
+    Literals and bind parameters are replaced by ?, IN lists and
+    multi-row VALUES lists are collapsed and whitespace normalized,
+    so that executions of the same statement with different values
+    share a fingerprint.
+
+    Args:
+        statement (string): The SQL statement
+
+    Returns:
+        [string]: The statement fingerprint
+    """
+    for pattern, replacement in _FINGERPRINT_RULES:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+class LatencyHistogram(object):
+    """Cumulative histogram of durations in seconds
+
+    Args:
+        buckets (tuple): Sorted bucket upper bounds in seconds
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, duration):
+        self.counts[bisect.bisect_left(self.buckets, duration)] += 1
+        self.count += 1
+        self.sum += duration
+
+    def cumulative(self):
+        """Return (upper bound, cumulative count) pairs, ending at +Inf"""
+        pairs = []
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),),
+                                self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': self.cumulative(),
+        }
+
+
+class StatementStats(object):
+    """Latency and row counts of the statements sharing a fingerprint"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.latency = LatencyHistogram(buckets)
+        self.rows = 0
+        self.max = 0.0
+
+    def observe(self, duration, rows):
+        self.latency.observe(duration)
+        self.max = max(self.max, duration)
+        if rows is not None and rows > 0:
+            self.rows += rows
+
+    def to_dict(self):
+        stats = self.latency.to_dict()
+        stats.update({'rows': self.rows, 'max': self.max})
+        return stats
+
+
+class QueryStats(object):
+    """Statement latency, row count and connection pool statistics
+
+    Attach to engines with instrument_engine(). Statements taking at
+    least slow_query_threshold seconds are logged as warnings to the
+    pint_models.slow_query logger, and a random sample_rate fraction
+    of the remaining statements are logged at info level.
+
+    Args:
+        slow_query_threshold (float, optional): Duration in seconds
+            from which a statement is logged as slow, None to disable
+        sample_rate (float): Fraction of statements to log regardless
+            of their duration, between 0 and 1
+        max_fingerprints (int): Maximum number of distinct statement
+            fingerprints to track, further statements are counted
+            under the 'other' fingerprint
+        buckets (tuple): Histogram bucket upper bounds in seconds
+    """
+
+    def __init__(self, slow_query_threshold=None, sample_rate=0.0,
+                 max_fingerprints=500, buckets=LATENCY_BUCKETS):
+        if not 0 <= sample_rate <= 1:
+            raise ValueError(
+                'Invalid sample rate %s, expected a value between 0 '
+                'and 1' % repr(sample_rate)
+            )
+
+        self.slow_query_threshold = slow_query_threshold
+        self.sample_rate = sample_rate
+        self.max_fingerprints = max_fingerprints
+        self.buckets = tuple(buckets)
+
+        self.statements = {}
+        self.errors = 0
+        self.slow_queries = 0
+        self.pool_wait = LatencyHistogram(self.buckets)
+        self.pool_hold = LatencyHistogram(self.buckets)
+        self._lock = threading.Lock()
+
+    def record_statement(self, statement, duration, rows=None):
+        """Record the execution of a statement
+
+        Args:
+            statement (string): The SQL statement
+            duration (float): Execution time in seconds
+            rows (int, optional): Number of rows returned or affected
+        """
+        key = fingerprint(statement)
+        with self._lock:
+            stats = self.statements.get(key)
+            if stats is None:
+                if len(self.statements) >= self.max_fingerprints:
+                    key = OTHER_FINGERPRINT
+                stats = self.statements.setdefault(
+                    key, StatementStats(self.buckets)
+                )
+            stats.observe(duration, rows)
+
+            slow = self.slow_query_threshold is not None and \
+                duration >= self.slow_query_threshold
+            if slow:
+                self.slow_queries += 1
+
+        if slow:
+            slow_query_log.warning(
+                'Slow query (%.3fs, %s rows): %s',
+                duration, _rows_text(rows), statement
+            )
+        elif self.sample_rate and random.random() < self.sample_rate:
+            slow_query_log.info(
+                'Sampled query (%.3fs, %s rows): %s',
+                duration, _rows_text(rows), statement
+            )
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def record_pool_wait(self, duration):
+        with self._lock:
+            self.pool_wait.observe(duration)
+
+    def record_pool_hold(self, duration):
+        with self._lock:
+            self.pool_hold.observe(duration)
+
+    def snapshot(self):
+        """Return a copy of the statistics as plain dicts
+
+        Returns:
+            [dict]: Per fingerprint statement statistics, the pool
+                checkout wait and connection hold time histograms,
+                and the error and slow query counts
+        """
+        with self._lock:
+            return {
+                'statements': {
+                    key: stats.to_dict()
+                    for key, stats in self.statements.items()
+                },
+                'pool_wait': self.pool_wait.to_dict(),
+                'pool_hold': self.pool_hold.to_dict(),
+                'errors': self.errors,
+                'slow_queries': self.slow_queries,
+            }
+
+    def reset(self):
+        """Clear all statistics"""
+        with self._lock:
+            self.statements = {}
+            self.errors = 0
+            self.slow_queries = 0
+            self.pool_wait = LatencyHistogram(self.buckets)
+            self.pool_hold = LatencyHistogram(self.buckets)
+
+    def prometheus_text(self, prefix='pint_sql'):
+        """Return the statistics in the Prometheus text exposition format
+
+        Args:
+            prefix (string): Prefix of the metric names
+
+        Returns:
+            [string]: The metrics, e.g. to serve on a /metrics endpoint
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        name = prefix + '_statement_duration_seconds'
+        lines += [
+            '# HELP %s Statement execution time by fingerprint.' % name,
+            '# TYPE %s histogram' % name,
+        ]
+        for key, stats in sorted(snapshot['statements'].items()):
+            lines += _histogram_lines(
+                name, stats, 'fingerprint="%s",' % _label_value(key)
+            )
+
+        name = prefix + '_statement_rows_total'
+        lines += [
+            '# HELP %s Rows returned or affected by fingerprint.' % name,
+            '# TYPE %s counter' % name,
+        ]
+        for key, stats in sorted(snapshot['statements'].items()):
+            lines.append('%s{fingerprint="%s"} %d' % (
+                name, _label_value(key), stats['rows']
+            ))
+
+        for metric, help_text in (
+                ('pool_wait', 'Time spent waiting for a pooled connection.'),
+                ('pool_hold', 'Time pooled connections were checked out.')):
+            name = '%s_%s_seconds' % (prefix, metric)
+            lines += [
+                '# HELP %s %s' % (name, help_text),
+                '# TYPE %s histogram' % name,
+            ]
+            lines += _histogram_lines(name, snapshot[metric])
+
+        for metric, help_text in (
+                ('errors', 'Statements that raised an error.'),
+                ('slow_queries', 'Statements over the slow threshold.')):
+            name = '%s_%s_total' % (prefix, metric)
+            lines += [
+                '# HELP %s %s' % (name, help_text),
+                '# TYPE %s counter' % name,
+                '%s %d' % (name, snapshot[metric]),
+            ]
+
+        return '\n'.join(lines) + '\n'
+
+
+def instrument_engine(engine, stats=None):
+    """Record statement and connection pool statistics of an engine
+
+    Args:
+        engine (Engine): The (sync or async) engine to instrument
+        stats (QueryStats, optional): Where to record the statistics,
+            e.g. to share them between a primary and its replicas,
+            defaults to a new QueryStats
+
+    Returns:
+        [QueryStats]: The statistics of the engine
+    """
+    engine = getattr(engine, 'sync_engine', engine)
+    if stats is None:
+        stats = QueryStats()
+    _engine_stats[engine] = stats
+
+    def before_cursor_execute(conn, cursor, statement, parameters,
+                              context, executemany):
+        conn.info.setdefault('pint_query_start', []).append(
+            time.perf_counter()
+        )
+
+    def after_cursor_execute(conn, cursor, statement, parameters,
+                             context, executemany):
+        started = conn.info['pint_query_start'].pop()
+        rows = getattr(cursor, 'rowcount', None)
+        stats.record_statement(
+            statement,
+            time.perf_counter() - started,
+            rows if rows is not None and rows >= 0 else None
+        )
+
+    def handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None:
+            starts = connection.info.get('pint_query_start')
+            if starts:
+                starts.pop()
+        stats.record_error()
+
+    # Pool events only fire once a connection has been checked out,
+    # so the time spent waiting for one, be it for a free connection
+    # of an exhausted pool or for a new one to be made, is measured
+    # around the engine's checkout, which, unlike the pool, survives
+    # dispose().
+    raw_connection = engine.raw_connection
+
+    @functools.wraps(raw_connection)
+    def timed_raw_connection(*args, **kwargs):
+        started = time.perf_counter()
+        connection = raw_connection(*args, **kwargs)
+        stats.record_pool_wait(time.perf_counter() - started)
+        return connection
+
+    engine.raw_connection = timed_raw_connection
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info['pint_checkout'] = time.perf_counter()
+
+    def on_checkin(dbapi_connection, connection_record):
+        checked_out = connection_record.info.pop('pint_checkout', None)
+        if checked_out is not None:
+            stats.record_pool_hold(time.perf_counter() - checked_out)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+    event.listen(engine, 'handle_error', handle_error)
+    event.listen(engine, 'checkout', on_checkout)
+    event.listen(engine, 'checkin', on_checkin)
+
+    return stats
+
+
+def query_stats(db_session):
+    """Return the QueryStats of an instrumented session or engine
+
+    Args:
+        db_session (scoped_session): DB session as returned by
+            init_db(), or a (sync or async) engine
+
+    Returns:
+        [QueryStats]: The statistics, or None if the engine isn't
+            instrumented
+    """
+    engine = db_session.get_bind() if hasattr(db_session, 'get_bind') \
+        else db_session
+    engine = getattr(engine, 'sync_engine', engine)
+    return _engine_stats.get(engine)
+
+
+def _histogram_lines(name, histogram, labels=''):
+    """Return the exposition lines of a histogram dict"""
+    lines = []
+    for bound, count in histogram['buckets']:
+        lines.append('%s_bucket{%sle="%s"} %d' % (
+            name, labels, '+Inf' if bound == float('inf') else repr(bound),
+            count
+        ))
+
+    labels = '{%s}' % labels.rstrip(',') if labels else ''
+    lines.append('%s_sum%s %r' % (name, labels, histogram['sum']))
+    lines.append('%s_count%s %d' % (name, labels, histogram['count']))
+    return lines
+
+
+def _label_value(value):
+    """Escape a Prometheus label value"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace(
+        '\n', '\\n'
+    )
+
+
+def _rows_text(rows):
+    return '?' if rows is None else rows
@@ -0,0 +1,274 @@
+# Copyright (c) 2026 SUSE LLC
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import array
+import bisect
+import collections
+import ipaddress
+import logging
+import sys
+import time
+
+from sqlalchemy import func, literal, select, union_all
+from sqlalchemy.dialects import postgresql
+
+from pint_models.registry import TABLE_NAMES, models
+from pint_models.versions import VersionTracker
+
+logger = logging.getLogger(__name__)
+
+ServerMatch = collections.namedtuple(
+    'ServerMatch',
+    ['provider', 'region', 'type', 'name']
+)
+
+# Array type code able to hold an IPv4 address as an integer
+_IPV4_TYPECODE = 'I' if array.array('I').itemsize >= 4 else 'L'
+
+
+class _RangeIndex(object):
+    """Sorted address ranges searched by bisection
+
+    Bisecting the range starts finds the range holding an address as
+    long as the ranges don't overlap, which is checked when building
+    the index. If some do, e.g. a server network holding the address
+    of another server, lookups fall back to scanning the ranges that
+    start at or before the address for the narrowest one holding it.
+    """
+
+    __slots__ = ('starts', 'ends', 'matches', 'overlapping')
+
+    def __init__(self, ranges, typecode=None):
+        ranges.sort(key=lambda r: (r[0], r[1]))
+        if typecode:
+            self.starts = array.array(typecode, (r[0] for r in ranges))
+            self.ends = array.array(typecode, (r[1] for r in ranges))
+        else:
+            # IPv6 addresses don't fit any array type code
+            self.starts = [r[0] for r in ranges]
+            self.ends = [r[1] for r in ranges]
+        self.matches = tuple(r[2] for r in ranges)
+        # With the ranges sorted by start, any overlap shows up as a
+        # range starting before the end of the previous one.
+        self.overlapping = any(
+            self.starts[index] <= self.ends[index - 1]
+            for index in range(1, len(ranges))
+        )
+
+    def __len__(self):
+        return len(self.matches)
+
+    def find(self, value):
+        """Return the position of the narrowest range holding value
+
+        Returns -1 if no range holds it.
+        """
+        index = bisect.bisect_right(self.starts, value) - 1
+        if not self.overlapping:
+            if index >= 0 and value <= self.ends[index]:
+                return index
+            return -1
+
+        found = -1
+        size = None
+        for index in range(index, -1, -1):
+            if value <= self.ends[index] and (
+                    size is None or
+                    self.ends[index] - self.starts[index] < size):
+                found = index
+                size = self.ends[index] - self.starts[index]
+        return found
+
+    def size(self, index):
+        return self.ends[index] - self.starts[index]
+
+    def lookup(self, value):
+        index = self.find(value)
+        return self.matches[index] if index >= 0 else None
+
+
+class ServerIPIndex(object):
+    """In-memory index of server IPs answering which server owns an IP
+
+    The index holds one sorted array of IPv4 and one of IPv6 address
+    ranges per servers table. refresh() rebuilds only the tables
+    whose VersionsModel entry moved since they were last loaded,
+    checking the versions table at most every check_interval seconds.
+    Tables without a versions entry are rebuilt every check_interval
+    seconds.
+
+    Args:
+        check_interval (float): Minimum number of seconds between
+            queries of the versions table
+    """
+
+    def __init__(self, check_interval=30):
+        self.tracker = VersionTracker(check_interval=check_interval)
+        self._tables = {}
+        self._loaded_at = {}
+
+    def refresh(self, session, force=False):
+        """Reload the servers tables whose version changed
+
+        Args:
+            session (Session): DB session to query with
+            force (bool): Reload all tables regardless of versions
+
+        Returns:
+            [list]: The names of the reloaded tables
+        """
+        versions = self.tracker.versions(session)
+        reloaded = []
+
+        for model in models('servers'):
+            tablename = model.__tablename__
+            version = versions.get(tablename)
+            loaded = self._tables.get(tablename)
+            if not force and not self.tracker.is_stale(
+                    loaded[0] if loaded else None,
+                    self._loaded_at.get(tablename),
+                    version):
+                continue
+
+            query = select(model.type, model.region, model.name,
+                           model.ip, model.ipv6)
+            self.load_rows(tablename, session.execute(query).mappings(),
+                           version=version)
+            reloaded.append(tablename)
+
+        return reloaded
+
+    def load_rows(self, tablename, rows, version=None):
+        """Replace the index content of a servers table
+
+        Args:
+            tablename (string): The servers table the rows are from
+            rows (iterable): Mappings with type, region, name, ip and
+                ipv6 keys
+            version (optional): The table version the rows belong to
+        """
+        provider = TABLE_NAMES[tablename][0]
+        ipv4 = []
+        ipv6 = []
+
+        for row in rows:
+            server_type = row['type']
+            match = ServerMatch(
+                provider,
+                sys.intern(row['region']),
+                getattr(server_type, 'value', server_type),
+                row['name']
+            )
+            for value in (row['ip'], row['ipv6']):
+                if value is None:
+                    continue
+                network = ipaddress.ip_interface(str(value)).network
+                ranges = ipv4 if network.version == 4 else ipv6
+                ranges.append((int(network.network_address),
+                               int(network.broadcast_address),
+                               match))
+
+        ipv4_index = _RangeIndex(ipv4, _IPV4_TYPECODE)
+        ipv6_index = _RangeIndex(ipv6)
+        if ipv4_index.overlapping or ipv6_index.overlapping:
+            logger.warning('%s: server addresses overlap, lookups of the '
+                           'table fall back to a scan', tablename)
+
+        # Swapped in as a whole so that concurrent lookups see either
+        # the previous or the new content of the table.
+        self._tables[tablename] = (version, ipv4_index, ipv6_index)
+        self._loaded_at[tablename] = time.monotonic()
+        logger.debug('%s: indexed %d IPv4 and %d IPv6 addresses',
+                     tablename, len(ipv4), len(ipv6))
+
+    def lookup(self, ip):
+        """Return the server owning an IP address
+
+        Args:
+            ip (string): The IPv4 or IPv6 address
+
+        Returns:
+            [ServerMatch]: The matching server with the narrowest
+            network holding the address, or None
+        """
+        address = ipaddress.ip_address(ip)
+        value = int(address)
+        family = 1 if address.version == 4 else 2
+
+        # As in lookup_server_sql(), the narrowest network holding the
+        # address wins when the networks of several tables do.
+        match = None
+        size = None
+        for entry in list(self._tables.values()):
+            ranges = entry[family]
+            index = ranges.find(value)
+            if index >= 0 and (size is None or ranges.size(index) < size):
+                match = ranges.matches[index]
+                size = ranges.size(index)
+        return match
+
+    def __len__(self):
+        return sum(len(entry[1]) + len(entry[2])
+                   for entry in list(self._tables.values()))
+
+
+def lookup_server_sql(session, ip):
+    """Return the server owning an IP address by querying the DB
+
+    All the servers tables are searched in a single query, using
+    their GiST inet_ops indexes. As with ServerIPIndex, the server
+    with the narrowest network holding the address wins.
+
+    Args:
+        session (Session): DB session to query with
+        ip (string): The IPv4 or IPv6 address
+
+    Returns:
+        [ServerMatch]: The matching server, or None
+    """
+    address = ipaddress.ip_address(ip)
+    value = literal(str(address), postgresql.INET)
+
+    queries = []
+    for model in models('servers'):
+        column = model.ip if address.version == 4 else model.ipv6
+        queries.append(
+            select(
+                literal(TABLE_NAMES[model.__tablename__][0]).label(
+                    'provider'
+                ),
+                model.region,
+                model.type,
+                model.name,
+                func.masklen(column).label('masklen')
+            ).where(column.op('>>=')(value))
+        )
+    query = union_all(*queries)
+    row = session.execute(
+        query.order_by(query.selected_columns.masklen.desc()).limit(1)
+    ).first()
+
+    if row is None:
+        return None
+    return ServerMatch(
+        row.provider,
+        row.region,
+        getattr(row.type, 'value', row.type),
+        row.name
+    )
@@ -0,0 +1,426 @@
+# Copyright (c) 2026 SUSE LLC
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import csv
+import datetime
+import ipaddress
+import itertools
+import json
+import logging
+import re
+
+from sqlalchemy import Date, Enum, Integer, inspect, text
+from sqlalchemy.dialects import postgresql
+
+logger = logging.getLogger(__name__)
+
+COPY_NULL = '\\N'
+
+_COPY_ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    '\t': '\\t',
+    '\n': '\\n',
+    '\r': '\\r',
+})
+
+_INDEXDEF_PREFIX = re.compile(r'^CREATE (UNIQUE )?INDEX \S+ ON \S+ ')
+
+_HAS_TRIGGER_QUERY = text(
+    'SELECT 1 FROM pg_trigger '
+    'WHERE tgrelid = CAST(:table AS regclass) AND tgname = :trigger'
+)
+
+
+def read_csv_rows(path):
+    """Yield rows from a CSV file with a header line
+
+    Empty fields are treated as NULL.
+
+    Args:
+        path (filepath): The CSV file to read
+
+    Returns:
+        [generator]: A dict per row
+    """
+    with open(path, newline='') as csv_file:
+        for row in csv.DictReader(csv_file):
+            yield {k: (v if v != '' else None) for k, v in row.items()}
+
+
+def read_jsonl_rows(path):
+    """Yield rows from a JSON-lines file
+
+    Args:
+        path (filepath): The JSON-lines file to read, one object per line
+
+    Returns:
+        [generator]: A dict per row
+    """
+    with open(path) as jsonl_file:
+        for line in jsonl_file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def format_copy_value(column, value):
+    """Format a value as a COPY text format field for the given column
+
+    Enum columns accept either the enum member or its name, INET
+    columns accept strings or ipaddress objects, and Date columns
+    accept date objects or any string Postgres can parse.
+
+    Args:
+        column (Column): The table column the value is destined for
+        value: The value to format
+
+    Returns:
+        [string]: The escaped field
+    """
+    if value is None:
+        return COPY_NULL
+
+    column_type = column.type
+    if isinstance(column_type, Enum) and column_type.enum_class:
+        value = _enum_name(column, column_type.enum_class, value)
+    elif isinstance(column_type, postgresql.INET):
+        value = _format_inet(column, value)
+    elif isinstance(column_type, Date) and isinstance(value, datetime.date):
+        value = value.isoformat()
+
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def format_copy_line(columns, row):
+    """Format a row dict as a single COPY text format line"""
+    return '\t'.join(
+        format_copy_value(column, row.get(column.name))
+        for column in columns
+    ) + '\n'
+
+
+def copy_rows(session, model, rows, columns=None, table_name=None):
+    """Stream rows into a table using COPY FROM STDIN
+
+    Both psycopg2 and psycopg (3) connections are supported. No
+    ORM objects are built, so the model's @validates hooks are not
+    run. The caller is responsible for committing the session.
+
+    Args:
+        session (Session): DB session whose connection is used
+        model (PintBase): The model class the rows belong to
+        rows (iterable): Dicts mapping column names to values
+        columns (list, optional): Column names to load, defaults to
+            the keys of the first row
+        table_name (string, optional): Load into this table instead
+            of the model's table, e.g. a staging table
+
+    Returns:
+        [int]: The number of rows loaded
+    """
+    table = model.__table__
+    rows = iter(rows)
+
+    if columns is None:
+        first = next(rows, None)
+        if first is None:
+            return 0
+        columns = list(first.keys())
+        rows = itertools.chain([first], rows)
+
+    if not columns:
+        return 0
+
+    unknown = set(columns) - set(table.columns.keys())
+    if unknown:
+        raise ValueError(
+            '%s has no column(s) %s' % (
+                table.name,
+                ', '.join(sorted(unknown))
+            )
+        )
+
+    copy_columns = [table.c[name] for name in columns]
+    connection = session.connection()
+    quote = connection.dialect.identifier_preparer.quote
+
+    copy_sql = 'COPY %s (%s) FROM STDIN' % (
+        quote(table_name or table.name),
+        ', '.join(quote(name) for name in columns)
+    )
+
+    chunks = (
+        format_copy_line(copy_columns, row).encode('utf-8')
+        for row in rows
+    )
+
+    cursor = connection.connection.cursor()
+    try:
+        if hasattr(cursor, 'copy_expert'):
+            # psycopg2
+            cursor.copy_expert(copy_sql, _CopyStream(chunks))
+        else:
+            # psycopg (3), which SQLAlchemy 2.1 uses for postgresql://
+            with cursor.copy(copy_sql) as copy:
+                for chunk in chunks:
+                    copy.write(chunk)
+        loaded = cursor.rowcount
+    finally:
+        cursor.close()
+
+    if table_name is None:
+        _sync_serial_sequences(
+            session,
+            _serial_sequences(session, model, table.name),
+            columns,
+            table.name
+        )
+
+    logger.info('%s: loaded %d rows via COPY',
+                table_name or table.name, loaded)
+    return loaded
+
+
+def reload_table(session, model, rows, columns=None):
+    """Replace the entire content of a table without a long write lock
+
+    Rows are loaded into a staging copy of the table (including
+    its defaults, constraints and indexes), which is then swapped
+    in place of the live table. Readers and writers are only
+    blocked for the duration of the swap itself, and the session
+    is committed once the swap completes so that the exclusive
+    lock is released straight away. Grants on the live table are
+    not carried over to the new one. Partitioned tables (see
+    create_partitioned_image_tables()) can't be reloaded this way.
+
+    If the table's changes are tracked (see changes_since()), all
+    loaded rows are numbered as changed, and rows missing from the
+    new content leave tombstones.
+
+    Args:
+        session (Session): DB session whose connection is used
+        model (PintBase): The model class whose table is reloaded
+        rows (iterable): Dicts mapping column names to values
+        columns (list, optional): Column names to load, defaults to
+            the keys of the first row
+
+    Returns:
+        [int]: The number of rows loaded
+    """
+    from pint_models.partitioning import is_partitioned
+
+    table_name = model.__tablename__
+    staging_name = table_name + '_staging'
+    old_name = table_name + '_old'
+    quote = session.connection().dialect.identifier_preparer.quote
+
+    if is_partitioned(session.connection(), table_name):
+        raise ValueError(
+            '%s is partitioned and cannot be reloaded' % table_name
+        )
+
+    session.execute(text('DROP TABLE IF EXISTS %s' % quote(staging_name)))
+    session.execute(text('CREATE TABLE %s (LIKE %s INCLUDING ALL)' % (
+        quote(staging_name), quote(table_name)
+    )))
+
+    # Triggers aren't copied by LIKE, so add the change tracking ones
+    # to the staging table under the names they have on the live one.
+    key_columns = [column.name for column in inspect(model).primary_key]
+    tracked = session.execute(_HAS_TRIGGER_QUERY, {
+        'table': table_name,
+        'trigger': table_name + '_tombstone'
+    }).scalar() is not None
+    if tracked:
+        from pint_models.models import change_trigger_statements
+        for statement in change_trigger_statements(
+                table_name, key_columns, quote, target=staging_name):
+            session.execute(text(statement))
+
+    rows = iter(rows)
+    if columns is None:
+        first = next(rows, None)
+        columns = list(first.keys()) if first else []
+        rows = itertools.chain([first] if first else [], rows)
+
+    loaded = copy_rows(session, model, rows, columns=columns,
+                       table_name=staging_name)
+    session.execute(text('ANALYZE %s' % quote(staging_name)))
+
+    if tracked:
+        # Leave tombstones for the rows that are going away
+        session.execute(text(
+            'DELETE FROM %(live)s WHERE NOT EXISTS ('
+            'SELECT 1 FROM %(staging)s WHERE %(match)s)' % {
+                'live': quote(table_name),
+                'staging': quote(staging_name),
+                'match': ' AND '.join(
+                    '%(staging)s.%(column)s = %(live)s.%(column)s' % {
+                        'live': quote(table_name),
+                        'staging': quote(staging_name),
+                        'column': quote(column)
+                    }
+                    for column in key_columns
+                )
+            }
+        ))
+
+    index_names = _match_index_names(session, table_name, staging_name)
+    sequences = _serial_sequences(session, model, table_name)
+
+    session.execute(text('LOCK TABLE %s IN ACCESS EXCLUSIVE MODE' % (
+        quote(table_name)
+    )))
+    session.execute(text('ALTER TABLE %s RENAME TO %s' % (
+        quote(table_name), quote(old_name)
+    )))
+    session.execute(text('ALTER TABLE %s RENAME TO %s' % (
+        quote(staging_name), quote(table_name)
+    )))
+
+    # Serial sequences are owned by the old table's columns and
+    # would otherwise be dropped along with it.
+    for column_name, sequence in sequences:
+        session.execute(text('ALTER SEQUENCE %s OWNED BY %s.%s' % (
+            sequence, quote(table_name), quote(column_name)
+        )))
+
+    session.execute(text('DROP TABLE %s' % quote(old_name)))
+    _sync_serial_sequences(session, sequences, columns, table_name)
+
+    # Renaming a constraint's index renames the constraint as well
+    for staging_index, index_name in index_names:
+        session.execute(text('ALTER INDEX %s RENAME TO %s' % (
+            quote(staging_index), quote(index_name)
+        )))
+
+    session.commit()
+
+    logger.info('%s: reloaded with %d rows', table_name, loaded)
+    return loaded
+
+
+class _CopyStream(object):
+    """File-like wrapper feeding encoded COPY lines to copy_expert()"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = bytearray()
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+
+        if size < 0:
+            size = len(self._buffer)
+
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+def _enum_name(column, enum_class, value):
+    """Return the stored (name) form of an enum column value"""
+    if isinstance(value, enum_class):
+        return value.name
+
+    try:
+        return enum_class[value].name
+    except KeyError:
+        raise ValueError(
+            '%s.%s invalid value %s' % (
+                column.table.name,
+                column.name,
+                repr(value)
+            )
+        )
+
+
+def _format_inet(column, value):
+    """Return the canonical text form of an INET column value"""
+    try:
+        interface = ipaddress.ip_interface(value)
+    except ValueError:
+        raise ValueError(
+            '%s.%s invalid address %s' % (
+                column.table.name,
+                column.name,
+                repr(value)
+            )
+        )
+
+    if interface.network.prefixlen == interface.max_prefixlen:
+        return str(interface.ip)
+    return str(interface)
+
+
+def _serial_sequences(session, model, table_name):
+    """Return (column name, sequence name) for serial columns"""
+    sequences = []
+    for column in model.__table__.primary_key.columns:
+        if not isinstance(column.type, Integer):
+            continue
+
+        sequence = session.execute(
+            text('SELECT pg_get_serial_sequence(:table, :column)'),
+            {'table': table_name, 'column': column.name}
+        ).scalar()
+        if sequence:
+            sequences.append((column.name, sequence))
+
+    return sequences
+
+
+def _sync_serial_sequences(session, sequences, columns, table_name):
+    """Move serial sequences past explicitly loaded key values"""
+    quote = session.connection().dialect.identifier_preparer.quote
+
+    for column_name, sequence in sequences:
+        if column_name not in columns:
+            continue
+
+        session.execute(text(
+            'SELECT setval(:sequence, COALESCE(MAX(%(column)s), 1), '
+            'MAX(%(column)s) IS NOT NULL) FROM %(table)s' % {
+                'column': quote(column_name),
+                'table': quote(table_name)
+            }
+        ), {'sequence': sequence})
+
+
+def _match_index_names(session, table_name, staging_name):
+    """Pair staging table indexes with the live table's index names"""
+    query = text(
+        'SELECT indexname, indexdef FROM pg_indexes '
+        'WHERE schemaname = current_schema() AND tablename = :table'
+    )
+
+    live = {}
+    for name, indexdef in session.execute(query, {'table': table_name}):
+        live[_INDEXDEF_PREFIX.sub(r'CREATE \1INDEX ', indexdef)] = name
+
+    pairs = []
+    for name, indexdef in session.execute(query, {'table': staging_name}):
+        normalized = _INDEXDEF_PREFIX.sub(r'CREATE \1INDEX ', indexdef)
+        if normalized in live:
+            pairs.append((name, live[normalized]))
+
+    return pairs
@@ -17,28 +17,107 @@
 # specific language governing permissions and limitations
 # under the License.
 
+import datetime
 import enum
 import logging
 
 from sqlalchemy import (
+    BigInteger,
+    CheckConstraint,
     Column,
     Date,
+    DateTime,
     Enum,
+    FetchedValue,
     Integer,
     Numeric,
+    Sequence,
     String,
     UniqueConstraint,
-    Index
+    Index,
+    event,
+    func,
+    text
 )
-from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.dialects import postgresql
-from sqlalchemy.orm import validates
+from sqlalchemy.orm import declarative_base, declared_attr, validates
 
 
 logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
+# Trigram indexes are only created where this extension is installed
+TRIGRAM_EXTENSION = 'pg_trgm'
+
+# Column numbering image and server row changes, see changes_since().
+# On Postgres it is set from CHANGE_SEQUENCE by a trigger on every
+# insert and update, and deletes leave a ChangeTombstoneModel row.
+# Tables created before the column was added need upgrading, see
+# upgrade_change_tracking().
+CHANGE_COLUMN = 'changeseq'
+CHANGE_SEQUENCE = Sequence('pint_change_seq', metadata=Base.metadata)
+
+# Taken before creating CHANGE_FUNCTIONS or upgrading tables, so that
+# workers running init_db(create_all=True) at the same time do so one
+# after the other, rather than failing on the catalog with "tuple
+# concurrently updated". It is released when the transaction ends.
+SCHEMA_LOCK = (
+    "SELECT pg_advisory_xact_lock(hashtextextended('pint_schema', 0))"
+)
+
+CHANGE_FUNCTIONS = (
+    """CREATE OR REPLACE FUNCTION pint_next_changeseq() RETURNS bigint AS $$
+BEGIN
+    -- The first change of a transaction holds a shared advisory lock
+    -- on a number drawn before those of its changes until it ends, so
+    -- that changes_since() can tell which numbers may still be used
+    IF coalesce(current_setting('pint.change_marker', true), '') = ''
+    THEN
+        PERFORM pg_advisory_xact_lock_shared(nextval('pint_change_seq'));
+        PERFORM set_config('pint.change_marker', 'on', true);
+    END IF;
+    RETURN nextval('pint_change_seq');
+END
+$$ LANGUAGE plpgsql""",
+    """CREATE OR REPLACE FUNCTION pint_set_changeseq() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND NEW IS NOT DISTINCT FROM OLD THEN
+        RETURN NEW;
+    END IF;
+    NEW.changeseq := pint_next_changeseq();
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql""",
+    """CREATE OR REPLACE FUNCTION pint_record_tombstone() RETURNS trigger AS $$
+DECLARE
+    rowkey jsonb := '{}';
+    matches text := 'true';
+    present boolean;
+BEGIN
+    -- The first argument is the table name, the others the key columns
+    FOR i IN 1 .. TG_NARGS - 1 LOOP
+        rowkey := rowkey || jsonb_build_object(
+            TG_ARGV[i], to_jsonb(OLD) -> TG_ARGV[i]
+        );
+        matches := matches || ' AND ' || quote_ident(TG_ARGV[i]) ||
+            ' = ($1).' || quote_ident(TG_ARGV[i]);
+    END LOOP;
+    -- Moving a row to another partition deletes it from the old one,
+    -- but as this runs at the end of the statement the row is back
+    -- in the table by then, and it was changed rather than deleted.
+    EXECUTE 'SELECT EXISTS (SELECT 1 FROM ' || quote_ident(TG_ARGV[0]) ||
+        ' WHERE ' || matches || ')' INTO present USING OLD;
+    IF present THEN
+        RETURN OLD;
+    END IF;
+    INSERT INTO changetombstones (changeseq, tablename, rowkey)
+    VALUES (pint_next_changeseq(), TG_ARGV[0], rowkey);
+    RETURN OLD;
+END
+$$ LANGUAGE plpgsql""",
+)
+
 
 class ImageState(enum.Enum):
     __enum_name__ = 'image_state'
@@ -73,14 +152,313 @@ class PintBase(object):
         return [u for u in cls.__table__.constraints
                 if isinstance(u, UniqueConstraint)]
 
+    @classmethod
+    def column_plan(cls):
+        """
+        Return (column name, converter) pairs used to serialize rows.
+
+        The converter turns a column value into its plain (JSON
+        compatible) form, and is None if the value can be used as is.
+        The plan is computed once per model.
+        """
+        plan = cls.__dict__.get('_column_plan')
+        if plan is None:
+            plan = tuple((column.name, _column_converter(column))
+                         for column in cls.__table__.columns)
+            cls._column_plan = plan
+        return plan
+
+    @classmethod
+    def row_serializer(cls, keys=None):
+        """
+        Return a function converting a result row tuple into a dict.
+
+        The keys are the names of the row's columns, in order, and
+        default to all of the table's columns.
+        """
+        plan = dict(cls.column_plan())
+        if keys is None:
+            keys = [name for name, _ in cls.column_plan()]
+        fields = tuple((index, name, plan.get(name))
+                       for index, name in enumerate(keys))
+
+        def serialize(row):
+            return {
+                name: convert(row[index])
+                if convert is not None and row[index] is not None
+                else row[index]
+                for index, name, convert in fields
+            }
+
+        return serialize
+
+    @classmethod
+    def serialize_rows(cls, rows, keys=None):
+        """
+        Serialize Core result rows of the model's table into dicts.
+
+        If rows is a result, the keys are taken from it, otherwise
+        see row_serializer().
+        """
+        if keys is None and hasattr(rows, 'keys'):
+            keys = list(rows.keys())
+        serialize = cls.row_serializer(keys)
+        return [serialize(row) for row in rows]
+
+    def to_dict(self):
+        """Return the row's column values as a dict of plain values."""
+        values = {}
+        for name, convert in self.column_plan():
+            value = getattr(self, name)
+            if convert is not None and value is not None:
+                value = convert(value)
+            values[name] = value
+        return values
+
     def __repr__(self):
         return "<%s(%s)>" % (self.__class__.__name__,
                              ", ".join(["%s=%s" % (k, repr(getattr(self, k)))
-                                        for k in self.__table__.
-                                        columns.keys()]))
+                                        for k, _ in self.column_plan()]))
+
+
+def image_dates_error(name, publishedon, deprecatedon, deletedon):
+    """
+    Return why an image's dates are inconsistent, or None if they are fine.
+    """
+    if publishedon:
+        if deprecatedon and deprecatedon < publishedon:
+            return (
+                'Image %s invalid dates specified - '
+                'publishedon(%s) should not be after '
+                'deprecatedon(%s)' % (
+                    name,
+                    str(publishedon),
+                    str(deprecatedon)
+                )
+            )
+
+        if deletedon and deletedon < publishedon:
+            return (
+                'Image %s invalid dates specified - '
+                'publishedon(%s) should not be after '
+                'deletedon(%s)' % (
+                    name,
+                    str(publishedon),
+                    str(deletedon)
+                )
+            )
+
+    if deprecatedon and deletedon and deletedon < deprecatedon:
+        return (
+            'Image %s invalid dates specified - '
+            'deprecatedon(%s) should not be after '
+            'deletedon(%s)' % (
+                name,
+                str(deprecatedon),
+                str(deletedon)
+            )
+        )
+
+    return None
+
+
+def image_table_args(tablename, location_column=None, replacementid=False,
+                     trigram_columns=()):
+    """
+    Return the table constraints and indexes shared by all image tables.
+
+    The CHECK constraints mirror the ProviderImageBase validators so
+    that rows written without going through the ORM, e.g. by
+    bulk_upsert(), are held to the same rules. The indexes serve the
+    common listing queries: by state and publishedon range, by
+    location (region, project or environment) and state, active images
+    only, and by replacementid where the table has one. The trigram
+    indexes serve substring searches (see search_images()) and are
+    skipped if the pg_trgm extension isn't available.
+    """
+    args = [
+        CheckConstraint(
+            'deprecatedon IS NULL OR deprecatedon >= publishedon',
+            name='ck_%s_deprecatedon' % tablename
+        ),
+        CheckConstraint(
+            'deletedon IS NULL OR deletedon >= publishedon',
+            name='ck_%s_deletedon' % tablename
+        ),
+        CheckConstraint(
+            'deletedon IS NULL OR deprecatedon IS NULL OR '
+            'deletedon >= deprecatedon',
+            name='ck_%s_deletedon_deprecatedon' % tablename
+        ),
+        CheckConstraint(
+            "changeinfo IS NULL OR changeinfo = '' OR changeinfo LIKE '%/'",
+            name='ck_%s_changeinfo' % tablename
+        ),
+        Index(
+            'ix_%s_state_publishedon' % tablename,
+            'state',
+            'publishedon'
+        ),
+    ]
+
+    if location_column:
+        args.append(Index(
+            'ix_%s_%s_state' % (tablename, location_column),
+            location_column,
+            'state'
+        ))
+
+    args.append(Index(
+        'ix_%s_active' % tablename,
+        *[c for c in (location_column, 'publishedon') if c],
+        postgresql_where=text("state = 'active'")
+    ))
+
+    if replacementid:
+        args.append(Index(
+            'ix_%s_replacementid' % tablename,
+            'replacementid',
+            postgresql_where=text('replacementid IS NOT NULL')
+        ))
+
+    for column in trigram_columns:
+        args.append(Index(
+            'ix_%s_%s_trgm' % (tablename, column),
+            column,
+            postgresql_using='gin',
+            postgresql_ops={column: 'gin_trgm_ops'},
+            info={'trigram': True}
+        ).ddl_if(dialect='postgresql', callable_=_trigram_index_ddl_if))
+
+    return tuple(args)
+
+
+def has_trigram_extension(connection):
+    """Return whether the pg_trgm extension is installed in the DB."""
+    if connection.dialect.name != 'postgresql':
+        return False
+    return connection.execute(
+        text('SELECT 1 FROM pg_extension WHERE extname = :name'),
+        {'name': TRIGRAM_EXTENSION}
+    ).scalar() is not None
+
+
+def _trigram_index_ddl_if(ddl, target, bind, **kw):
+    return bind is not None and has_trigram_extension(bind)
+
+
+@event.listens_for(Base.metadata, 'before_create')
+def _create_trigram_extension(target, connection, **kw):
+    """Install pg_trgm, if permitted, before creating the tables."""
+    if connection.dialect.name != 'postgresql' or \
+            has_trigram_extension(connection):
+        return
+
+    try:
+        with connection.begin_nested():
+            connection.exec_driver_sql(
+                'CREATE EXTENSION IF NOT EXISTS %s' % TRIGRAM_EXTENSION
+            )
+    except Exception as error:
+        logger.warning(
+            'Unable to create the %s extension, image name searches '
+            'will not be indexed: %s', TRIGRAM_EXTENSION, error
+        )
+
+
+def change_trigger_statements(table_name, key_columns, quote, target=None):
+    """
+    Return the statements creating a table's change tracking triggers.
+
+    The triggers are named after table_name, but are created on
+    target if given, e.g. on a staging table to be renamed to
+    table_name. Tombstones record the values of the key_columns.
+    """
+    target = quote(target or table_name)
+    arguments = ', '.join(
+        "'%s'" % name for name in [table_name] + list(key_columns)
+    )
+    return [
+        'DROP TRIGGER IF EXISTS %s ON %s' % (
+            quote(table_name + '_changeseq'), target
+        ),
+        'CREATE TRIGGER %s BEFORE INSERT OR UPDATE ON %s '
+        'FOR EACH ROW EXECUTE FUNCTION pint_set_changeseq()' % (
+            quote(table_name + '_changeseq'), target
+        ),
+        'DROP TRIGGER IF EXISTS %s ON %s' % (
+            quote(table_name + '_tombstone'), target
+        ),
+        'CREATE TRIGGER %s AFTER DELETE ON %s '
+        'FOR EACH ROW EXECUTE FUNCTION pint_record_tombstone(%s)' % (
+            quote(table_name + '_tombstone'), target, arguments
+        ),
+    ]
+
+
+@event.listens_for(Base.metadata, 'before_create')
+def _create_change_functions(target, connection, **kw):
+    if connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql(SCHEMA_LOCK)
+        for statement in CHANGE_FUNCTIONS:
+            connection.exec_driver_sql(statement)
+
+
+def _create_change_triggers(target, connection, **kw):
+    """Track the changes of a created table with a changeseq column."""
+    if connection.dialect.name != 'postgresql':
+        return
+
+    # Partitioned copies of a table (see partitioned_table()) note the
+    # key of the original, which doesn't include the partition column.
+    key_columns = target.info.get('change_key') or [
+        column.name for column in target.primary_key.columns
+    ]
+    for statement in change_trigger_statements(
+            target.name,
+            key_columns,
+            connection.dialect.identifier_preparer.quote):
+        connection.exec_driver_sql(statement)
+
+
+def _enum_value(value):
+    return value.value if isinstance(value, enum.Enum) else value
+
+
+def _date_value(value):
+    return value.isoformat() if isinstance(value, datetime.date) else value
+
+
+def _column_converter(column):
+    """Return the converter serializing values of a column."""
+    if isinstance(column.type, Enum):
+        return _enum_value
+    if isinstance(column.type, Date):
+        return _date_value
+    if isinstance(column.type, postgresql.INET):
+        return str
+    if isinstance(column.type, Numeric):
+        return str
+    return None
 
 
 class ProviderImageBase(PintBase):
+    # Name of the column holding the region, project or environment
+    # images are listed by, if any.
+    location_column = None
+
+    # Columns searched by substring, which get trigram indexes.
+    __trigram_columns__ = ('name', 'replacementname')
+
+    @declared_attr
+    def __table_args__(cls):
+        return image_table_args(
+            cls.__tablename__,
+            location_column=cls.location_column,
+            replacementid=hasattr(cls, 'replacementid'),
+            trigram_columns=cls.__trigram_columns__
+        )
+
     state = Column(Enum(ImageState, name=ImageState.__enum_name__),
                    nullable=False)
     replacementname = Column(String(255))
@@ -88,6 +466,9 @@ class ProviderImageBase(PintBase):
     deprecatedon = Column(Date)
     deletedon = Column(Date)
     changeinfo = Column(String(255))
+    changeseq = Column(BigInteger, index=True,
+                       server_default=FetchedValue(),
+                       server_onupdate=FetchedValue())
 
     @validates('publishedon', 'deprecatedon', 'deletedon')
     def validate_image_dates(self, key, value):
@@ -103,39 +484,10 @@ class ProviderImageBase(PintBase):
         # the last field we are called for, the validator will still
         # fail if either deprecatedon or deletedon is not valid with
         # respect to that publishedon value.
-        if publishedon:
-            if deprecatedon and deprecatedon < publishedon:
-                raise ValueError(
-                    'Image %s invalid dates specified - '
-                    'publishedon(%s) should not be after '
-                    'deprecatedon(%s)' % (
-                        self.name,
-                        str(publishedon),
-                        str(deprecatedon)
-                    )
-                )
-
-            if deletedon and deletedon < publishedon:
-                raise ValueError(
-                    'Image %s invalid dates specified - '
-                    'publishedon(%s) should not be after '
-                    'deletedon(%s)' % (
-                        self.name,
-                        str(publishedon),
-                        str(deletedon)
-                    )
-                )
-
-        if deprecatedon and deletedon and deletedon < deprecatedon:
-            raise ValueError(
-                'Image %s invalid dates specified - '
-                'deprecatedon(%s) should not be after '
-                'deletedon(%s)' % (
-                    self.name,
-                    str(deprecatedon),
-                    str(deletedon)
-                )
-            )
+        error = image_dates_error(self.name, publishedon, deprecatedon,
+                                  deletedon)
+        if error:
+            raise ValueError(error)
 
         return value
 
@@ -154,11 +506,16 @@ class ProviderImageBase(PintBase):
 
 
 class ProviderServerBase(PintBase):
+    location_column = 'region'
+
     id = Column(Integer, primary_key=True, autoincrement=True)
     type = Column(Enum(ServerType, name=ServerType.__enum_name__),
                   nullable=False)
     shape = Column(String(10))
     name = Column(String(100))
+    changeseq = Column(BigInteger, index=True,
+                       server_default=FetchedValue(),
+                       server_onupdate=FetchedValue())
 
     @validates("name")
     def validate_name(self, key, value):
@@ -175,6 +532,7 @@ class ProviderServerBase(PintBase):
 
 class AmazonImagesModel(Base, ProviderImageBase):
     __tablename__ = 'amazonimages'
+    location_column = 'region'
 
     name = Column(String(255), nullable=False)
     id = Column(String(100), primary_key=True)
@@ -184,6 +542,7 @@ class AmazonImagesModel(Base, ProviderImageBase):
 
 class AlibabaImagesModel(Base, ProviderImageBase):
     __tablename__ = 'alibabaimages'
+    location_column = 'region'
 
     name = Column(String(255), nullable=False)
     id = Column(String(100), primary_key=True)
@@ -193,6 +552,7 @@ class AlibabaImagesModel(Base, ProviderImageBase):
 
 class GoogleImagesModel(Base, ProviderImageBase):
     __tablename__ = 'googleimages'
+    location_column = 'project'
 
     name = Column(String(255), primary_key=True)
     project = Column(String(50), nullable=False)
@@ -200,7 +560,15 @@ class GoogleImagesModel(Base, ProviderImageBase):
 
 class MicrosoftImagesModel(Base, ProviderImageBase):
     __tablename__ = 'microsoftimages'
-    __table_args__ = (UniqueConstraint('name', 'environment'),)
+    location_column = 'environment'
+    __table_args__ = (
+        UniqueConstraint('name', 'environment'),
+        *image_table_args(
+            'microsoftimages',
+            location_column='environment',
+            trigram_columns=ProviderImageBase.__trigram_columns__
+        )
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(255), nullable=False)
@@ -241,6 +609,18 @@ class AmazonServersModel(Base, ProviderServerBase):
             unique=True,
             postgresql_where=ipv6.isnot(None)
         ),
+        Index(
+            'ix_amazonservers_ip_gist',
+            'ip',
+            postgresql_using='gist',
+            postgresql_ops={'ip': 'inet_ops'}
+        ),
+        Index(
+            'ix_amazonservers_ipv6_gist',
+            'ipv6',
+            postgresql_using='gist',
+            postgresql_ops={'ipv6': 'inet_ops'}
+        ),
     )
 
 
@@ -269,6 +649,18 @@ class GoogleServersModel(Base, ProviderServerBase):
             unique=True,
             postgresql_where=ipv6.isnot(None)
         ),
+        Index(
+            'ix_googleservers_ip_gist',
+            'ip',
+            postgresql_using='gist',
+            postgresql_ops={'ip': 'inet_ops'}
+        ),
+        Index(
+            'ix_googleservers_ipv6_gist',
+            'ipv6',
+            postgresql_using='gist',
+            postgresql_ops={'ipv6': 'inet_ops'}
+        ),
     )
 
 
@@ -297,6 +689,18 @@ class MicrosoftServersModel(Base, ProviderServerBase):
             unique=True,
             postgresql_where=ipv6.isnot(None)
         ),
+        Index(
+            'ix_microsoftservers_ip_gist',
+            'ip',
+            postgresql_using='gist',
+            postgresql_ops={'ip': 'inet_ops'}
+        ),
+        Index(
+            'ix_microsoftservers_ipv6_gist',
+            'ipv6',
+            postgresql_using='gist',
+            postgresql_ops={'ipv6': 'inet_ops'}
+        ),
     )
 
 
@@ -313,3 +717,43 @@ class VersionsModel(Base, PintBase):
 
     tablename = Column(String(100), primary_key=True)
     version = Column(Numeric, nullable=False)
+
+
+class ImageArchiveModel(Base, PintBase):
+    """Deleted images moved out of the image tables by retention."""
+    __tablename__ = 'imagearchive'
+    __table_args__ = (
+        Index('ix_imagearchive_tablename_imageid', 'tablename', 'imageid'),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    tablename = Column(String(100), nullable=False)
+    imageid = Column(String(255), nullable=False)
+    name = Column(String(255), nullable=False)
+    deletedon = Column(Date)
+    archivedon = Column(Date, nullable=False,
+                        server_default=func.current_date())
+    data = Column(postgresql.JSONB, nullable=False)
+
+
+class ChangeTombstoneModel(Base, PintBase):
+    """Keys of image and server rows deleted, see changes_since()."""
+    __tablename__ = 'changetombstones'
+    __table_args__ = (
+        Index('ix_changetombstones_tablename_changeseq',
+              'tablename', 'changeseq'),
+    )
+
+    changeseq = Column(BigInteger, primary_key=True, autoincrement=False)
+    tablename = Column(String(100), nullable=False)
+    rowkey = Column(postgresql.JSONB, nullable=False)
+    deletedat = Column(DateTime(timezone=True), nullable=False,
+                       server_default=func.now())
+
+
+# Only the tables of the models with a changeseq column are tracked.
+# Copies of them (see partitioned_table()) inherit the listener.
+for _table in Base.metadata.tables.values():
+    if CHANGE_COLUMN in _table.c:
+        event.listen(_table, 'after_create', _create_change_triggers,
+                     propagate=True)
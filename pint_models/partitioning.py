@@ -0,0 +1,278 @@
+# Copyright (c) 2026 SUSE LLC
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import logging
+
+from sqlalchemy import (
+    MetaData,
+    PrimaryKeyConstraint,
+    UniqueConstraint,
+    inspect,
+    text,
+)
+
+from pint_models.models import (
+    AlibabaImagesModel,
+    AmazonImagesModel,
+    CHANGE_FUNCTIONS,
+    CHANGE_SEQUENCE,
+    GoogleImagesModel,
+    ImageState,
+    MicrosoftImagesModel,
+    OracleImagesModel,
+    SCHEMA_LOCK,
+    has_trigram_extension,
+)
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_IMAGE_MODELS = (
+    AlibabaImagesModel,
+    AmazonImagesModel,
+    GoogleImagesModel,
+    MicrosoftImagesModel,
+    OracleImagesModel,
+)
+
+PARTITION_COLUMN = 'state'
+
+# Partition name suffix to the states it holds. Deleted images are
+# kept apart from the (much smaller) working set of the others, which
+# land in the default partition.
+PARTITIONS = {
+    'deleted': (ImageState.deleted,),
+    'current': None,
+}
+
+# Enforces the uniqueness of a key (the second and later arguments)
+# across the partitions of a table (the first argument), which unique
+# indexes can't as they are per partition. Writers of the same key
+# are serialized by an advisory lock, so that the count also sees
+# rows committed by a concurrent transaction in the meantime.
+UNIQUE_KEY_FUNCTION = """CREATE OR REPLACE FUNCTION pint_check_unique_key()
+RETURNS trigger AS $$
+DECLARE
+    lockkey text := TG_ARGV[0];
+    matches text := 'true';
+    found integer;
+BEGIN
+    FOR i IN 1 .. TG_NARGS - 1 LOOP
+        lockkey := lockkey || '|' ||
+            coalesce(to_jsonb(NEW) ->> TG_ARGV[i], '');
+        matches := matches || ' AND ' || quote_ident(TG_ARGV[i]) ||
+            ' = ($1).' || quote_ident(TG_ARGV[i]);
+    END LOOP;
+    PERFORM pg_advisory_xact_lock(hashtextextended(lockkey, 0));
+    EXECUTE 'SELECT count(*) FROM ' || quote_ident(TG_ARGV[0]) ||
+        ' WHERE ' || matches INTO found USING NEW;
+    IF found > 1 THEN
+        RAISE EXCEPTION USING
+            MESSAGE = 'duplicate key value violates unique key ' || lockkey,
+            ERRCODE = 'unique_violation';
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql"""
+
+IS_PARTITIONED_QUERY = text(
+    "SELECT c.relkind = 'p' FROM pg_class c "
+    'JOIN pg_namespace n ON n.oid = c.relnamespace '
+    'WHERE n.nspname = current_schema() AND c.relname = :table'
+)
+
+PARTITIONS_QUERY = text(
+    'SELECT c.relname FROM pg_inherits i '
+    'JOIN pg_class c ON c.oid = i.inhrelid '
+    'JOIN pg_class p ON p.oid = i.inhparent '
+    'JOIN pg_namespace n ON n.oid = p.relnamespace '
+    'WHERE n.nspname = current_schema() AND p.relname = :table '
+    'ORDER BY c.relname'
+)
+
+
+def partitioned_table(model, metadata, trigram=True):
+    """Return a copy of an image table partitioned by state
+
+    Postgres requires the primary key and unique constraints of a
+    partitioned table to include the partition column, so state is
+    added to them. As these only enforce the uniqueness of e.g. an
+    image id within a partition, the original keys are listed in the
+    table's unique_keys info, for partition_statements() to add
+    triggers enforcing them across partitions.
+
+    Args:
+        model (ProviderImageBase): The image model
+        metadata (MetaData): The metadata to copy the table into
+        trigram (bool): Whether to keep the trigram indexes
+
+    Returns:
+        [Table]: The partitioned table
+    """
+    original = model.__table__
+    table = original.to_metadata(metadata)
+    table.dialect_kwargs['postgresql_partition_by'] = 'LIST (%s)' % (
+        PARTITION_COLUMN
+    )
+
+    # Deletes are tracked by the original key (see changes_since())
+    table.info['change_key'] = [c.name for c in original.primary_key]
+    table.info['unique_keys'] = [table.info['change_key']] + [
+        [c.name for c in constraint.columns]
+        for constraint in original.constraints
+        if isinstance(constraint, UniqueConstraint) and
+        not isinstance(constraint, PrimaryKeyConstraint)
+    ]
+
+    state = table.c[PARTITION_COLUMN]
+    key = [c.name for c in table.primary_key.columns] + [state.name]
+    state.primary_key = True
+    table.append_constraint(PrimaryKeyConstraint(*key))
+
+    for constraint in list(table.constraints):
+        if isinstance(constraint, UniqueConstraint) and \
+                not isinstance(constraint, PrimaryKeyConstraint) and \
+                state.name not in constraint.columns:
+            table.constraints.remove(constraint)
+            table.append_constraint(UniqueConstraint(
+                *[c.name for c in constraint.columns], state.name,
+                name=constraint.name
+            ))
+
+    if not trigram:
+        trigram_names = set(i.name for i in original.indexes
+                            if i.info.get('trigram'))
+        for index in list(table.indexes):
+            if index.name in trigram_names:
+                table.indexes.remove(index)
+
+    return table
+
+
+def partition_statements(table, dialect):
+    """Return the statements creating a table's partitions
+
+    Along with the partitions, a trigger enforcing each of the
+    table's unique_keys (see partitioned_table()) is created, which
+    requires the UNIQUE_KEY_FUNCTION.
+
+    Args:
+        table (Table): The partitioned table
+        dialect (Dialect): The DB dialect to quote identifiers for
+
+    Returns:
+        [list]: The SQL statements
+    """
+    quote = dialect.identifier_preparer.quote
+    statements = []
+    for suffix, states in PARTITIONS.items():
+        if states is None:
+            bounds = 'DEFAULT'
+        else:
+            bounds = 'FOR VALUES IN (%s)' % ', '.join(
+                "'%s'" % state.name for state in states
+            )
+        statements.append('CREATE TABLE %s PARTITION OF %s %s' % (
+            quote('%s_%s' % (table.name, suffix)),
+            quote(table.name),
+            bounds
+        ))
+
+    for number, key in enumerate(table.info.get('unique_keys', ())):
+        statements.append(
+            'CREATE TRIGGER %s AFTER INSERT OR UPDATE OF %s ON %s '
+            'FOR EACH ROW EXECUTE FUNCTION pint_check_unique_key(%s)' % (
+                quote('%s_unique_key_%d' % (table.name, number)),
+                ', '.join(quote(column) for column in key),
+                quote(table.name),
+                ', '.join("'%s'" % name for name in [table.name] + key)
+            )
+        )
+
+    return statements
+
+
+def create_partitioned_image_tables(engine, models=PARTITIONED_IMAGE_MODELS):
+    """Create the image tables as LIST partitions by state
+
+    Each table is split into a <table>_deleted partition holding the
+    deleted images and a default <table>_current partition for all
+    other states, so that queries of the current images only scan the
+    latter, and vacuuming the ever growing deleted history doesn't
+    hold them up. Updating an image's state through the ORM models
+    moves its row to the matching partition.
+
+    Tables that already exist are left as they are. Call this before
+    Base.metadata.create_all(), which then skips the image tables
+    (init_db(create_all=True, partition_images=True) does both). The
+    change tracking sequence and functions the tables' triggers use
+    are created here too, as create_all() only adds them later.
+
+    The keys of the tables are unique across partitions, but only
+    thanks to triggers, so bulk_upsert() can't be used with
+    partitioned tables, as they have no unique constraint on the
+    conflict columns alone.
+
+    Args:
+        engine (Engine): The DB engine
+        models (tuple): The image models whose tables to create
+
+    Returns:
+        [list]: The names of the created tables
+    """
+    metadata = MetaData()
+    created = []
+
+    with engine.begin() as connection:
+        connection.exec_driver_sql(SCHEMA_LOCK)
+        trigram = has_trigram_extension(connection)
+        inspector = inspect(connection)
+        connection.exec_driver_sql(UNIQUE_KEY_FUNCTION)
+        CHANGE_SEQUENCE.create(bind=connection, checkfirst=True)
+        for statement in CHANGE_FUNCTIONS:
+            connection.exec_driver_sql(statement)
+
+        for model in models:
+            if inspector.has_table(model.__tablename__):
+                logger.info('%s already exists, not partitioning it',
+                            model.__tablename__)
+                continue
+
+            table = partitioned_table(model, metadata, trigram=trigram)
+            # checkfirst skips creating the enum types of the tables
+            # when another table already did
+            table.create(bind=connection, checkfirst=True)
+            for statement in partition_statements(table, connection.dialect):
+                connection.exec_driver_sql(statement)
+            created.append(table.name)
+
+    return created
+
+
+def is_partitioned(connection, table_name):
+    """Return whether a table is a partitioned table"""
+    return bool(connection.execute(
+        IS_PARTITIONED_QUERY, {'table': table_name}
+    ).scalar())
+
+
+def partition_names(connection, table_name):
+    """Return the names of the partitions of a partitioned table"""
+    return list(connection.execute(
+        PARTITIONS_QUERY, {'table': table_name}
+    ).scalars())
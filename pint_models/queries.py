@@ -0,0 +1,169 @@
+# Copyright (c) 2026 SUSE LLC
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import functools
+
+from sqlalchemy import bindparam, select
+
+
+def filtered_select(model, filters=None):
+    """Build a SELECT of a model's table filtered on column values
+
+    Args:
+        model (PintBase): The model class to select from
+        filters (dict, optional): Column name to value, or to a list
+            of values any of which may match
+
+    Returns:
+        [Select]: The statement
+    """
+    table = model.__table__
+    return select(table).where(*filter_conditions(table, filters))
+
+
+def filter_conditions(table, filters=None):
+    """Return the conditions matching a table's columns to values
+
+    Args:
+        table (FromClause): The table, or subquery, to filter
+        filters (dict, optional): Column name to value, or to a list
+            of values any of which may match
+
+    Returns:
+        [list]: The conditions, to be combined with AND
+    """
+    conditions = []
+    for name, value in sorted((filters or {}).items()):
+        if name not in table.c:
+            raise ValueError(
+                '%s has no column %s' % (table.name, name)
+            )
+        if isinstance(value, (list, tuple, set, frozenset)):
+            conditions.append(table.c[name].in_(list(value)))
+        else:
+            conditions.append(table.c[name] == value)
+
+    return conditions
+
+
+# Number of statements kept by cached_select(), which is plenty for
+# the models and filter combinations used here, while bounding the
+# memory used by callers filtering on many column combinations.
+STATEMENT_CACHE_SIZE = 256
+
+
+def cached_select(model, columns=()):
+    """Return a SELECT of a model filtered on columns by bind parameters
+
+    The statement is built once per model and set of columns and then
+    reused, so that its SQLAlchemy cache key is only computed once and
+    its compiled form is found in the engine's compiled cache (whose
+    size is set by the query_cache_size argument of init_db()). As the
+    SQL sent is the same for every call, the psycopg (version 3)
+    driver also turns it into a server side prepared statement once
+    it has been run a few times. That requires the psycopg extra and
+    a postgresql+psycopg:// database URL; the default psycopg2 driver
+    doesn't prepare statements. The least recently used statements
+    are dropped once more than STATEMENT_CACHE_SIZE are cached.
+
+    Args:
+        model (PintBase): The model class to select from
+        columns (tuple): The names of the columns to filter on, each
+            compared to a bind parameter of the same name
+
+    Returns:
+        [Select]: The statement
+    """
+    return _build_select(model, tuple(columns))
+
+
+@functools.lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _build_select(model, columns):
+    """Build the statement returned by cached_select()"""
+    return select(model).where(*[
+        getattr(model, column) == bindparam(column)
+        for column in columns
+    ])
+
+
+def images_by_location(session, model, location=None, state=None):
+    """Return the images of a provider in a location and/or state
+
+    Args:
+        session (Session): DB session to query with
+        model (ProviderImageBase): The image model to query
+        location (string, optional): The region, project or
+            environment, per the model's location_column
+        state (ImageState, optional): The image state
+
+    Returns:
+        [list]: The model instances
+    """
+    if location is not None and model.location_column is None:
+        raise ValueError(
+            '%s images have no location' % model.__tablename__
+        )
+
+    return _lookup(session, model, {
+        model.location_column: location,
+        'state': state,
+    })
+
+
+def servers_by_region(session, model, region=None, server_type=None):
+    """Return the servers of a provider in a region and/or of a type
+
+    Args:
+        session (Session): DB session to query with
+        model (ProviderServerBase): The server model to query
+        region (string, optional): The region
+        server_type (ServerType, optional): The server type
+
+    Returns:
+        [list]: The model instances
+    """
+    return _lookup(session, model, {
+        'region': region,
+        'type': server_type,
+    })
+
+
+def region_map_by_environment(session, environment=None):
+    """Return the Microsoft region map entries of an environment
+
+    Args:
+        session (Session): DB session to query with
+        environment (string, optional): The Azure environment
+
+    Returns:
+        [list]: The MicrosoftRegionMapModel instances
+    """
+    from pint_models.models import MicrosoftRegionMapModel
+
+    return _lookup(session, MicrosoftRegionMapModel, {
+        'environment': environment,
+    })
+
+
+def _lookup(session, model, filters):
+    """Run the cached SELECT of a model matching the non-None filters"""
+    params = {k: v for k, v in filters.items() if v is not None}
+    return session.scalars(
+        cached_select(model, tuple(sorted(params))), params
+    ).all()
@@ -0,0 +1,242 @@
+# Copyright (c) 2026 SUSE LLC
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import logging
+import time
+
+from sqlalchemy import select
+
+from pint_models.versions import VersionTracker
+
+logger = logging.getLogger(__name__)
+
+REGION_MAP_TABLE = 'microsoftregionmap'
+
+
+class RegionMap(object):
+    """In-memory copy of the Microsoft region map, looked up both ways
+
+    Each MicrosoftRegionMapModel row gives a region name, as stored
+    in the Microsoft servers table, and the canonical name of that
+    region in an environment, several region names possibly sharing
+    a canonical name. Both region names and canonical names can be
+    looked up, so that results can be canonicalized, and filters
+    rewritten to the stored names, without joining the map in SQL.
+
+    refresh() reloads the map when its VersionsModel entry moved,
+    checking the versions table at most every check_interval seconds,
+    or every check_interval seconds if the map has no versions entry.
+
+    Args:
+        check_interval (float): Minimum number of seconds between
+            queries of the versions table
+    """
+
+    def __init__(self, check_interval=30):
+        self.tracker = VersionTracker(check_interval=check_interval)
+        self._maps = (None, {}, {}, {})
+        self._loaded_at = None
+
+    def refresh(self, session, force=False):
+        """Reload the map if its version changed
+
+        Args:
+            session (Session): DB session to query with
+            force (bool): Reload the map regardless of its version
+
+        Returns:
+            [bool]: Whether the map was reloaded
+        """
+        from pint_models.models import MicrosoftRegionMapModel
+
+        version = self.tracker.version(session, REGION_MAP_TABLE)
+        if not force and not self.tracker.is_stale(
+                self._maps[0], self._loaded_at, version):
+            return False
+
+        table = MicrosoftRegionMapModel.__table__
+        self.load_rows(session.execute(select(table)).mappings(),
+                       version=version)
+        return True
+
+    def load_rows(self, rows, version=None):
+        """Replace the content of the map
+
+        Args:
+            rows (iterable): Mappings with environment, region and
+                canonicalname keys
+            version (optional): The table version the rows belong to
+        """
+        names = {}
+        regions = {}
+        environments = {}
+
+        for row in rows:
+            environment = row['environment']
+            canonicalname = row['canonicalname']
+            for name in (row['region'], canonicalname):
+                names.setdefault(name, set()).add(
+                    (environment, canonicalname)
+                )
+            regions.setdefault((environment, canonicalname), set()).add(
+                row['region']
+            )
+            environments.setdefault(environment, set()).add(canonicalname)
+
+        # Swapped in as a whole so that concurrent lookups see either
+        # the previous or the new content of the map.
+        self._maps = (
+            version,
+            {k: tuple(sorted(v)) for k, v in names.items()},
+            {k: tuple(sorted(v)) for k, v in regions.items()},
+            {k: tuple(sorted(v)) for k, v in environments.items()},
+        )
+        self._loaded_at = time.monotonic()
+        logger.debug('Loaded %d Microsoft regions', len(regions))
+
+    def canonical_names(self, region, environment=None):
+        """Return the canonical names of a region
+
+        Args:
+            region (string): A region or canonical name
+            environment (string, optional): Only look in this
+                environment
+
+        Returns:
+            [tuple]: The canonical names, empty if the region is unknown
+        """
+        return tuple(sorted(set(
+            canonicalname
+            for env, canonicalname in self._maps[1].get(region, ())
+            if environment in (None, env)
+        )))
+
+    def regions(self, canonicalname, environment=None):
+        """Return the stored region names of a canonical region
+
+        Args:
+            canonicalname (string): The canonical name, or any region
+                name sharing it
+            environment (string, optional): Only look in this
+                environment
+
+        Returns:
+            [tuple]: The region names, empty if the region is unknown
+        """
+        _, names, regions, _ = self._maps
+        return tuple(sorted(set(
+            region
+            for key in names.get(canonicalname, ())
+            if environment in (None, key[0])
+            for region in regions[key]
+        )))
+
+    def environments(self, region):
+        """Return the environments a region or canonical name is in"""
+        return tuple(sorted(set(
+            environment for environment, _ in self._maps[1].get(region, ())
+        )))
+
+    def environment_regions(self, environment):
+        """Return the canonical names of the regions of an environment"""
+        return self._maps[3].get(environment, ())
+
+    def rewrite_filters(self, model, filters):
+        """Rewrite a region filter to the columns stored by a model
+
+        A region filter of a Microsoft servers query is replaced by
+        all the stored region names sharing the canonical name, and
+        that of a Microsoft images query, which have no region, by
+        the environments of the region.
+
+        Args:
+            model (PintBase): The Microsoft model to be queried
+            filters (dict): Column name to value, or to a list of
+                values, possibly including a region
+
+        Returns:
+            [dict]: The rewritten filters
+        """
+        filters = dict(filters)
+        if 'region' not in filters:
+            return filters
+
+        value = filters.pop('region')
+        requested = list(value) \
+            if isinstance(value, (list, tuple, set, frozenset)) else [value]
+
+        unknown = [r for r in requested if r not in self._maps[1]]
+        if unknown:
+            raise ValueError(
+                'Unknown Microsoft region(s) %s' % ', '.join(unknown)
+            )
+
+        if 'region' in model.__table__.c:
+            column = 'region'
+            values = set(r for name in requested for r in self.regions(name))
+        else:
+            column = 'environment'
+            values = set(e for name in requested
+                         for e in self.environments(name))
+
+        filters[column] = sorted(values) if len(values) > 1 \
+            else values.pop()
+        return filters
+
+    def expand_servers(self, rows):
+        """Return server rows with their canonical region name
+
+        Args:
+            rows (iterable): Server dicts, as returned by to_dict()
+
+        Returns:
+            [list]: Copies of the dicts, with the region replaced by
+                its canonical name, if known
+        """
+        expanded = []
+        for row in rows:
+            canonicalnames = self.canonical_names(row['region'])
+            row = dict(row)
+            if canonicalnames:
+                row['region'] = canonicalnames[0]
+            expanded.append(row)
+        return expanded
+
+    def expand_images(self, rows, region=None):
+        """Return a copy of image rows per region of their environment
+
+        Args:
+            rows (iterable): Image dicts, as returned by to_dict()
+            region (string, optional): Only expand to this region,
+                given by a region or canonical name
+
+        Returns:
+            [list]: Copies of the dicts, with a region key holding
+                the canonical region name
+        """
+        wanted = set(self.canonical_names(region)) \
+            if region is not None else None
+
+        expanded = []
+        for row in rows:
+            for canonicalname in self.environment_regions(
+                    row['environment']):
+                if wanted is None or canonicalname in wanted:
+                    expanded.append(dict(row, region=canonicalname))
+        return expanded
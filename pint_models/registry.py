@@ -0,0 +1,96 @@
+# Copyright (c) 2026 SUSE LLC
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import importlib
+
+# Model class names per provider and kind of table. Kept as names so
+# that looking up what exists doesn't require importing SQLAlchemy;
+# the model classes themselves are imported on first access.
+PROVIDER_MODELS = {
+    'alibaba': {
+        'images': 'AlibabaImagesModel',
+    },
+    'amazon': {
+        'images': 'AmazonImagesModel',
+        'servers': 'AmazonServersModel',
+    },
+    'google': {
+        'images': 'GoogleImagesModel',
+        'servers': 'GoogleServersModel',
+    },
+    'microsoft': {
+        'images': 'MicrosoftImagesModel',
+        'servers': 'MicrosoftServersModel',
+        'regionmap': 'MicrosoftRegionMapModel',
+    },
+    'oracle': {
+        'images': 'OracleImagesModel',
+    },
+}
+
+TABLE_NAMES = {
+    '%s%s' % (provider, kind): (provider, kind)
+    for provider, kinds in PROVIDER_MODELS.items()
+    for kind in kinds
+}
+
+_MODELS_MODULE = 'pint_models.models'
+
+
+def providers():
+    """Return the names of the supported providers"""
+    return sorted(PROVIDER_MODELS)
+
+
+def get_model(provider, kind='images'):
+    """Return the model class of a provider's table
+
+    Args:
+        provider (string): The provider name, e.g. 'amazon'
+        kind (string): The kind of table, 'images', 'servers' or
+            'regionmap'
+
+    Returns:
+        [PintBase]: The model class
+    """
+    try:
+        class_name = PROVIDER_MODELS[provider][kind]
+    except KeyError:
+        raise ValueError(
+            'Provider %s has no %s table' % (repr(provider), repr(kind))
+        )
+
+    return getattr(importlib.import_module(_MODELS_MODULE), class_name)
+
+
+def get_model_by_tablename(tablename):
+    """Return the provider model class whose table has the given name"""
+    if tablename not in TABLE_NAMES:
+        raise ValueError('Unknown provider table %s' % repr(tablename))
+    return get_model(*TABLE_NAMES[tablename])
+
+
+def models(kind=None):
+    """Return the provider model classes, optionally of a single kind"""
+    return [
+        get_model(provider, table_kind)
+        for provider in providers()
+        for table_kind in PROVIDER_MODELS[provider]
+        if kind is None or table_kind == kind
+    ]
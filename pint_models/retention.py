@@ -0,0 +1,225 @@
+# Copyright (c) 2026 SUSE LLC
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import logging
+import time
+
+from sqlalchemy import (
+    String,
+    cast,
+    delete,
+    func,
+    insert,
+    inspect,
+    literal,
+    select,
+    text,
+    tuple_,
+)
+from sqlalchemy.exc import OperationalError
+
+from pint_models import registry
+from pint_models.models import ImageArchiveModel, ImageState
+from pint_models.versions import bump_version
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+# SQLSTATE of the error raised when lock_timeout expires
+LOCK_NOT_AVAILABLE = '55P03'
+
+
+def archive_statement(model, older_than, batch_size=DEFAULT_BATCH_SIZE):
+    """Build the statement moving one batch of deleted images
+
+    Up to batch_size images deleted before older_than are deleted
+    from the model's table and inserted into the imagearchive table,
+    with the full row kept as JSON. Rows locked by other
+    transactions are skipped rather than waited for.
+
+    Args:
+        model (ProviderImageBase): The image model to archive from
+        older_than (date): Archive images deleted before this date
+        batch_size (int): Maximum number of images to move
+
+    Returns:
+        [Select]: The statement, returning the number of moved images
+    """
+    table = model.__table__
+    key_columns = [table.c[c.name] for c in inspect(model).primary_key]
+
+    candidates = select(*key_columns).where(
+        table.c.state == ImageState.deleted,
+        table.c.deletedon < older_than
+    ).order_by(table.c.deletedon).limit(batch_size).with_for_update(
+        skip_locked=True
+    )
+    moved = delete(table).where(
+        tuple_(*key_columns).in_(candidates)
+    ).returning(*table.c).cte('moved')
+
+    key_values = [cast(moved.c[c.name], String) for c in key_columns]
+    imageid = key_values[0] if len(key_values) == 1 \
+        else func.concat_ws('/', *key_values)
+
+    archived = insert(ImageArchiveModel.__table__).from_select(
+        ['tablename', 'imageid', 'name', 'deletedon', 'data'],
+        select(
+            literal(table.name, String),
+            imageid,
+            moved.c.name,
+            moved.c.deletedon,
+            func.to_jsonb(moved.table_valued())
+        )
+    ).returning(ImageArchiveModel.__table__.c.id).cte('archived')
+
+    return select(func.count()).select_from(archived)
+
+
+def archive_deleted_images(session, model, older_than,
+                           batch_size=DEFAULT_BATCH_SIZE, pause=0.1,
+                           lock_timeout='2s', max_batches=None,
+                           retries=3):
+    """Move images deleted before a date to the imagearchive table
+
+    Images are moved in batches, each committed in its own short
+    transaction, pausing between batches to let other writers in.
+    Every batch runs with a lock_timeout, so that it gives up rather
+    than queueing behind (and blocking others behind) a table lock;
+    a timed out batch is retried after a pause, while other errors
+    are raised straight away. The table's version is bumped once the
+    run ends, if any images were moved, so that caches reload the
+    table once rather than after every batch. This happens even if
+    a batch fails, as the batches before it were committed, before
+    the error of the batch is raised.
+
+    Args:
+        session (Session): DB session to use, it is committed after
+            every batch
+        model (ProviderImageBase): The image model to archive from
+        older_than (date): Archive images deleted before this date
+        batch_size (int): Maximum number of images moved per batch
+        pause (float): Seconds to sleep between batches
+        lock_timeout (string): Postgres lock_timeout of each batch
+        max_batches (int, optional): Stop after this many batches
+        retries (int): Number of consecutive lock timeouts to retry
+
+    Returns:
+        [dict]: The table name, the number of archived images and
+            batches, the elapsed seconds and the images moved per
+            second
+    """
+    if batch_size < 1:
+        raise ValueError('Invalid batch size %s' % repr(batch_size))
+
+    statement = archive_statement(model, older_than, batch_size)
+    tablename = model.__tablename__
+    archived = 0
+    batches = 0
+    failures = 0
+    started = time.monotonic()
+
+    try:
+        while max_batches is None or batches < max_batches:
+            try:
+                # On the primary, where the archive statement runs,
+                # as a RoutingSession sends SELECTs to a replica
+                session.connection().execute(
+                    text("SELECT set_config('lock_timeout', :timeout, "
+                         "true)"),
+                    {'timeout': lock_timeout}
+                )
+                moved = session.execute(statement).scalar()
+                session.commit()
+            except Exception as error:
+                # Whatever failed, the transaction is done for
+                session.rollback()
+                failures += 1
+                if not isinstance(error, OperationalError) or \
+                        not _is_lock_timeout(error) or failures > retries:
+                    raise
+                logger.warning('%s: archive batch failed, retrying: %s',
+                               tablename, error.orig)
+                time.sleep(pause)
+                continue
+
+            failures = 0
+            batches += 1
+            archived += moved
+            if moved < batch_size:
+                break
+            time.sleep(pause)
+    except Exception:
+        if archived:
+            # Not letting a failed bump hide the error of the batch
+            try:
+                bump_version(session, tablename)
+                session.commit()
+            except Exception:
+                session.rollback()
+                logger.exception('%s: failed to bump the version after '
+                                 '%d archived images', tablename, archived)
+        raise
+
+    if archived:
+        bump_version(session, tablename)
+        session.commit()
+
+    elapsed = time.monotonic() - started
+    result = {
+        'tablename': tablename,
+        'archived': archived,
+        'batches': batches,
+        'seconds': elapsed,
+        'rows_per_second': archived / elapsed if elapsed else 0.0,
+    }
+    logger.info('%s: archived %d images in %d batches (%.0f rows/sec)',
+                tablename, archived, batches, result['rows_per_second'])
+    return result
+
+
+def archive_all_deleted_images(session, older_than, models=None, **kwargs):
+    """Archive the old deleted images of every provider
+
+    Args:
+        session (Session): DB session to use
+        older_than (date): Archive images deleted before this date
+        models (list, optional): The image models to archive from,
+            defaults to those of all providers
+        **kwargs: Further archive_deleted_images() arguments
+
+    Returns:
+        [list]: The archive_deleted_images() result of each table
+    """
+    if models is None:
+        models = registry.models('images')
+
+    return [
+        archive_deleted_images(session, model, older_than, **kwargs)
+        for model in models
+    ]
+
+
+def _is_lock_timeout(error):
+    """Whether a DB error is a lock_timeout expiring"""
+    orig = getattr(error, 'orig', None)
+    # psycopg and psycopg2 name the error code differently
+    code = getattr(orig, 'sqlstate', None) or getattr(orig, 'pgcode', None)
+    return code == LOCK_NOT_AVAILABLE
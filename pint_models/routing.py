@@ -0,0 +1,228 @@
+# Copyright (c) 2026 SUSE LLC
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import contextlib
+import itertools
+import logging
+import re
+import threading
+import time
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import CompoundSelect, Select
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.sql.selectable import CTE, TextualSelect
+
+logger = logging.getLogger(__name__)
+
+# Textual statements routed as reads, and the locking clauses that
+# make them writes
+READ_SQL = re.compile(r'\s*SELECT\b', re.IGNORECASE)
+LOCKING_SQL = re.compile(
+    r'\bFOR\s+(UPDATE|NO\s+KEY\s+UPDATE|SHARE|KEY\s+SHARE)\b',
+    re.IGNORECASE
+)
+
+ROUND_ROBIN = 'round-robin'
+LEAST_CONNECTIONS = 'least-connections'
+STRATEGIES = (ROUND_ROBIN, LEAST_CONNECTIONS)
+
+# Replication lag in seconds, zero when the replica has replayed
+# everything it has received, or when connected to a primary.
+REPLICA_LAG_QUERY = text(
+    'SELECT CASE '
+    'WHEN NOT pg_is_in_recovery() THEN 0 '
+    'WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE COALESCE('
+    'EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) '
+    'END'
+)
+
+
+class ReplicaSet(object):
+    """Selects the read replica engine to route a read to
+
+    Args:
+        engines (list): The replica engines
+        strategy (string): Either 'round-robin' or 'least-connections',
+            the latter picking the replica with the fewest checked
+            out pool connections
+        max_lag (float, optional): Replicas lagging behind the primary
+            by more than this many seconds are skipped
+        lag_check_interval (float): Minimum number of seconds between
+            replication lag checks of a replica
+    """
+
+    def __init__(self, engines, strategy=ROUND_ROBIN, max_lag=None,
+                 lag_check_interval=5):
+        if strategy not in STRATEGIES:
+            raise ValueError(
+                'Invalid replica strategy %s, expected one of %s' % (
+                    repr(strategy),
+                    ', '.join(STRATEGIES)
+                )
+            )
+
+        self.engines = list(engines)
+        self.strategy = strategy
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+
+        self._lock = threading.Lock()
+        self._cycle = itertools.cycle(self.engines)
+        self._lags = {}
+
+    def choose(self):
+        """Return a replica engine to read from
+
+        Returns:
+            [Engine]: A replica engine, or None if no replica is
+                currently usable and reads should go to the primary
+        """
+        candidates = [e for e in self.engines if self._is_usable(e)]
+        if not candidates:
+            return None
+
+        if self.strategy == LEAST_CONNECTIONS:
+            return min(candidates, key=_checked_out)
+
+        with self._lock:
+            for _ in range(len(self.engines)):
+                engine = next(self._cycle)
+                if engine in candidates:
+                    return engine
+
+    def lag(self, engine):
+        """Return the (cached) replication lag of a replica in seconds"""
+        now = time.monotonic()
+        with self._lock:
+            checked, lag = self._lags.get(engine, (None, None))
+            if checked is not None and \
+                    now - checked < self.lag_check_interval:
+                return lag
+
+        lag = self._measure_lag(engine)
+        with self._lock:
+            self._lags[engine] = (now, lag)
+        return lag
+
+    def _is_usable(self, engine):
+        if self.max_lag is None:
+            return True
+        return self.lag(engine) <= self.max_lag
+
+    def _measure_lag(self, engine):
+        try:
+            with engine.connect() as connection:
+                return float(connection.execute(REPLICA_LAG_QUERY).scalar())
+        except Exception as error:
+            logger.warning('Replica %s unavailable: %s',
+                           engine.url.render_as_string(hide_password=True),
+                           error)
+            return float('inf')
+
+
+class RoutingSession(Session):
+    """Session routing reads to replicas and everything else to primary
+
+    SELECT statements, including UNIONs and textual SELECTs, are sent
+    to a replica chosen by the ReplicaSet, unless they lock rows
+    (with_for_update() or FOR UPDATE), are issued while flushing, or
+    the session has already sent any other statement in its current
+    transaction, in which case the primary is used so that reads see
+    the session's own changes. The replica is chosen
+    once per transaction, so that all its reads see the same snapshot
+    and it holds a single replica connection. Use using_primary() to
+    force reads to the primary.
+
+    Args:
+        bind (Engine): The primary engine
+        replicas (ReplicaSet, optional): The replicas to read from
+    """
+
+    def __init__(self, replicas=None, **kwargs):
+        super(RoutingSession, self).__init__(**kwargs)
+        self.primary = self.bind
+        self.replicas = replicas
+        self._force_primary = 0
+        self._wrote = False
+        self._replica = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if not _is_plain_read(clause):
+            if clause is not None:
+                self._wrote = True
+            return self.primary
+
+        if self.replicas is None or self._flushing or self._wrote or \
+                self._force_primary:
+            return self.primary
+
+        if self._replica is None:
+            self._replica = self.replicas.choose() or self.primary
+        return self._replica
+
+    @contextlib.contextmanager
+    def using_primary(self):
+        """Route all statements within the block to the primary"""
+        self._force_primary += 1
+        try:
+            yield self
+        finally:
+            self._force_primary -= 1
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(session, flush_context):
+    session._wrote = True
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _after_transaction_end(session, transaction):
+    if transaction.parent is None:
+        session._wrote = False
+        session._replica = None
+
+
+def _is_plain_read(clause):
+    """Whether a statement is a SELECT that doesn't lock rows
+
+    Selects from a WITH query that writes, e.g. a DELETE ... RETURNING
+    passed to select_from(), aren't reads.
+    """
+    if isinstance(clause, TextualSelect):
+        clause = clause.element
+    if isinstance(clause, TextClause):
+        return READ_SQL.match(clause.text) is not None and \
+            LOCKING_SQL.search(clause.text) is None
+    if isinstance(clause, CompoundSelect):
+        return clause._for_update_arg is None and \
+            all(_is_plain_read(select) for select in clause.selects)
+    if not isinstance(clause, Select) or clause._for_update_arg is not None:
+        return False
+    return not any(
+        isinstance(element, CTE) and not _is_plain_read(element.element)
+        for element in clause._from_obj
+    )
+
+
+def _checked_out(engine):
+    pool = engine.pool
+    return pool.checkedout() if hasattr(pool, 'checkedout') else 0
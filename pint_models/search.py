@@ -0,0 +1,116 @@
+# Copyright (c) 2026 SUSE LLC
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import weakref
+
+from sqlalchemy import func, or_, select
+
+from pint_models.models import ProviderImageBase, has_trigram_extension
+from pint_models.queries import filter_conditions
+from pint_models.unified import UnifiedImagesModel, escape_like
+
+_trigram_engines = weakref.WeakKeyDictionary()
+
+
+def trigram_available(session):
+    """Return whether trigram searches can be used on a session's DB
+
+    The result is cached per engine, call clear_trigram_cache() after
+    installing the extension in a running process.
+
+    Args:
+        session (Session): DB session to check
+
+    Returns:
+        [bool]: Whether the pg_trgm extension is installed
+    """
+    engine = session.get_bind()
+    available = _trigram_engines.get(engine)
+    if available is None:
+        available = has_trigram_extension(session.connection())
+        _trigram_engines[engine] = available
+    return available
+
+
+def clear_trigram_cache():
+    """Forget which engines the pg_trgm extension is installed for"""
+    _trigram_engines.clear()
+
+
+def search_images(session, term, model=None, columns=('name',), limit=50,
+                  fuzzy=False, **filters):
+    """Search images whose name contains a term, best matches first
+
+    With the pg_trgm extension the substring match is served by the
+    trigram indexes of the image tables and matches are ranked by
+    similarity to the term. Without it, the match falls back to a
+    plain ILIKE scan, with shorter matching names ranked first.
+    Wildcards in the term match literally.
+
+    Args:
+        session (Session): DB session to query with
+        term (string): Case-insensitive substring to search for
+        model (ProviderImageBase, optional): The image model to search,
+            defaults to the images of all providers (UnifiedImagesModel)
+        columns (tuple): The columns to search, any of the model's
+            __trigram_columns__
+        limit (int, optional): Maximum number of images to return
+        fuzzy (bool): Also match names similar to, rather than
+            containing, the term (pg_trgm only), e.g. to allow for
+            typos
+        **filters: Column name to value, or to a list of values
+
+    Returns:
+        [list]: Model instances, best match first
+    """
+    if model is None:
+        model = UnifiedImagesModel
+
+    unknown = set(columns) - set(ProviderImageBase.__trigram_columns__)
+    if not columns or unknown:
+        raise ValueError(
+            'Invalid search column(s) %s, expected any of %s' % (
+                ', '.join(sorted(unknown)) or repr(columns),
+                ', '.join(ProviderImageBase.__trigram_columns__)
+            )
+        )
+
+    attributes = [getattr(model, column) for column in columns]
+    pattern = '%%%s%%' % escape_like(term)
+
+    matches = [a.ilike(pattern, escape='\\') for a in attributes]
+    if trigram_available(session):
+        if fuzzy:
+            matches += [a.op('%')(term) for a in attributes]
+        ranks = [func.similarity(a, term) for a in attributes]
+        rank = ranks[0] if len(ranks) == 1 else func.greatest(*ranks)
+        rank = rank.desc()
+    else:
+        # Without similarity, the match making up most of the shortest
+        # name is the closest one.
+        rank = func.length(model.name)
+
+    query = select(model).where(
+        or_(*matches),
+        *filter_conditions(model.__table__, filters)
+    ).order_by(rank, model.publishedon.desc(), model.name)
+    if limit is not None:
+        query = query.limit(limit)
+
+    return list(session.scalars(query))
@@ -0,0 +1,219 @@
+# Copyright (c) 2026 SUSE LLC
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import collections
+import logging
+
+from sqlalchemy import bindparam, delete, insert, select, update
+
+from pint_models.loader import _enum_name, _format_inet
+
+logger = logging.getLogger(__name__)
+
+# Server columns compared by sync_region_servers()
+SERVER_SYNC_COLUMNS = ('type', 'ip', 'ipv6', 'name', 'shape')
+
+ServerDiff = collections.namedtuple(
+    'ServerDiff',
+    ['inserts', 'updates', 'deletes', 'unchanged']
+)
+
+
+def diff_servers(model, current, desired):
+    """Work out the minimal changes turning a region's servers into others
+
+    Servers are compared on SERVER_SYNC_COLUMNS, after normalizing
+    their addresses and types. A desired server identical to a
+    current one is left alone, one sharing its IPv4 or else its IPv6
+    address with a remaining current server is an update of that
+    server, and the others are inserts. Remaining current servers
+    are deleted.
+
+    Args:
+        model (ProviderServerBase): The servers model
+        current (iterable): Mappings of the current servers, with id
+            and SERVER_SYNC_COLUMNS keys
+        desired (iterable): Mappings of the desired servers, missing
+            SERVER_SYNC_COLUMNS keys being taken as None
+
+    Returns:
+        [ServerDiff]: The servers to insert and to update (dicts of
+            SERVER_SYNC_COLUMNS, plus id for updates), the ids of
+            the servers to delete, and the number of unchanged ones
+    """
+    remaining = {}
+    current_ids = collections.defaultdict(list)
+    for row in current:
+        key = _server_key(model, row)
+        remaining[row['id']] = key
+        current_ids[key].append(row['id'])
+
+    unchanged = 0
+    pending = []
+    seen = set()
+    for row in desired:
+        key = _server_key(model, row)
+        if key in seen:
+            continue
+        seen.add(key)
+
+        if current_ids.get(key):
+            del remaining[current_ids[key].pop()]
+            unchanged += 1
+        else:
+            pending.append(key)
+
+    by_address = {}
+    for server_id, key in remaining.items():
+        for position in (1, 2):
+            if key[position] is not None:
+                by_address.setdefault((position, key[position]), server_id)
+
+    inserts = []
+    updates = []
+    for key in pending:
+        server_id = None
+        for position in (1, 2):
+            candidate = by_address.get((position, key[position]))
+            if key[position] is not None and candidate in remaining:
+                server_id = candidate
+                break
+
+        values = dict(zip(SERVER_SYNC_COLUMNS, key))
+        if server_id is None:
+            inserts.append(values)
+        else:
+            del remaining[server_id]
+            values['id'] = server_id
+            updates.append(values)
+
+    return ServerDiff(inserts, updates, sorted(remaining), unchanged)
+
+
+def sync_region_servers(session, model, region, desired):
+    """Bring the servers of a region in line with a desired list
+
+    Unlike deleting and re-inserting all the servers of the region,
+    only the rows that differ (see diff_servers()) are touched,
+    sparing the table and its (region, ip) and (region, ipv6) unique
+    indexes the churn. The region's servers are locked while the
+    deletes, updates and then inserts are applied, and the table
+    version is bumped if anything changed. The session is committed.
+
+    As servers may take over each other's addresses, which the
+    unique indexes would reject part way through the updates, the
+    addresses of the updated servers whose addresses change are
+    cleared before the new values are set.
+
+    Args:
+        session (Session): DB session to use
+        model (ProviderServerBase): The servers model
+        region (string): The region whose servers are synced
+        desired (iterable): Mappings of the desired servers, with
+            SERVER_SYNC_COLUMNS keys
+
+    Returns:
+        [dict]: Counts of 'inserted', 'updated', 'deleted' and
+            'unchanged' servers
+    """
+    from pint_models.versions import bump_version
+
+    table = model.__table__
+    current = session.execute(
+        select(table.c.id, *[table.c[c] for c in SERVER_SYNC_COLUMNS])
+        .where(table.c.region == region)
+        .with_for_update()
+    ).mappings().all()
+    diff = diff_servers(model, current, desired)
+
+    if diff.deletes:
+        session.execute(delete(table).where(table.c.id.in_(diff.deletes)))
+    if diff.updates:
+        addresses = dict(
+            (row['id'], _server_key(model, row)[1:3]) for row in current
+        )
+        moved = [
+            values['id'] for values in diff.updates
+            if (values['ip'], values['ipv6']) != addresses[values['id']]
+        ]
+        if moved:
+            session.execute(
+                update(table).where(table.c.id.in_(moved))
+                .values(ip=None, ipv6=None)
+            )
+        session.execute(
+            update(table).where(table.c.id == bindparam('server_id')),
+            [
+                dict({c: values[c] for c in SERVER_SYNC_COLUMNS},
+                     server_id=values['id'])
+                for values in diff.updates
+            ]
+        )
+    if diff.inserts:
+        session.execute(insert(table), [
+            dict(values, region=region) for values in diff.inserts
+        ])
+
+    counts = {
+        'inserted': len(diff.inserts),
+        'updated': len(diff.updates),
+        'deleted': len(diff.deletes),
+        'unchanged': diff.unchanged,
+    }
+    if diff.inserts or diff.updates or diff.deletes:
+        bump_version(session, model.__tablename__)
+    session.commit()
+
+    logger.info(
+        '%s %s: %d inserted, %d updated, %d deleted, %d unchanged',
+        model.__tablename__,
+        region,
+        counts['inserted'],
+        counts['updated'],
+        counts['deleted'],
+        counts['unchanged']
+    )
+    return counts
+
+
+def _server_key(model, row):
+    """Return the normalized SERVER_SYNC_COLUMNS values of a server"""
+    table = model.__table__
+    type_column = table.c.type
+    enum_class = type_column.type.enum_class
+
+    server_type = enum_class[_enum_name(type_column, enum_class,
+                                        row.get('type'))]
+    name = row.get('name')
+    if server_type.name == 'update' and not name:
+        raise ValueError(
+            '%s.name cannot be null/empty for an update server.' % (
+                table.name
+            )
+        )
+
+    return (
+        server_type,
+        _format_inet(table.c.ip, str(row['ip']))
+        if row.get('ip') is not None else None,
+        _format_inet(table.c.ipv6, str(row['ipv6']))
+        if row.get('ipv6') is not None else None,
+        name,
+        row.get('shape'),
+    )
@@ -0,0 +1,396 @@
+# Copyright (c) 2026 SUSE LLC
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import datetime
+import ipaddress
+import os
+import sqlite3
+
+from pint_models import registry
+
+# Bumped whenever the layout of snapshot files changes
+SNAPSHOT_FORMAT = 1
+
+# Bytes of a snapshot file the reader memory maps
+SNAPSHOT_MMAP_SIZE = 256 * 1024 * 1024
+
+
+def export_snapshot(db_session, path, models=None, batch_size=5000):
+    """Write a consistent snapshot of the catalog to an SQLite file
+
+    All provider tables and the versions table are copied in a single
+    REPEATABLE READ transaction, so the snapshot matches the versions
+    it records. Values are stored in their plain (serialized) form,
+    i.e. enum values, ISO dates and IP addresses as text. Server IPs
+    are additionally indexed by address range for SnapshotReader's
+    IP lookups. The file is written next to path and moved in place
+    once complete, so readers never see a partial snapshot.
+
+    Args:
+        db_session (Session): DB session or engine to read from
+        path (filepath): The snapshot file to write
+        models (list, optional): The provider models to copy, defaults
+            to those of all providers
+        batch_size (int): Number of rows fetched and written at a time
+
+    Returns:
+        [dict]: Table name to number of rows copied
+    """
+    from sqlalchemy import select
+    from pint_models.models import VersionsModel
+
+    if models is None:
+        models = registry.models()
+    engine = db_session.get_bind() if hasattr(db_session, 'get_bind') \
+        else db_session
+    options = {'stream_results': True}
+    if engine.dialect.name == 'postgresql':
+        options.update(isolation_level='REPEATABLE READ',
+                       postgresql_readonly=True)
+
+    temp_path = '%s.%d.tmp' % (path, os.getpid())
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+    snapshot = sqlite3.connect(temp_path)
+    counts = {}
+    try:
+        _create_snapshot_info(snapshot)
+        with engine.connect() as connection:
+            connection = connection.execution_options(**options)
+            with connection.begin():
+                for model in list(models) + [VersionsModel]:
+                    table = model.__table__
+                    result = connection.execute(select(table))
+                    counts[table.name] = _copy_table(
+                        snapshot, model, result, batch_size
+                    )
+
+        snapshot.execute(
+            'INSERT INTO snapshot_info VALUES (?, ?)',
+            ('overlapping_ips', str(int(_has_overlapping_ranges(snapshot))))
+        )
+        snapshot.execute(
+            'INSERT INTO snapshot_info VALUES (?, ?)',
+            ('created', datetime.datetime.now(
+                datetime.timezone.utc).isoformat())
+        )
+        snapshot.commit()
+        snapshot.execute('VACUUM')
+    finally:
+        snapshot.close()
+
+    os.replace(temp_path, path)
+    return counts
+
+
+class SnapshotReader(object):
+    """Query a catalog snapshot written by export_snapshot()
+
+    Only needs the Python standard library. The file is opened read
+    only and memory mapped, so opening it is nearly free and several
+    processes share the cached pages.
+
+    Args:
+        path (filepath): The snapshot file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(
+            'file:%s?mode=ro&immutable=1' % os.path.abspath(path),
+            uri=True,
+            check_same_thread=False
+        )
+        self._db.row_factory = sqlite3.Row
+        self._db.execute('PRAGMA mmap_size = %d' % SNAPSHOT_MMAP_SIZE)
+
+        info = dict(self._db.execute('SELECT key, value FROM snapshot_info'))
+        if int(info['format']) != SNAPSHOT_FORMAT:
+            raise ValueError(
+                'Unsupported snapshot format %s of %s' % (
+                    info['format'], path
+                )
+            )
+        self.created = info.get('created')
+        # Snapshots written before this was recorded may overlap
+        self._overlapping_ips = info.get('overlapping_ips') != '0'
+        self._tables = {
+            row['tablename']: row for row in
+            self._db.execute('SELECT * FROM snapshot_tables')
+        }
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def versions(self):
+        """Return the table versions the snapshot was taken at"""
+        return dict(self._db.execute(
+            'SELECT tablename, version FROM versions'
+        ))
+
+    def providers(self):
+        """Return the providers in the snapshot"""
+        return sorted(set(row['provider'] for row in self._tables.values()))
+
+    def images(self, provider=None, region=None, state=None, name=None,
+               limit=None):
+        """Return the images matching all of the given filters
+
+        Args:
+            provider (string, optional): The provider name
+            region (string, optional): The region, project or
+                environment, per provider
+            state (string, optional): The image state
+            name (string, optional): Case-insensitive substring of the
+                image name
+            limit (int, optional): Maximum number of images to return
+
+        Returns:
+            [list]: A dict per image, including its provider, by
+                provider and most recently published first
+        """
+        return self._query('images', provider, limit, {
+            'location': region,
+            'state': state,
+            'name': name,
+        }, order_by='publishedon DESC, name')
+
+    def servers(self, provider=None, region=None, type=None, limit=None):
+        """Return the servers matching all of the given filters
+
+        Args:
+            provider (string, optional): The provider name
+            region (string, optional): The region
+            type (string, optional): The server type
+            limit (int, optional): Maximum number of servers to return
+
+        Returns:
+            [list]: A dict per server, including its provider
+        """
+        return self._query('servers', provider, limit, {
+            'location': region,
+            'type': type,
+        }, order_by='region, name')
+
+    def lookup_ip(self, ip):
+        """Return the server owning an IP address
+
+        Args:
+            ip (string): The IPv4 or IPv6 address
+
+        Returns:
+            [dict]: The provider, region, type and name of the
+                server, or None
+        """
+        key = _address_key(ipaddress.ip_address(ip))
+        if self._overlapping_ips:
+            # Networks are either nested or apart, so of those holding
+            # the address the narrowest is the one starting last
+            row = self._db.execute(
+                'SELECT provider, region, type, name, end FROM serverips '
+                'WHERE start <= ? AND end >= ? ORDER BY start DESC, end '
+                'LIMIT 1',
+                (key, key)
+            ).fetchone()
+        else:
+            # Bounding only start lets the index find the one candidate
+            row = self._db.execute(
+                'SELECT provider, region, type, name, end FROM serverips '
+                'WHERE start <= ? ORDER BY start DESC LIMIT 1',
+                (key,)
+            ).fetchone()
+        if row is None or row['end'] < key:
+            return None
+
+        server = dict(row)
+        del server['end']
+        return server
+
+    def _query(self, kind, provider, limit, filters, order_by):
+        results = []
+        for table in sorted(self._tables.values(),
+                            key=lambda t: t['provider']):
+            if table['kind'] != kind or \
+                    provider not in (None, table['provider']):
+                continue
+
+            where = _where_clause(table, filters)
+            if where is None:
+                continue
+            conditions, values = where
+
+            query = 'SELECT * FROM %s%s ORDER BY %s' % (
+                table['tablename'],
+                ' WHERE ' + ' AND '.join(conditions) if conditions else '',
+                order_by
+            )
+            if limit is not None:
+                query += ' LIMIT %d' % (limit - len(results))
+
+            for row in self._db.execute(query, values):
+                result = dict(row)
+                result['provider'] = table['provider']
+                results.append(result)
+
+            if limit is not None and len(results) >= limit:
+                break
+
+        return results
+
+
+def _where_clause(table, filters):
+    """Return the conditions and values of a snapshot table's query
+
+    None is returned if nothing in the table can match the filters.
+    """
+    conditions = []
+    values = []
+    for column, value in filters.items():
+        if value is None:
+            continue
+        if column == 'location':
+            column = table['location_column']
+            if column is None:
+                return None
+        if column == 'name':
+            conditions.append("name LIKE ? ESCAPE '\\'")
+            values.append('%%%s%%' % _escape_like(value))
+        else:
+            conditions.append('%s = ?' % column)
+            values.append(value)
+
+    return conditions, values
+
+
+def _create_snapshot_info(snapshot):
+    snapshot.execute('CREATE TABLE snapshot_info (key TEXT PRIMARY KEY, '
+                     'value TEXT)')
+    snapshot.execute('INSERT INTO snapshot_info VALUES (?, ?)',
+                     ('format', str(SNAPSHOT_FORMAT)))
+    snapshot.execute('CREATE TABLE snapshot_tables (tablename TEXT '
+                     'PRIMARY KEY, provider TEXT, kind TEXT, '
+                     'location_column TEXT)')
+    snapshot.execute('CREATE TABLE serverips (provider TEXT, region TEXT, '
+                     'type TEXT, name TEXT, start TEXT, end TEXT)')
+
+
+def _copy_table(snapshot, model, result, batch_size):
+    """Copy the rows of a table result into the snapshot"""
+    from sqlalchemy import Integer
+
+    table = model.__table__
+    columns = [column.name for column in table.columns]
+    snapshot.execute('CREATE TABLE %s (%s)' % (table.name, ', '.join(
+        '%s %s' % (
+            column.name,
+            'INTEGER' if isinstance(column.type, Integer) else 'TEXT'
+        )
+        for column in table.columns
+    )))
+
+    provider, kind = registry.TABLE_NAMES.get(table.name, (None, None))
+    location_column = getattr(model, 'location_column', None)
+    if kind == 'regionmap':
+        location_column = 'environment'
+    if provider:
+        snapshot.execute(
+            'INSERT INTO snapshot_tables VALUES (?, ?, ?, ?)',
+            (table.name, provider, kind, location_column)
+        )
+
+    insert = 'INSERT INTO %s VALUES (%s)' % (
+        table.name, ', '.join('?' * len(columns))
+    )
+    serialize = model.row_serializer(list(result.keys()))
+    count = 0
+
+    for rows in result.partitions(batch_size):
+        rows = [serialize(row) for row in rows]
+        snapshot.executemany(
+            insert, [tuple(row[c] for c in columns) for row in rows]
+        )
+        if kind == 'servers':
+            snapshot.executemany(
+                'INSERT INTO serverips VALUES (?, ?, ?, ?, ?, ?)',
+                _server_ranges(provider, rows)
+            )
+        count += len(rows)
+
+    if location_column:
+        snapshot.execute('CREATE INDEX ix_%s_%s ON %s (%s)' % (
+            table.name, location_column, table.name, location_column
+        ))
+    if kind == 'images':
+        snapshot.execute('CREATE INDEX ix_%s_state ON %s (state)' % (
+            table.name, table.name
+        ))
+    if kind == 'servers':
+        snapshot.execute(
+            'CREATE INDEX IF NOT EXISTS ix_serverips_start '
+            'ON serverips (start)'
+        )
+
+    return count
+
+
+def _server_ranges(provider, rows):
+    """Yield the serverips rows of server rows"""
+    for row in rows:
+        for value in (row.get('ip'), row.get('ipv6')):
+            if value is None:
+                continue
+            network = ipaddress.ip_interface(value).network
+            yield (
+                provider, row['region'], row['type'], row['name'],
+                _address_key(network.network_address),
+                _address_key(network.broadcast_address),
+            )
+
+
+def _has_overlapping_ranges(snapshot):
+    """Whether any of the serverips ranges overlap
+
+    With the ranges sorted by start, any overlap shows up as a range
+    starting before the end of the previous one.
+    """
+    previous_end = None
+    for start, end in snapshot.execute(
+            'SELECT start, end FROM serverips ORDER BY start, end'):
+        if previous_end is not None and start <= previous_end:
+            return True
+        previous_end = end
+    return False
+
+
+def _address_key(address):
+    """Return a text key of an address sorting in address order"""
+    return '%d%032x' % (address.version, int(address))
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace(
+        '_', '\\_'
+    )
@@ -0,0 +1,254 @@
+# Copyright (c) 2026 SUSE LLC
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+from sqlalchemy import (
+    String,
+    cast,
+    event,
+    func,
+    literal_column,
+    null,
+    select,
+    union_all,
+)
+from sqlalchemy.orm import aliased
+
+from pint_models.models import (
+    AlibabaImagesModel,
+    AmazonImagesModel,
+    Base,
+    GoogleImagesModel,
+    MicrosoftImagesModel,
+    OracleImagesModel,
+    PintBase,
+)
+from pint_models.queries import filter_conditions
+
+# The image model of each provider included in the unified view
+UNIFIED_IMAGE_MODELS = {
+    'alibaba': AlibabaImagesModel,
+    'amazon': AmazonImagesModel,
+    'google': GoogleImagesModel,
+    'microsoft': MicrosoftImagesModel,
+    'oracle': OracleImagesModel,
+}
+
+# Columns shared by all image tables, as defined by ProviderImageBase
+_SHARED_COLUMNS = (
+    'name',
+    'state',
+    'replacementname',
+    'publishedon',
+    'deprecatedon',
+    'deletedon',
+    'changeinfo',
+)
+
+
+def unified_images_select():
+    """Build the UNION ALL of all image tables in a common shape
+
+    Each row has the provider name, the image id as a string (the
+    name for Google, which has no separate id), the shared image
+    columns, the replacementid where the provider has one, and the
+    image's location, i.e. its region, project or environment (NULL
+    for Oracle).
+
+    Returns:
+        [CompoundSelect]: The statement
+    """
+    selects = []
+    for provider, model in sorted(UNIFIED_IMAGE_MODELS.items()):
+        table = model.__table__
+        image_id = table.c.id if 'id' in table.c else table.c.name
+        if not isinstance(image_id.type, String):
+            image_id = cast(image_id, String(100))
+
+        location = table.c[model.location_column] \
+            if model.location_column else cast(null(), String(100))
+        replacementid = table.c.replacementid \
+            if 'replacementid' in table.c else cast(null(), String(100))
+
+        # The provider is inlined rather than bound so that Postgres
+        # can skip the other tables when filtering on it.
+        selects.append(select(
+            literal_column("'%s'" % provider, String(20)).label('provider'),
+            image_id.label('id'),
+            *[table.c[name] for name in _SHARED_COLUMNS],
+            replacementid.label('replacementid'),
+            location.label('location'),
+        ))
+
+    return union_all(*selects)
+
+
+class UnifiedImagesModel(Base, PintBase):
+    """Read-only view of the images of all providers
+
+    Mapped to the UNION ALL of the image tables, so that it doesn't
+    exist in the DB and isn't part of the metadata. Postgres pushes
+    filters down into each branch of the union, so the image table
+    indexes are still used.
+    """
+    __table__ = unified_images_select().subquery('unifiedimages')
+    __mapper_args__ = {
+        'primary_key': [__table__.c.provider, __table__.c.id],
+    }
+
+    @property
+    def tablename(self):
+        """Return the table name of the image's provider."""
+        return UNIFIED_IMAGE_MODELS[self.provider].__tablename__
+
+
+@event.listens_for(UnifiedImagesModel, 'before_insert')
+@event.listens_for(UnifiedImagesModel, 'before_update')
+@event.listens_for(UnifiedImagesModel, 'before_delete')
+def _read_only(mapper, connection, target):
+    raise ValueError(
+        'UnifiedImagesModel is read-only, modify %s instead' % (
+            target.tablename
+        )
+    )
+
+
+def unified_filter(query, name=None, filters=None):
+    """Restrict a query of the unified images
+
+    Args:
+        query (Select): The query to restrict
+        name (string, optional): Case-insensitive substring of the
+            image name, wildcards in it match literally
+        filters (dict, optional): Column name to value, or to a list
+            of values any of which may match
+
+    Returns:
+        [Select]: The restricted query
+    """
+    if name:
+        query = query.where(UnifiedImagesModel.name.ilike(
+            '%%%s%%' % escape_like(name), escape='\\'
+        ))
+
+    return query.where(
+        *filter_conditions(UnifiedImagesModel.__table__, filters)
+    )
+
+
+def unified_search(session, name=None, limit=None, **filters):
+    """Search the images of all providers in a single query
+
+    Args:
+        session (Session): DB session to query with
+        name (string, optional): Case-insensitive substring of the
+            image name
+        limit (int, optional): Maximum number of images to return
+        **filters: Column name to value, or to a list of values,
+            e.g. provider=['amazon', 'google'], state='active'
+
+    Returns:
+        [list]: UnifiedImagesModel instances, most recently published
+            first
+    """
+    query = unified_filter(select(UnifiedImagesModel), name, filters)
+    query = query.order_by(
+        UnifiedImagesModel.publishedon.desc(),
+        UnifiedImagesModel.provider,
+        UnifiedImagesModel.id
+    )
+    if limit is not None:
+        query = query.limit(limit)
+
+    return list(session.scalars(query))
+
+
+def unified_counts(session, name=None, **filters):
+    """Count the images of all providers by state in a single query
+
+    Args:
+        session (Session): DB session to query with
+        name (string, optional): Case-insensitive substring of the
+            image name
+        **filters: Column name to value, or to a list of values
+
+    Returns:
+        [dict]: Provider name to a dict of state name to count
+    """
+    query = unified_filter(
+        select(
+            UnifiedImagesModel.provider,
+            UnifiedImagesModel.state,
+            func.count()
+        ),
+        name,
+        filters
+    ).group_by(UnifiedImagesModel.provider, UnifiedImagesModel.state)
+
+    counts = {}
+    for provider, state, count in session.execute(query):
+        counts.setdefault(provider, {})[state.name] = count
+    return counts
+
+
+def unified_latest(session, name=None, per_location=False, **filters):
+    """Return the latest published image of each provider in one query
+
+    Args:
+        session (Session): DB session to query with
+        name (string, optional): Case-insensitive substring of the
+            image name
+        per_location (bool): Return the latest image of each provider
+            location rather than of each provider
+        **filters: Column name to value, or to a list of values
+
+    Returns:
+        [dict]: Provider name, or (provider, location) if per_location
+            is set, to UnifiedImagesModel instance
+    """
+    partition = [UnifiedImagesModel.provider]
+    if per_location:
+        partition.append(UnifiedImagesModel.location)
+
+    ranked = unified_filter(
+        select(
+            UnifiedImagesModel,
+            func.row_number().over(
+                partition_by=partition,
+                order_by=(
+                    UnifiedImagesModel.publishedon.desc(),
+                    UnifiedImagesModel.id.desc()
+                )
+            ).label('rank')
+        ),
+        name,
+        filters
+    ).subquery()
+    latest = aliased(UnifiedImagesModel, ranked)
+
+    images = session.scalars(select(latest).where(ranked.c.rank == 1))
+    if per_location:
+        return {(image.provider, image.location): image for image in images}
+    return {image.provider: image for image in images}
+
+
+def escape_like(value):
+    """Escape the LIKE wildcards of a value, using backslash"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace(
+        '_', '\\_'
+    )
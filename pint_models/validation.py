@@ -0,0 +1,157 @@
+# Copyright (c) 2026 SUSE LLC
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import datetime
+import logging
+
+from sqlalchemy import Date, Enum, String
+
+from pint_models.models import ProviderImageBase, image_dates_error
+
+logger = logging.getLogger(__name__)
+
+_DATE_COLUMNS = ('publishedon', 'deprecatedon', 'deletedon')
+
+
+def validate_image_rows(model, rows):
+    """Validate and normalize a batch of image rows in one pass
+
+    Applies the same rules as the ProviderImageBase validators, plus
+    the table's NOT NULL, enum and string length constraints, without
+    building ORM objects, and reports every invalid row rather than
+    stopping at the first. Date strings are parsed into dates and
+    changeinfo URLs are given their trailing '/'.
+
+    Args:
+        model (ProviderImageBase): The image model class
+        rows (list|dict): A list of dicts, or a columnar dict mapping
+            each column name to a list of values
+
+    Returns:
+        [tuple]: The list of valid (normalized) row dicts, and a list
+            of (row index, error message) for the invalid rows
+    """
+    if not issubclass(model, ProviderImageBase):
+        raise ValueError('%s is not an image model' % model.__name__)
+
+    if isinstance(rows, dict):
+        rows = _columns_to_rows(rows)
+
+    table = model.__table__
+    required = [
+        c.name for c in table.columns
+        if not c.nullable and c.server_default is None and
+        not (c.primary_key and c.autoincrement is True)
+    ]
+    enums = {
+        c.name: c.type.enum_class for c in table.columns
+        if isinstance(c.type, Enum) and c.type.enum_class
+    }
+    lengths = {
+        c.name: c.type.length for c in table.columns
+        if isinstance(c.type, String) and c.type.length
+    }
+    dates = [c.name for c in table.columns if isinstance(c.type, Date)]
+
+    valid = []
+    errors = []
+    normalized_urls = 0
+
+    for index, row in enumerate(rows):
+        row = dict(row)
+        row_errors = []
+
+        for name in required:
+            if row.get(name) is None:
+                row_errors.append('%s is required' % name)
+
+        for name, enum_class in enums.items():
+            value = row.get(name)
+            if value is not None and not isinstance(value, enum_class) \
+                    and value not in enum_class.__members__:
+                row_errors.append('%s invalid value %s' % (
+                    name, repr(value)
+                ))
+
+        for name in dates:
+            try:
+                row[name] = _to_date(row.get(name))
+            except ValueError:
+                row_errors.append('%s invalid date %s' % (
+                    name, repr(row.get(name))
+                ))
+
+        changeinfo = row.get('changeinfo')
+        if changeinfo and not changeinfo.endswith('/'):
+            row['changeinfo'] = changeinfo + '/'
+            normalized_urls += 1
+
+        for name, length in lengths.items():
+            value = row.get(name)
+            if isinstance(value, str) and len(value) > length:
+                row_errors.append('%s longer than %d characters' % (
+                    name, length
+                ))
+
+        if not row_errors:
+            error = image_dates_error(
+                row.get('name'),
+                *[row.get(name) for name in _DATE_COLUMNS]
+            )
+            if error:
+                row_errors.append(error)
+
+        if row_errors:
+            errors.append((index, '; '.join(row_errors)))
+        else:
+            valid.append(row)
+
+    if normalized_urls:
+        logger.info('%s: normalized %d changeinfo URLs',
+                    table.name, normalized_urls)
+    if errors:
+        logger.debug('%s: %d of %d rows are invalid',
+                     table.name, len(errors), len(errors) + len(valid))
+
+    return valid, errors
+
+
+def _columns_to_rows(columns):
+    """Convert a columnar batch into a list of row dicts"""
+    lengths = set(len(values) for values in columns.values())
+    if len(lengths) > 1:
+        raise ValueError('All columns of a batch must have the same length')
+
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+
+def _to_date(value):
+    """Parse a date given as a date or as YYYY-MM-DD/YYYYMMDD string"""
+    if value is None or isinstance(value, datetime.date):
+        return value
+
+    value = str(value)
+    for date_format in ('%Y-%m-%d', '%Y%m%d'):
+        try:
+            return datetime.datetime.strptime(value, date_format).date()
+        except ValueError:
+            pass
+
+    raise ValueError('Invalid date %s' % repr(value))
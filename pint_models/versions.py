@@ -0,0 +1,146 @@
+# Copyright (c) 2026 SUSE LLC
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import threading
+import time
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from pint_models.models import VersionsModel
+
+# INSERT statement constructors supporting ON CONFLICT, per dialect
+UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def get_table_versions(session):
+    """Return the current version of every table in the versions table
+
+    Args:
+        session (Session): DB session to query with
+
+    Returns:
+        [dict]: Table name to version
+    """
+    return dict(session.execute(
+        select(VersionsModel.tablename, VersionsModel.version)
+    ).all())
+
+
+def bump_version(session, tablename):
+    """Increment the version of a table, e.g. after changing its rows
+
+    Caches keyed on the versions table (see VersionTracker) pick the
+    change up once their next check happens. A versions entry is
+    added for tables that don't have one yet, in the same statement,
+    so that concurrent first bumps of a table don't conflict. The
+    caller is responsible for committing the session.
+
+    Args:
+        session (Session): DB session to update with
+        tablename (string): The table whose version to increment
+
+    Returns:
+        [Decimal]: The new version
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect not in UPSERT_INSERTS:
+        raise ValueError('Unsupported DB dialect %s' % dialect)
+
+    table = VersionsModel.__table__
+    statement = UPSERT_INSERTS[dialect](table).values(
+        tablename=tablename, version=1
+    )
+    return session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[table.c.tablename],
+            set_={'version': table.c.version + 1}
+        ).returning(table.c.version)
+    ).scalar()
+
+
+class VersionTracker(object):
+    """Caches the versions table, re-reading it at most every interval
+
+    Args:
+        check_interval (float): Minimum number of seconds between
+            queries of the versions table
+    """
+
+    def __init__(self, check_interval=30):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._checked = None
+
+    def versions(self, session):
+        """Return the table versions, refreshing them if stale
+
+        Args:
+            session (Session): DB session to query with if the
+                cached versions are stale
+
+        Returns:
+            [dict]: Table name to version
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._checked is not None and \
+                    now - self._checked < self.check_interval:
+                return self._versions
+
+        versions = get_table_versions(session)
+        with self._lock:
+            self._versions = versions
+            self._checked = now
+        return versions
+
+    def version(self, session, tablename):
+        """Return the version of a table, or None if it has none"""
+        return self.versions(session).get(tablename)
+
+    def is_stale(self, loaded_version, loaded_at, version):
+        """Whether data loaded from a table has to be reloaded
+
+        Tables without a versions entry can't be checked for changes,
+        so data loaded from them is only reloaded once check_interval
+        seconds have passed, or as soon as an entry appears.
+
+        Args:
+            loaded_version: The table version the data was loaded at
+            loaded_at (float): When the data was loaded, per
+                time.monotonic(), or None if it wasn't loaded yet
+            version: The current table version, or None
+
+        Returns:
+            [bool]: Whether the data should be reloaded
+        """
+        if loaded_at is None:
+            return True
+        if version is not None or loaded_version is not None:
+            return loaded_version != version
+        return time.monotonic() - loaded_at >= self.check_interval
+
+    def invalidate(self):
+        """Force the next lookup to re-read the versions table"""
+        with self._lock:
+            self._checked = None
@@ -23,17 +23,25 @@ setup(
         'pint_models': 'pint_models'
     },
     include_package_data=True,
-    python_requires='>=3.6',
+    python_requires='>=3.7',
     install_requires=[
-        'SQLAlchemy'
+        'SQLAlchemy>=2.0',
+        'psycopg2-binary'
     ],
     extras_require={
+        'async': [
+            'SQLAlchemy[asyncio]>=2.0',
+            'asyncpg'
+        ],
         'dev': [
             'bumpversion',
             'coverage',
             'flake8',
             'pytest-cov'
         ],
+        'psycopg': [
+            'psycopg[binary]>=3.1'
+        ],
         'test': [
             'coverage',
             'flake8',
@@ -51,7 +59,6 @@ setup(
         'License :: OSI Approved :: Apache Software License',
         'Natural Language :: English',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3.8',
         'Programming Language :: Python :: 3.9',
@@ -0,0 +1,144 @@
+import datetime
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from pint_models.models import (
+    AlibabaImagesModel,
+    AmazonImagesModel,
+    Base,
+    GoogleImagesModel,
+    MicrosoftImagesModel,
+    MicrosoftRegionMapModel,
+    OracleImagesModel,
+    VersionsModel,
+)
+
+# Tables that don't use Postgres specific column types
+SQLITE_MODELS = [
+    AlibabaImagesModel,
+    AmazonImagesModel,
+    GoogleImagesModel,
+    MicrosoftImagesModel,
+    MicrosoftRegionMapModel,
+    OracleImagesModel,
+    VersionsModel,
+]
+
+# Default locations of the images made by image_row(), per model
+# location column
+IMAGE_LOCATIONS = {
+    'region': 'us-east-1',
+    'project': 'suse-cloud',
+    'environment': 'PublicAzure',
+}
+
+
+@pytest.fixture
+def sqlite_session():
+    """A session on an in-memory SQLite DB with the portable tables"""
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(
+        bind=engine,
+        tables=[model.__table__ for model in SQLITE_MODELS]
+    )
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def pg_engine():
+    """An engine on a throwaway Postgres DB with all tables created
+
+    Set PINT_TEST_DATABASE_URI to the URL of a DB that may be freely
+    modified to run the tests using this fixture.
+    """
+    url = os.environ.get('PINT_TEST_DATABASE_URI')
+    if not url:
+        pytest.skip('PINT_TEST_DATABASE_URI is not set')
+
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def pg_session(pg_engine):
+    """A session on the throwaway Postgres DB of pg_engine"""
+    session = sessionmaker(bind=pg_engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def drop_tables(pg_engine):
+    """Return a function dropping the tables of models from pg_engine
+
+    Unlike Table.drop(), this leaves the enum types the tables use to
+    the other tables.
+    """
+    def drop_tables(*models):
+        with pg_engine.begin() as connection:
+            for model in models:
+                connection.exec_driver_sql(
+                    'DROP TABLE %s' % model.__tablename__
+                )
+
+    return drop_tables
+
+
+@pytest.fixture
+def image_row():
+    """Factory of image rows, as dicts of column values
+
+    image_row(image_id, model=AmazonImagesModel, **values) returns an
+    active image published on 2024-10-10 in the model's default
+    location (see IMAGE_LOCATIONS), updated with the given values.
+    The image_id is the id of the image, or its name for models
+    without an id of their own (Google and Microsoft images).
+    """
+    def image_row(image_id, model=AmazonImagesModel, **values):
+        table = model.__table__
+        row = {
+            'name': 'image-%s' % image_id,
+            'state': 'active',
+            'publishedon': datetime.date(2024, 10, 10),
+        }
+        if 'id' in table.c and table.c.id.autoincrement is not True:
+            row['id'] = image_id
+        else:
+            row['name'] = image_id
+        if model.location_column:
+            row[model.location_column] = IMAGE_LOCATIONS[
+                model.location_column
+            ]
+        row.update(values)
+        return row
+
+    return image_row
+
+
+@pytest.fixture
+def add_images(image_row):
+    """Add images to a session and commit them
+
+    add_images(session, images) adds the images given as a dict
+    mapping each model to a dict of image ids and their values, the
+    rest of which come from image_row().
+    """
+    def add_images(session, images):
+        session.add_all([
+            model(**image_row(image_id, model, **values))
+            for model, model_images in images.items()
+            for image_id, values in model_images.items()
+        ])
+        session.commit()
+
+    return add_images
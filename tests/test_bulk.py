@@ -0,0 +1,159 @@
+import datetime
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+
+from pint_models.bulk import (
+    build_upsert_statement,
+    bulk_upsert,
+    get_conflict_columns,
+)
+from pint_models.models import (
+    AmazonImagesModel,
+    MicrosoftImagesModel,
+)
+
+
+def _compile(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_get_conflict_columns():
+    assert get_conflict_columns(AmazonImagesModel) == ['id']
+    assert get_conflict_columns(MicrosoftImagesModel) == [
+        'name', 'environment'
+    ]
+
+
+def test_build_upsert_statement(image_row):
+    sql = _compile(build_upsert_statement(
+        AmazonImagesModel,
+        [image_row('ami-1'), image_row('ami-2')]
+    ))
+    assert 'ON CONFLICT (id) DO UPDATE' in sql
+    assert 'IS DISTINCT FROM excluded.name' in sql
+    assert 'RETURNING (xmax = 0) AS inserted' in sql
+
+
+def test_build_upsert_statement_key_columns_only():
+    sql = _compile(build_upsert_statement(
+        AmazonImagesModel,
+        [{'id': 'ami-1'}]
+    ))
+    assert 'ON CONFLICT (id) DO NOTHING' in sql
+
+
+def test_build_upsert_statement_mismatched_rows(image_row):
+    with pytest.raises(ValueError):
+        build_upsert_statement(
+            AmazonImagesModel,
+            [image_row('ami-1'), {'id': 'ami-2'}]
+        )
+
+
+def test_build_upsert_statement_unknown_column():
+    with pytest.raises(ValueError):
+        build_upsert_statement(AmazonImagesModel, [{'id': 'ami-1', 'x': 1}])
+
+
+def test_bulk_upsert_counts(image_row):
+    session = MagicMock()
+    session.execute.return_value.scalars.return_value.all.side_effect = [
+        [True, False],
+        [True]
+    ]
+
+    rows = [image_row('ami-1'), image_row('ami-2'), image_row('ami-3')]
+    counts = bulk_upsert(session, AmazonImagesModel, rows, batch_size=2)
+
+    assert session.execute.call_count == 2
+    assert counts == {'inserted': 2, 'updated': 1, 'unchanged': 0}
+
+
+def test_bulk_upsert_duplicate_key(image_row):
+    session = MagicMock()
+    rows = [image_row('ami-1'), image_row('ami-2'),
+            image_row('ami-1', name='image456')]
+
+    with pytest.raises(ValueError, match='row 2 repeats the key'):
+        bulk_upsert(session, AmazonImagesModel, rows)
+    session.execute.assert_not_called()
+
+
+def test_bulk_upsert_validates_images(image_row):
+    session = MagicMock()
+    session.execute.return_value.scalars.return_value.all.return_value = [
+        True
+    ]
+
+    image = image_row('ami-1', publishedon='20241010',
+                      changeinfo='https://example.com/ami-1')
+    bulk_upsert(session, AmazonImagesModel, [image])
+
+    # The row is normalized to the table's constraints
+    params = session.execute.call_args[0][0].compile().params
+    assert params['changeinfo_m0'] == 'https://example.com/ami-1/'
+    assert params['publishedon_m0'] == datetime.date(2024, 10, 10)
+
+    session.reset_mock()
+    rows = [image_row('ami-1'), image_row('ami-2'),
+            image_row('ami-3', state='x')]
+    with pytest.raises(ValueError, match='row 2: state invalid value'):
+        bulk_upsert(session, AmazonImagesModel, rows, batch_size=2)
+    assert session.execute.call_count == 1
+
+
+def test_bulk_upsert_invalid_batch_size():
+    with pytest.raises(ValueError):
+        bulk_upsert(MagicMock(), AmazonImagesModel, [], batch_size=0)
+
+
+def test_bulk_upsert_postgres(pg_session):
+    rows = [{
+        'name': 'image%d' % index,
+        'environment': 'PublicAzure',
+        'state': 'active',
+        'publishedon': datetime.date(2024, 10, 10)
+    } for index in range(5)]
+    assert bulk_upsert(pg_session, MicrosoftImagesModel, rows,
+                       batch_size=2) == {
+        'inserted': 5, 'updated': 0, 'unchanged': 0
+    }
+
+    rows[0]['state'] = 'deprecated'
+    assert bulk_upsert(pg_session, MicrosoftImagesModel, rows) == {
+        'inserted': 0, 'updated': 1, 'unchanged': 4
+    }
+    pg_session.commit()
+
+
+def test_changeinfo_check_postgres(pg_session, image_row):
+    pg_session.add(AmazonImagesModel(**image_row('ami-1', changeinfo='')))
+    pg_session.commit()
+
+    rows = [
+        image_row('ami-2', changeinfo=''),
+        image_row('ami-3', changeinfo='https://image123.info'),
+    ]
+    assert bulk_upsert(pg_session, AmazonImagesModel, rows) == {
+        'inserted': 2, 'updated': 0, 'unchanged': 0
+    }
+    pg_session.commit()
+    assert pg_session.execute(
+        select(AmazonImagesModel.id, AmazonImagesModel.changeinfo)
+        .order_by(AmazonImagesModel.id)
+    ).all() == [
+        ('ami-1', ''),
+        ('ami-2', ''),
+        ('ami-3', 'https://image123.info/'),
+    ]
+
+    with pytest.raises(IntegrityError, match='ck_amazonimages_changeinfo'):
+        pg_session.execute(
+            insert(AmazonImagesModel),
+            [image_row('ami-4', changeinfo='https://image123.info')]
+        )
+    pg_session.rollback()
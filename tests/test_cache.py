@@ -0,0 +1,118 @@
+import datetime
+
+import pytest
+
+from pint_models.cache import MemoryBackend, QueryCache, RedisBackend
+from pint_models.models import AmazonImagesModel, ImageState, VersionsModel
+
+
+def _add_image(session, image_id, region='us-east-1', state='active'):
+    session.add(AmazonImagesModel(
+        id=image_id,
+        name='image-%s' % image_id,
+        state=state,
+        publishedon=datetime.date(2024, 10, 10),
+        region=region
+    ))
+
+
+def _set_version(session, version):
+    session.merge(VersionsModel(tablename='amazonimages', version=version))
+    session.commit()
+
+
+def test_memory_backend_lru():
+    backend = MemoryBackend(max_entries=2)
+    backend.set('a', [1])
+    backend.set('b', [2])
+    assert backend.get('a') == [1]
+    backend.set('c', [3])
+
+    assert backend.get('b') is None
+    assert backend.get('a') == [1]
+    assert backend.stats()['evictions'] == 1
+
+
+def test_memory_backend_max_bytes():
+    backend = MemoryBackend(max_entries=None, max_bytes=100)
+    backend.set('a', 'x' * 40)
+    backend.set('b', 'y' * 40)
+    assert backend.get('a') is None
+    assert backend.stats()['bytes'] <= 100
+
+    backend.set('c', 'z' * 200)
+    assert backend.get('c') is None
+
+
+class FakeRedis(object):
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def scan_iter(self, match):
+        return [k for k in list(self.data) if k.startswith(match[:-1])]
+
+
+def test_redis_backend():
+    backend = RedisBackend(FakeRedis())
+    backend.set('a', {'x': 1})
+    assert backend.get('a') == {'x': 1}
+    backend.clear()
+    assert backend.get('a') is None
+
+
+def test_make_key():
+    assert QueryCache.make_key(
+        AmazonImagesModel,
+        {'state': ImageState.active, 'region': ['b', 'a']}
+    ) == 'amazonimages:{"region": ["a", "b"], "state": "active"}'
+
+
+def test_query_cache(sqlite_session):
+    _add_image(sqlite_session, 'ami-1')
+    _add_image(sqlite_session, 'ami-2', region='eu-west-1')
+    _set_version(sqlite_session, 1)
+
+    cache = QueryCache(check_interval=0)
+    rows = cache.get(sqlite_session, AmazonImagesModel, region='us-east-1')
+    assert [r['id'] for r in rows] == ['ami-1']
+    assert cache.get(
+        sqlite_session, AmazonImagesModel, region='us-east-1'
+    ) == rows
+    assert cache.stats()['hits'] == 1
+
+    # Changes are not seen until the table version moves
+    _add_image(sqlite_session, 'ami-3')
+    sqlite_session.commit()
+    assert len(cache.get(
+        sqlite_session, AmazonImagesModel, region='us-east-1'
+    )) == 1
+
+    _set_version(sqlite_session, 2)
+    assert len(cache.get(
+        sqlite_session, AmazonImagesModel, region='us-east-1'
+    )) == 2
+    assert cache.stats()['misses'] == 2
+
+
+def test_query_cache_without_version(sqlite_session):
+    _add_image(sqlite_session, 'ami-1')
+    sqlite_session.commit()
+
+    cache = QueryCache()
+    cache.get(sqlite_session, AmazonImagesModel)
+    cache.get(sqlite_session, AmazonImagesModel)
+    assert cache.stats()['misses'] == 2
+
+
+def test_query_cache_unknown_column(sqlite_session):
+    with pytest.raises(ValueError):
+        QueryCache().get(sqlite_session, AmazonImagesModel, size=1)
@@ -0,0 +1,91 @@
+import datetime
+
+from pint_models.catalog import CompactImageTable, ImageCatalog
+from pint_models.models import (
+    AmazonImagesModel,
+    GoogleImagesModel,
+    ImageState,
+    OracleImagesModel,
+    VersionsModel,
+)
+
+
+def _table_row(model, row):
+    """Complete a row with the model's other columns, as read from its table"""
+    return dict(dict.fromkeys(model.__table__.columns.keys()), **row)
+
+
+def test_compact_table(image_row):
+    changeinfo = 'https://example.com/changes/'
+    rows = [
+        image_row('ami-1', changeinfo=changeinfo),
+        image_row('ami-2', changeinfo=changeinfo, state=ImageState.deleted,
+                  deletedon=datetime.date(2025, 1, 2)),
+        image_row('ami-3', changeinfo=changeinfo, region='eu-west-1',
+                  state='deleted'),
+    ]
+    table = CompactImageTable(AmazonImagesModel, [
+        _table_row(AmazonImagesModel, row) for row in rows
+    ], version=2)
+
+    assert len(table) == 3
+    assert list(table.indices(state='deleted')) == [1, 2]
+    assert list(table.indices('us-east-1')) == [0, 1]
+    assert list(table.indices('us-east-1', ImageState.deleted)) == [1]
+    assert list(table.indices('nowhere')) == []
+    assert list(table.indices('eu-west-1', 'active')) == []
+
+    row = table.row(1)
+    assert row == AmazonImagesModel(**rows[1]).to_dict()
+    assert row['state'] == 'deleted'
+    assert row['deletedon'] == '2025-01-02'
+    assert row['deprecatedon'] is None
+
+    # Repeated strings are stored once
+    regions = [r['region'] for r in table.rows()]
+    assert regions[0] is regions[1]
+
+
+def test_compact_table_without_location(image_row):
+    image = _table_row(OracleImagesModel,
+                       image_row('ocid1.image.1', OracleImagesModel))
+    table = CompactImageTable(OracleImagesModel, [
+        image, dict(image, id='ocid1.image.2', state='deleted')
+    ])
+
+    # The location is ignored, as the rows have none
+    assert list(table.indices('us-ashburn-1')) == [0, 1]
+    assert list(table.indices('us-ashburn-1', 'deleted')) == [1]
+
+
+def test_catalog_refresh(sqlite_session, add_images):
+    add_images(sqlite_session, {
+        AmazonImagesModel: {'ami-1': {}, 'ami-2': {'region': 'eu-west-1'}},
+        GoogleImagesModel: {'sles': {}},
+    })
+    sqlite_session.add(VersionsModel(tablename='amazonimages', version=1))
+    sqlite_session.commit()
+
+    catalog = ImageCatalog(check_interval=0)
+    assert 'amazonimages' in catalog.refresh(sqlite_session)
+    assert len(catalog) == 3
+    assert [r['id'] for r in catalog.images(location='eu-west-1')] == [
+        'ami-2'
+    ]
+    assert [r['name'] for r in catalog.images('google')] == ['sles']
+    assert catalog.images('google').__next__()['provider'] == 'google'
+
+    # Tables without a versions entry are reloaded once check_interval
+    # has passed
+    unversioned = [
+        'alibabaimages', 'googleimages', 'microsoftimages', 'oracleimages'
+    ]
+    assert catalog.refresh(sqlite_session) == unversioned
+
+    catalog.tracker.check_interval = 30
+    assert catalog.refresh(sqlite_session) == []
+
+    sqlite_session.add(VersionsModel(tablename='googleimages', version=1))
+    sqlite_session.commit()
+    catalog.tracker.invalidate()
+    assert catalog.refresh(sqlite_session) == ['googleimages']
@@ -0,0 +1,279 @@
+import datetime
+import threading
+
+import pytest
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Integer,
+    MetaData,
+    Table,
+    delete,
+    text,
+)
+from sqlalchemy.orm import sessionmaker
+
+from pint_models.bulk import bulk_upsert
+from pint_models.changes import changes_since, upgrade_change_tracking
+from pint_models.database import init_db
+from pint_models.loader import reload_table
+from pint_models.models import (
+    AmazonImagesModel,
+    AmazonServersModel,
+    Base,
+    GoogleImagesModel,
+    ImageState,
+    MicrosoftImagesModel,
+    ServerType,
+    VersionsModel,
+)
+from pint_models.partitioning import create_partitioned_image_tables
+
+
+def test_changes_since_untracked_model():
+    with pytest.raises(ValueError):
+        changes_since(None, VersionsModel)
+
+
+def test_changes_since(pg_session, image_row):
+    bulk_upsert(pg_session, AmazonImagesModel,
+                [image_row('ami-%d' % index) for index in range(3)])
+    pg_session.commit()
+
+    changes = changes_since(pg_session, AmazonImagesModel, limit=2)
+    assert [row['id'] for row in changes.changed] == ['ami-0', 'ami-1']
+    assert changes.more
+
+    changes = changes_since(pg_session, AmazonImagesModel, changes.cursor)
+    assert [row['id'] for row in changes.changed] == ['ami-2']
+    assert changes.changed[0]['changeseq'] == changes.cursor
+    assert not changes.more
+    cursor = changes.cursor
+
+    # Rewriting unchanged rows isn't a change
+    bulk_upsert(pg_session, AmazonImagesModel,
+                [image_row('ami-%d' % index) for index in range(3)])
+    pg_session.commit()
+    assert changes_since(pg_session, AmazonImagesModel, cursor) == (
+        [], [], cursor, False
+    )
+
+    image = pg_session.get(AmazonImagesModel, 'ami-1')
+    image.state = ImageState.deprecated
+    pg_session.execute(delete(AmazonImagesModel).where(
+        AmazonImagesModel.id == 'ami-2'
+    ))
+    pg_session.commit()
+    assert image.changeseq > cursor
+
+    changes = changes_since(pg_session, AmazonImagesModel, cursor)
+    assert [row['state'] for row in changes.changed] == ['deprecated']
+    assert changes.deleted == [{'id': 'ami-2'}]
+    cursor = changes.cursor
+
+    # Deleted and added back again is just a change
+    pg_session.execute(delete(AmazonImagesModel).where(
+        AmazonImagesModel.id == 'ami-0'
+    ))
+    bulk_upsert(pg_session, AmazonImagesModel, [image_row('ami-0')])
+    pg_session.commit()
+    changes = changes_since(pg_session, AmazonImagesModel, cursor)
+    assert [row['id'] for row in changes.changed] == ['ami-0']
+    assert changes.deleted == []
+
+    # Other tables have their own changes
+    pg_session.add(AmazonServersModel(
+        type=ServerType.region, ip='10.0.0.1', region='us-east-1'
+    ))
+    pg_session.commit()
+    changes = changes_since(pg_session, AmazonServersModel)
+    assert [row['ip'] for row in changes.changed] == ['10.0.0.1']
+    assert changes.cursor > cursor
+
+
+def test_changes_since_reload_table(pg_session, add_images):
+    add_images(pg_session, {
+        MicrosoftImagesModel: {'image%d' % index: {} for index in range(3)}
+    })
+    cursor = changes_since(pg_session, MicrosoftImagesModel).cursor
+
+    reload_table(pg_session, MicrosoftImagesModel, [{
+        'id': index + 1,
+        'name': 'image%d' % index,
+        'environment': 'PublicAzure',
+        'state': 'active',
+        'publishedon': datetime.date(2024, 1, 1),
+    } for index in (0, 1)])
+
+    changes = changes_since(pg_session, MicrosoftImagesModel, cursor)
+    assert [row['id'] for row in changes.changed] == [1, 2]
+    assert changes.deleted == [{'id': 3}]
+
+    # The reloaded table is still tracked
+    image = pg_session.get(MicrosoftImagesModel, 1)
+    image.state = ImageState.deprecated
+    pg_session.commit()
+    changes = changes_since(pg_session, MicrosoftImagesModel,
+                            changes.cursor)
+    assert [row['id'] for row in changes.changed] == [1]
+
+
+def test_changes_since_partitioned(pg_engine, pg_session, image_row,
+                                   drop_tables):
+    drop_tables(AmazonImagesModel)
+    create_partitioned_image_tables(pg_engine, models=[AmazonImagesModel])
+
+    pg_session.add(AmazonImagesModel(**image_row('ami-0')))
+    pg_session.commit()
+    cursor = changes_since(pg_session, AmazonImagesModel).cursor
+
+    # Moving to another partition is a change, not a delete
+    image = pg_session.get(AmazonImagesModel, 'ami-0')
+    image.state = ImageState.deleted
+    pg_session.commit()
+    changes = changes_since(pg_session, AmazonImagesModel, cursor)
+    assert [row['state'] for row in changes.changed] == ['deleted']
+    assert changes.deleted == []
+
+    pg_session.delete(image)
+    pg_session.commit()
+    changes = changes_since(pg_session, AmazonImagesModel, changes.cursor)
+    assert changes.deleted == [{'id': 'ami-0'}]
+
+
+def test_changes_since_partitioned_pages(pg_engine, pg_session, add_images,
+                                         drop_tables):
+    drop_tables(AmazonImagesModel)
+    create_partitioned_image_tables(pg_engine, models=[AmazonImagesModel])
+
+    add_images(pg_session, {AmazonImagesModel: {'ami-0': {}, 'ami-1': {}}})
+    cursor = changes_since(pg_session, AmazonImagesModel).cursor
+
+    # Moves to and from the deleted partition leave no tombstones
+    # to be returned on a later page than the moved rows
+    for state in (ImageState.deleted, ImageState.active):
+        for image in pg_session.query(AmazonImagesModel):
+            image.state = state
+        pg_session.commit()
+
+        changed = []
+        more = True
+        while more:
+            changes = changes_since(pg_session, AmazonImagesModel, cursor,
+                                    limit=1)
+            changed.extend(row['id'] for row in changes.changed)
+            assert changes.deleted == []
+            cursor, more = changes.cursor, changes.more
+        assert sorted(changed) == ['ami-0', 'ami-1']
+
+
+def _drop_change_tracking(engine, table_name):
+    """Make a table look like one created before change tracking"""
+    with engine.begin() as connection:
+        connection.execute(text(
+            'ALTER TABLE %s DROP COLUMN changeseq CASCADE' % table_name
+        ))
+        for trigger in ('changeseq', 'tombstone'):
+            connection.execute(text(
+                'DROP TRIGGER %s_%s ON %s' % (table_name, trigger, table_name)
+            ))
+
+
+def test_upgrade_change_tracking(pg_engine, pg_session):
+    _drop_change_tracking(pg_engine, 'amazonimages')
+    with pg_engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO amazonimages (id, name, state, publishedon, region) "
+            "VALUES ('ami-0', 'image0', 'active', '2024-01-01', 'us-east-1')"
+        ))
+
+    assert 'amazonimages' in upgrade_change_tracking(pg_engine)
+    assert upgrade_change_tracking(pg_engine) == []
+
+    changes = changes_since(pg_session, AmazonImagesModel)
+    assert [row['id'] for row in changes.changed] == ['ami-0']
+
+    pg_session.execute(delete(AmazonImagesModel))
+    pg_session.commit()
+    changes = changes_since(pg_session, AmazonImagesModel, changes.cursor)
+    assert changes.deleted == [{'id': 'ami-0'}]
+
+
+def test_change_triggers_other_tables(pg_engine):
+    # Only the tables of the models are tracked, not any other table
+    # with a changeseq column
+    metadata = MetaData()
+    Table('othertable', metadata,
+          Column('id', Integer, primary_key=True),
+          Column('changeseq', BigInteger))
+    metadata.create_all(bind=pg_engine)
+    try:
+        with pg_engine.connect() as connection:
+            assert connection.execute(text(
+                'SELECT count(*) FROM pg_trigger '
+                "WHERE tgrelid = 'othertable'::regclass"
+            )).scalar() == 0
+    finally:
+        metadata.drop_all(bind=pg_engine)
+
+
+def test_init_db_upgrades_change_tracking(monkeypatch, pg_engine):
+    _drop_change_tracking(pg_engine, 'googleimages')
+    monkeypatch.setenv(
+        'DATABASE_URI',
+        pg_engine.url.render_as_string(hide_password=False)
+    )
+    db_session = init_db(create_all=True)
+    try:
+        # The model can read the table again
+        assert changes_since(db_session, GoogleImagesModel).changed == []
+    finally:
+        db_session.remove()
+        db_session.get_bind().dispose()
+
+
+def test_upgrade_change_tracking_concurrent(pg_engine):
+    # Workers creating the tables and upgrading them at the same time
+    # wait for each other rather than failing on the catalog
+    errors = []
+
+    def upgrade():
+        try:
+            for _ in range(3):
+                Base.metadata.create_all(bind=pg_engine)
+                upgrade_change_tracking(pg_engine)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=upgrade) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_changes_since_concurrent_writers(pg_engine, pg_session, image_row):
+    writer = sessionmaker(bind=pg_engine)()
+    try:
+        # The first writer numbers its change first, but commits last
+        writer.add(AmazonImagesModel(**image_row('ami-0')))
+        writer.flush()
+        bulk_upsert(pg_session, AmazonImagesModel, [image_row('ami-1')])
+        pg_session.commit()
+        assert pg_session.get(AmazonImagesModel, 'ami-1').changeseq > \
+            writer.get(AmazonImagesModel, 'ami-0').changeseq
+
+        # The committed change is held back behind the running one
+        changes = changes_since(pg_session, AmazonImagesModel)
+        assert changes == ([], [], 0, False)
+        pg_session.commit()
+
+        writer.commit()
+    finally:
+        writer.close()
+
+    changes = changes_since(pg_session, AmazonImagesModel, changes.cursor)
+    assert sorted(row['id'] for row in changes.changed) == [
+        'ami-0', 'ami-1'
+    ]
@@ -0,0 +1,103 @@
+import datetime
+import json
+
+import pytest
+
+from pint_models.export import (
+    json_array,
+    stream_images,
+    stream_rows,
+    stream_servers,
+    xml_document,
+)
+from pint_models.models import (
+    AmazonImagesModel,
+    GoogleImagesModel,
+    ImageState,
+)
+
+
+@pytest.fixture
+def images(sqlite_session):
+    for index in range(5):
+        sqlite_session.add(GoogleImagesModel(
+            name='image%d' % index,
+            project='project123',
+            state='deprecated' if index else 'active',
+            publishedon=datetime.date(2024, 10, 10),
+            deprecatedon=datetime.date(2024, 11, 1) if index else None
+        ))
+    sqlite_session.commit()
+    return sqlite_session
+
+
+def test_stream_rows(images):
+    rows = list(stream_rows(images, GoogleImagesModel,
+                            {'state': ImageState.deprecated}, chunk_size=2))
+    assert [row['name'] for row in rows] == [
+        'image1', 'image2', 'image3', 'image4'
+    ]
+
+
+def test_stream_rows_closed_early(images, monkeypatch):
+    results = []
+    execute = images.execute
+
+    def recording_execute(*args, **kwargs):
+        result = execute(*args, **kwargs)
+        results.append(result)
+        return result
+
+    monkeypatch.setattr(images, 'execute', recording_execute)
+    for format in (None, 'json'):
+        rows = stream_rows(images, GoogleImagesModel, chunk_size=2,
+                           format=format)
+        next(rows)
+        assert not results[-1].closed
+
+        rows.close()
+        assert results[-1].closed
+
+
+def test_stream_images_json(images):
+    data = json.loads(''.join(json_array(
+        stream_images(images, GoogleImagesModel, {'name': 'image1'},
+                      format='json')
+    )))
+    assert data == [{
+        'name': 'image1',
+        'project': 'project123',
+        'state': 'deprecated',
+        'replacementname': None,
+        'publishedon': '2024-10-10',
+        'deprecatedon': '2024-11-01',
+        'deletedon': None,
+        'changeinfo': None,
+        'changeseq': None
+    }]
+
+
+def test_stream_images_xml(images):
+    document = ''.join(xml_document(
+        stream_images(images, GoogleImagesModel, {'name': 'image0'},
+                      format='xml'),
+        'images'
+    ))
+    assert document == (
+        '<?xml version="1.0" encoding="UTF-8"?><images>'
+        '<image name="image0" project="project123" state="active" '
+        'publishedon="2024-10-10"/></images>'
+    )
+
+
+def test_stream_invalid_arguments(images):
+    with pytest.raises(ValueError):
+        list(stream_rows(images, GoogleImagesModel, format='yaml'))
+    with pytest.raises(ValueError):
+        stream_servers(images, AmazonImagesModel)
+
+    # Raised by the call, before anything is read
+    with pytest.raises(ValueError):
+        stream_rows(images, GoogleImagesModel, format='yaml')
+    with pytest.raises(ValueError):
+        stream_rows(images, GoogleImagesModel, {'region': 'us-east-1'})
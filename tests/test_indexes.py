@@ -0,0 +1,122 @@
+import datetime
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+
+from pint_models.indexes import (
+    create_index_statement,
+    create_missing_indexes,
+    missing_indexes,
+)
+from pint_models.models import AmazonImagesModel, ImageState
+from pint_models.partitioning import create_partitioned_image_tables
+
+
+def _index(name):
+    return [i for i in AmazonImagesModel.__table__.indexes
+            if i.name == name][0]
+
+
+def test_create_index_statement():
+    index = _index('ix_amazonimages_active')
+    assert create_index_statement(index, postgresql.dialect()) == (
+        'CREATE INDEX CONCURRENTLY ix_amazonimages_active ON amazonimages '
+        "(region, publishedon) WHERE state = 'active'"
+    )
+    assert create_index_statement(
+        index, postgresql.dialect(), concurrently=False
+    ).startswith('CREATE INDEX ix_amazonimages_active')
+
+
+def test_create_missing_indexes(pg_engine):
+    assert missing_indexes(pg_engine) == []
+
+    with pg_engine.begin() as connection:
+        connection.execute(text('DROP INDEX ix_amazonimages_region_state'))
+
+    assert [i.name for i in missing_indexes(pg_engine)] == [
+        'ix_amazonimages_region_state'
+    ]
+    assert create_missing_indexes(pg_engine) == [
+        'ix_amazonimages_region_state'
+    ]
+    assert missing_indexes(pg_engine) == []
+
+
+def test_create_missing_indexes_partitioned(pg_engine, drop_tables):
+    drop_tables(AmazonImagesModel)
+    create_partitioned_image_tables(pg_engine, models=[AmazonImagesModel])
+    with pg_engine.begin() as connection:
+        connection.execute(text('DROP INDEX ix_amazonimages_region_state'))
+
+    assert create_missing_indexes(pg_engine) == [
+        'ix_amazonimages_region_state'
+    ]
+    assert missing_indexes(pg_engine) == []
+
+    with pg_engine.connect() as connection:
+        assert connection.execute(text(
+            'SELECT c.relname FROM pg_inherits i '
+            'JOIN pg_class c ON c.oid = i.inhrelid '
+            "WHERE i.inhparent = 'ix_amazonimages_region_state'::regclass "
+            'ORDER BY c.relname'
+        )).scalars().all() == [
+            'ix_amazonimages_region_state_current',
+            'ix_amazonimages_region_state_deleted',
+        ]
+
+    # Left invalid by an interrupted build
+    with pg_engine.begin() as connection:
+        connection.execute(text('DROP INDEX ix_amazonimages_region_state'))
+        connection.execute(text(
+            'CREATE INDEX ix_amazonimages_region_state '
+            'ON ONLY amazonimages (region, state)'
+        ))
+    assert create_missing_indexes(pg_engine) == [
+        'ix_amazonimages_region_state'
+    ]
+    assert missing_indexes(pg_engine) == []
+
+
+def _explain(session, query):
+    compiled = query.compile(
+        dialect=session.get_bind().dialect,
+        compile_kwargs={'literal_binds': True}
+    )
+    session.execute(text('SET LOCAL enable_seqscan = off'))
+    return '\n'.join(
+        session.execute(text('EXPLAIN %s' % compiled)).scalars()
+    )
+
+
+def test_image_query_plans(pg_session):
+    for index in range(200):
+        pg_session.add(AmazonImagesModel(
+            id='ami-%d' % index,
+            name='image%d' % index,
+            state=ImageState.active if index % 4 else ImageState.deleted,
+            publishedon=datetime.date(2024, 1, 1) +
+            datetime.timedelta(days=index),
+            region='region%d' % (index % 10),
+            replacementid='ami-%d' % (index + 1) if index % 2 else None
+        ))
+    pg_session.commit()
+    pg_session.execute(text('ANALYZE amazonimages'))
+
+    table = AmazonImagesModel.__table__
+    plan = _explain(pg_session, select(table).where(
+        table.c.region == 'region1',
+        table.c.state == ImageState.deleted
+    ))
+    assert 'ix_amazonimages_region_state' in plan
+
+    plan = _explain(pg_session, select(table).where(
+        table.c.state == ImageState.deleted,
+        table.c.publishedon > datetime.date(2024, 3, 1)
+    ))
+    assert 'ix_amazonimages_state_publishedon' in plan
+
+    plan = _explain(pg_session, select(table).where(
+        table.c.replacementid == 'ami-8'
+    ))
+    assert 'ix_amazonimages_replacementid' in plan
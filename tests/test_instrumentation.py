@@ -0,0 +1,150 @@
+import logging
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+from pint_models.database import close_db_logger, create_db_logger
+from pint_models.instrumentation import (
+    SLOW_QUERY_LOGGER,
+    LatencyHistogram,
+    QueryStats,
+    fingerprint,
+    instrument_engine,
+    query_stats,
+)
+
+
+def test_fingerprint():
+    assert fingerprint(
+        "SELECT *  FROM amazonimages\n WHERE id = 'ami-1' AND x = 10"
+    ) == 'SELECT * FROM amazonimages WHERE id = ? AND x = ?'
+    assert fingerprint(
+        'SELECT id FROM t WHERE id IN (%(id_1_1)s, %(id_1_2)s)'
+    ) == 'SELECT id FROM t WHERE id IN (?)'
+    assert fingerprint(
+        'INSERT INTO t (a, b) VALUES ($1, $2), ($3, $4), ($5, $6)'
+    ) == 'INSERT INTO t (a, b) VALUES (?, ?), ...'
+    assert fingerprint(
+        "SELECT :name::inet, ix_1 FROM t"
+    ) == 'SELECT ?::inet, ix_1 FROM t'
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram(buckets=(0.1, 1.0))
+    for duration in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(duration)
+
+    assert histogram.cumulative() == [(0.1, 2), (1.0, 3), (float('inf'), 4)]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(2.65)
+
+
+def test_query_stats_slow_and_sampled(caplog):
+    stats = QueryStats(slow_query_threshold=1.0, sample_rate=1.0,
+                       max_fingerprints=1)
+
+    with caplog.at_level(logging.INFO, logger=SLOW_QUERY_LOGGER):
+        stats.record_statement('SELECT 1', 2.0, 1)
+        stats.record_statement('SELECT 2', 0.1, 1)
+        stats.record_statement('SELECT x FROM t', 0.1, 3)
+
+    assert [r.levelname for r in caplog.records] == [
+        'WARNING', 'INFO', 'INFO'
+    ]
+    snapshot = stats.snapshot()
+    assert snapshot['slow_queries'] == 1
+    assert snapshot['statements']['SELECT ?']['count'] == 2
+    assert snapshot['statements']['other']['rows'] == 3
+
+
+def test_query_stats_invalid_sample_rate():
+    with pytest.raises(ValueError):
+        QueryStats(sample_rate=2)
+
+
+def test_instrument_engine():
+    engine = create_engine('sqlite://')
+    stats = instrument_engine(engine)
+    assert query_stats(engine) is stats
+
+    with engine.connect() as connection:
+        for value in range(3):
+            connection.execute(text('SELECT :value'), {'value': value})
+        with pytest.raises(Exception):
+            connection.execute(text('SELECT * FROM missing'))
+
+    snapshot = stats.snapshot()
+    assert snapshot['statements']['SELECT ?']['count'] == 3
+    assert snapshot['errors'] == 1
+    assert snapshot['pool_wait']['count'] >= 1
+    assert snapshot['pool_hold']['count'] >= 1
+
+    metrics = stats.prometheus_text()
+    assert '# TYPE pint_sql_statement_duration_seconds histogram' in metrics
+    assert 'pint_sql_statement_duration_seconds_count' \
+        '{fingerprint="SELECT ?"} 3' in metrics
+    assert 'pint_sql_pool_wait_seconds_bucket{le="+Inf"}' in metrics
+    assert 'pint_sql_errors_total 1' in metrics
+
+    engine.dispose()
+    with engine.connect() as connection:
+        connection.execute(text('SELECT 1'))
+    assert stats.snapshot()['pool_wait']['count'] > \
+        snapshot['pool_wait']['count']
+
+
+def test_instrument_engine_pool_wait(tmp_path):
+    engine = create_engine('sqlite:///%s' % (tmp_path / 'db'),
+                           poolclass=QueuePool, pool_size=1, max_overflow=0)
+    stats = instrument_engine(engine)
+
+    # Waiting for the only connection of the pool to be returned counts
+    held = threading.Event()
+
+    def hold_connection():
+        with engine.connect():
+            held.set()
+            time.sleep(0.2)
+
+    thread = threading.Thread(target=hold_connection)
+    thread.start()
+    held.wait()
+    with engine.connect() as connection:
+        connection.execute(text('SELECT 1'))
+    thread.join()
+
+    snapshot = stats.snapshot()
+    assert snapshot['pool_wait']['count'] == 2
+    assert snapshot['pool_wait']['sum'] >= 0.1
+    engine.dispose()
+
+
+def test_create_db_logger(tmp_path):
+    path = tmp_path / 'sql.log'
+    listener = create_db_logger(str(path))
+    db_logger = logging.getLogger(SLOW_QUERY_LOGGER)
+    try:
+        # Setting up the same file again doesn't duplicate records
+        assert create_db_logger(str(path)) is listener
+        assert len(db_logger.handlers) == 1
+        QueryStats(slow_query_threshold=0).record_statement('SELECT 1', 0.2)
+    finally:
+        close_db_logger()
+
+    assert db_logger.handlers == []
+    assert path.read_text().count(
+        'Slow query (0.200s, ? rows): SELECT 1'
+    ) == 1
+
+
+def test_create_db_logger_other_file(tmp_path):
+    first = create_db_logger(str(tmp_path / 'first.log'))
+    try:
+        second = create_db_logger(str(tmp_path / 'second.log'))
+        assert second is not first
+        assert len(logging.getLogger(SLOW_QUERY_LOGGER).handlers) == 1
+    finally:
+        close_db_logger()
@@ -0,0 +1,158 @@
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from pint_models.ipindex import ServerIPIndex, ServerMatch, lookup_server_sql
+from pint_models.models import (
+    AmazonServersModel,
+    MicrosoftServersModel,
+    ServerType,
+)
+
+
+def _server(ip, ipv6=None, region='us-east-1', server_type='region',
+            name=None):
+    return {
+        'type': server_type,
+        'region': region,
+        'name': name,
+        'ip': ip,
+        'ipv6': ipv6
+    }
+
+
+def _index():
+    index = ServerIPIndex()
+    index.load_rows('amazonservers', [
+        _server('192.168.0.1', '2001:db8::1'),
+        _server('10.0.0.0/24', region='us-west-1'),
+        _server('192.168.0.9', server_type=ServerType.update,
+                name='update1'),
+    ], version=1)
+    index.load_rows('microsoftservers', [
+        _server('172.16.0.1', region='eastus'),
+    ], version=3)
+    return index
+
+
+def test_lookup():
+    index = _index()
+    assert len(index) == 5
+    assert index.lookup('192.168.0.1') == ServerMatch(
+        'amazon', 'us-east-1', 'region', None
+    )
+    assert index.lookup('2001:db8::1') == ServerMatch(
+        'amazon', 'us-east-1', 'region', None
+    )
+    assert index.lookup('10.0.0.77').region == 'us-west-1'
+    assert index.lookup('192.168.0.9').name == 'update1'
+    assert index.lookup('172.16.0.1').provider == 'microsoft'
+
+    assert index.lookup('192.168.0.2') is None
+    assert index.lookup('10.0.1.0') is None
+    assert index.lookup('2001:db8::2') is None
+
+
+def test_lookup_overlapping():
+    index = ServerIPIndex()
+    index.load_rows('amazonservers', [
+        _server('10.0.0.0/16', region='us-west-1'),
+        _server('10.0.1.0/24', region='us-west-2'),
+        _server('10.0.1.7'),
+        _server('10.1.0.0/24', region='eu-west-1'),
+    ])
+
+    # The narrowest range holding the address wins
+    assert index.lookup('10.0.1.7').region == 'us-east-1'
+    assert index.lookup('10.0.1.8').region == 'us-west-2'
+    assert index.lookup('10.0.2.1').region == 'us-west-1'
+    assert index.lookup('10.1.0.1').region == 'eu-west-1'
+    assert index.lookup('10.2.0.1') is None
+    assert index.lookup('9.0.0.1') is None
+
+
+def test_lookup_overlapping_tables():
+    index = ServerIPIndex()
+    index.load_rows('microsoftservers', [
+        _server('10.0.0.0/16', region='eastus'),
+    ])
+    index.load_rows('amazonservers', [
+        _server('10.0.1.0/24', region='us-west-2'),
+    ])
+    index.load_rows('googleservers', [
+        _server('10.0.0.0/8', region='us-east1'),
+    ])
+
+    # The narrowest range wins whichever table holds it
+    assert index.lookup('10.0.1.7') == ServerMatch(
+        'amazon', 'us-west-2', 'region', None
+    )
+    assert index.lookup('10.0.2.1').provider == 'microsoft'
+    assert index.lookup('10.1.0.1').provider == 'google'
+
+
+def test_refresh_only_changed_tables(monkeypatch):
+    index = _index()
+    index.tracker.versions = lambda session: {
+        'amazonservers': 1,
+        'googleservers': 1,
+        'microsoftservers': 4,
+    }
+    session = MagicMock()
+    session.execute.return_value.mappings.return_value = [
+        _server('172.16.0.2', region='westus')
+    ]
+
+    assert index.refresh(session) == ['googleservers', 'microsoftservers']
+    assert index.lookup('172.16.0.1') is None
+    assert index.lookup('172.16.0.2').provider == 'microsoft'
+    assert index.lookup('192.168.0.1').provider == 'amazon'
+
+
+def test_refresh_without_versions():
+    index = ServerIPIndex()
+    index.tracker.versions = lambda session: {}
+    session = MagicMock()
+    session.execute.return_value.mappings.return_value = []
+
+    tables = ['amazonservers', 'googleservers', 'microsoftservers']
+    assert index.refresh(session) == tables
+    # Kept until check_interval has passed
+    assert index.refresh(session) == []
+
+    index.tracker.check_interval = 0
+    assert index.refresh(session) == tables
+
+    index.tracker.check_interval = 30
+    index.tracker.versions = lambda session: {'googleservers': 1}
+    assert index.refresh(session) == ['googleservers']
+
+
+def test_gist_indexes():
+    indexes = {i.name: i for i in AmazonServersModel.__table__.indexes}
+    sql = str(CreateIndex(indexes['ix_amazonservers_ip_gist']).compile(
+        dialect=postgresql.dialect()
+    ))
+    assert sql == (
+        'CREATE INDEX ix_amazonservers_ip_gist ON amazonservers '
+        'USING gist (ip inet_ops)'
+    )
+    assert 'ix_amazonservers_ipv6_gist' in indexes
+
+
+def test_lookup_server_sql(pg_session):
+    pg_session.add_all([
+        AmazonServersModel(**_server('10.0.0.0/16', region='us-west-1')),
+        AmazonServersModel(**_server('10.0.1.7', '2001:db8::1')),
+        MicrosoftServersModel(**_server('10.0.1.0/24', region='eastus')),
+    ])
+    pg_session.commit()
+
+    assert lookup_server_sql(pg_session, '10.0.1.7') == ServerMatch(
+        'amazon', 'us-east-1', 'region', None
+    )
+    assert lookup_server_sql(pg_session, '10.0.1.8').provider == 'microsoft'
+    assert lookup_server_sql(pg_session, '10.0.2.1').region == 'us-west-1'
+    assert lookup_server_sql(pg_session, '2001:db8::1').region == 'us-east-1'
+    assert lookup_server_sql(pg_session, '10.1.0.1') is None
@@ -0,0 +1,158 @@
+import datetime
+import ipaddress
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import text
+
+from pint_models.loader import (
+    copy_rows,
+    format_copy_line,
+    format_copy_value,
+    read_csv_rows,
+    read_jsonl_rows,
+    reload_table,
+)
+from pint_models.models import (
+    AmazonImagesModel,
+    AmazonServersModel,
+    ImageState,
+    MicrosoftImagesModel,
+    ServerType,
+)
+
+
+def test_format_copy_value_enums():
+    state = AmazonImagesModel.__table__.c.state
+    server_type = AmazonServersModel.__table__.c.type
+    assert format_copy_value(state, ImageState.deprecated) == 'deprecated'
+    assert format_copy_value(state, 'active') == 'active'
+    assert format_copy_value(server_type, ServerType.update) == 'update'
+
+    with pytest.raises(ValueError):
+        format_copy_value(state, 'unknown')
+
+
+def test_format_copy_value_inet():
+    ip = AmazonServersModel.__table__.c.ip
+    assert format_copy_value(ip, '192.168.0.1/32') == '192.168.0.1'
+    assert format_copy_value(
+        ip, ipaddress.ip_address('2001:db8::1')
+    ) == '2001:db8::1'
+    assert format_copy_value(ip, '10.0.0.0/24') == '10.0.0.0/24'
+
+    with pytest.raises(ValueError):
+        format_copy_value(ip, 'not-an-ip')
+
+
+def test_format_copy_line():
+    table = AmazonImagesModel.__table__
+    columns = [table.c.id, table.c.publishedon, table.c.deletedon,
+               table.c.changeinfo]
+    line = format_copy_line(columns, {
+        'id': 'ami-1',
+        'publishedon': datetime.date(2024, 10, 10),
+        'changeinfo': 'tab\there\\'
+    })
+    assert line == 'ami-1\t2024-10-10\t\\N\ttab\\there\\\\\n'
+
+
+def test_read_rows(tmp_path):
+    csv_file = tmp_path / 'images.csv'
+    csv_file.write_text('id,name,deletedon\nami-1,image123,\n')
+    assert list(read_csv_rows(str(csv_file))) == [
+        {'id': 'ami-1', 'name': 'image123', 'deletedon': None}
+    ]
+
+    jsonl_file = tmp_path / 'images.jsonl'
+    jsonl_file.write_text('{"id": "ami-1"}\n\n{"id": "ami-2"}\n')
+    assert list(read_jsonl_rows(str(jsonl_file))) == [
+        {'id': 'ami-1'}, {'id': 'ami-2'}
+    ]
+
+
+def test_copy_rows():
+    session = MagicMock()
+    session.connection.return_value.dialect.identifier_preparer.quote = (
+        lambda name: name
+    )
+    cursor = session.connection.return_value.connection.cursor.return_value
+    copied = []
+
+    def copy_expert(sql, stream):
+        copied.append(sql)
+        while True:
+            data = stream.read(7)
+            if not data:
+                break
+            copied.append(data)
+        cursor.rowcount = 2
+
+    cursor.copy_expert.side_effect = copy_expert
+
+    rows = [
+        {'id': 'ami-1', 'state': ImageState.active},
+        {'id': 'ami-2', 'state': 'deleted'},
+    ]
+    assert copy_rows(session, AmazonImagesModel, rows) == 2
+    assert copied[0] == 'COPY amazonimages (id, state) FROM STDIN'
+    assert b''.join(copied[1:]) == b'ami-1\tactive\nami-2\tdeleted\n'
+
+
+def test_copy_rows_empty():
+    assert copy_rows(MagicMock(), AmazonImagesModel, []) == 0
+
+
+def test_copy_rows_psycopg3():
+    session = MagicMock()
+    session.connection.return_value.dialect.identifier_preparer.quote = (
+        lambda name: name
+    )
+    cursor = session.connection.return_value.connection.cursor.return_value
+    del cursor.copy_expert
+    cursor.rowcount = 1
+    copy = cursor.copy.return_value.__enter__.return_value
+
+    assert copy_rows(session, AmazonImagesModel, [{'id': 'ami-1'}]) == 1
+    cursor.copy.assert_called_once_with('COPY amazonimages (id) FROM STDIN')
+    copy.write.assert_called_once_with(b'ami-1\n')
+
+
+def test_reload_table_postgres(pg_session):
+    pg_session.add(MicrosoftImagesModel(
+        name='old',
+        environment='PublicAzure',
+        state='active',
+        publishedon=datetime.date(2024, 10, 10)
+    ))
+    pg_session.commit()
+
+    assert reload_table(pg_session, MicrosoftImagesModel, [{
+        'id': index + 1,
+        'name': 'image%d' % index,
+        'environment': 'PublicAzure',
+        'state': ImageState.active,
+        'publishedon': datetime.date(2024, 10, 10)
+    } for index in range(3)]) == 3
+
+    indexes = set(pg_session.execute(text(
+        "SELECT indexname FROM pg_indexes "
+        "WHERE tablename = 'microsoftimages'"
+    )).scalars())
+    assert set(
+        i.name for i in MicrosoftImagesModel.__table__.indexes
+        if not i.info.get('trigram')
+    ) <= indexes
+    assert 'microsoftimages_pkey' in indexes
+
+    # The serial sequence survived the swap and moved past the loaded ids
+    pg_session.add(MicrosoftImagesModel(
+        name='new',
+        environment='PublicAzure',
+        state='active',
+        publishedon=datetime.date(2024, 10, 10)
+    ))
+    pg_session.commit()
+    assert pg_session.execute(text(
+        "SELECT id FROM microsoftimages WHERE name = 'new'"
+    )).scalar() == 4
@@ -1,3 +1,6 @@
+import datetime
+import ipaddress
+
 from pint_models.models import (
     AmazonImagesModel,
     AlibabaImagesModel,
@@ -8,7 +11,9 @@ from pint_models.models import (
     GoogleServersModel,
     MicrosoftServersModel,
     MicrosoftRegionMapModel,
-    VersionsModel
+    VersionsModel,
+    ImageState,
+    ServerType
 )
 
 
@@ -113,3 +118,51 @@ def test_versions_model():
         version='123'
     )
     assert version.version == '123'
+
+
+def test_to_dict():
+    image = GoogleImagesModel(
+        state=ImageState.deprecated,
+        publishedon=datetime.date(2024, 10, 10),
+        deprecatedon=datetime.date(2024, 11, 1),
+        name='image123',
+        project='project123',
+    )
+    assert image.to_dict() == {
+        'name': 'image123',
+        'project': 'project123',
+        'state': 'deprecated',
+        'replacementname': None,
+        'publishedon': '2024-10-10',
+        'deprecatedon': '2024-11-01',
+        'deletedon': None,
+        'changeinfo': None,
+        'changeseq': None
+    }
+
+    server = AmazonServersModel(
+        type=ServerType.update,
+        name='update1',
+        ip=ipaddress.ip_address('192.168.0.1'),
+        region='us-east-1'
+    )
+    assert server.to_dict()['type'] == 'update'
+    assert server.to_dict()['ip'] == '192.168.0.1'
+
+
+def test_serialize_rows():
+    rows = [
+        ('region', '192.168.0.1', 'us-east-1'),
+        (ServerType.update, None, 'us-west-1'),
+    ]
+    assert AmazonServersModel.serialize_rows(
+        rows, keys=['type', 'ip', 'region']
+    ) == [
+        {'type': 'region', 'ip': '192.168.0.1', 'region': 'us-east-1'},
+        {'type': 'update', 'ip': None, 'region': 'us-west-1'},
+    ]
+
+
+def test_repr():
+    version = VersionsModel(tablename='table1', version=1)
+    assert repr(version) == "<VersionsModel(tablename='table1', version=1)>"
@@ -0,0 +1,150 @@
+import datetime
+
+import pytest
+from sqlalchemy import MetaData, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateTable
+
+from pint_models.database import init_db
+from pint_models.loader import reload_table
+from pint_models.models import (
+    AmazonImagesModel,
+    Base,
+    ImageState,
+    MicrosoftImagesModel,
+)
+from pint_models.partitioning import (
+    PARTITIONED_IMAGE_MODELS,
+    create_partitioned_image_tables,
+    is_partitioned,
+    partition_statements,
+    partitioned_table,
+)
+
+
+def test_partitioned_table():
+    table = partitioned_table(MicrosoftImagesModel, MetaData(),
+                              trigram=False)
+    sql = str(CreateTable(table).compile(dialect=postgresql.dialect()))
+
+    assert 'PRIMARY KEY (id, state)' in sql
+    assert 'UNIQUE (name, environment, state)' in sql
+    assert 'PARTITION BY LIST (state)' in sql
+    assert 'ix_microsoftimages_name_trgm' not in [
+        i.name for i in table.indexes
+    ]
+    assert 'ix_microsoftimages_active' in [i.name for i in table.indexes]
+
+    # The model's own table is left untouched
+    assert [c.name for c in MicrosoftImagesModel.__table__.primary_key] == [
+        'id'
+    ]
+
+    assert partition_statements(table, postgresql.dialect()) == [
+        'CREATE TABLE microsoftimages_deleted PARTITION OF '
+        "microsoftimages FOR VALUES IN ('deleted')",
+        'CREATE TABLE microsoftimages_current PARTITION OF '
+        'microsoftimages DEFAULT',
+        'CREATE TRIGGER microsoftimages_unique_key_0 AFTER INSERT OR '
+        'UPDATE OF id ON microsoftimages FOR EACH ROW EXECUTE FUNCTION '
+        "pint_check_unique_key('microsoftimages', 'id')",
+        'CREATE TRIGGER microsoftimages_unique_key_1 AFTER INSERT OR '
+        'UPDATE OF name, environment ON microsoftimages FOR EACH ROW '
+        'EXECUTE FUNCTION pint_check_unique_key('
+        "'microsoftimages', 'name', 'environment')",
+    ]
+
+
+def _partition(session, image_id):
+    return session.execute(text(
+        'SELECT tableoid::regclass::text FROM amazonimages WHERE id = :id'
+    ), {'id': image_id}).scalar()
+
+
+def test_create_partitioned_image_tables(pg_engine, pg_session,
+                                         drop_tables):
+    drop_tables(*PARTITIONED_IMAGE_MODELS)
+
+    assert create_partitioned_image_tables(pg_engine) == [
+        model.__tablename__ for model in PARTITIONED_IMAGE_MODELS
+    ]
+    assert create_partitioned_image_tables(pg_engine) == []
+    assert is_partitioned(pg_session.connection(), 'amazonimages')
+    assert not is_partitioned(pg_session.connection(), 'amazonservers')
+
+    image = AmazonImagesModel(
+        id='ami-1', name='image1', state=ImageState.active,
+        publishedon=datetime.date(2024, 1, 1), region='us-east-1'
+    )
+    pg_session.add(image)
+    pg_session.commit()
+    assert _partition(pg_session, 'ami-1') == 'amazonimages_current'
+
+    image.state = ImageState.deleted
+    image.deprecatedon = datetime.date(2024, 2, 1)
+    image.deletedon = datetime.date(2024, 3, 1)
+    pg_session.commit()
+    assert _partition(pg_session, 'ami-1') == 'amazonimages_deleted'
+
+    with pytest.raises(ValueError):
+        image.deletedon = datetime.date(2023, 1, 1)
+
+    # Queries of the current images skip the deleted partition
+    plan = '\n'.join(pg_session.execute(text(
+        "EXPLAIN SELECT * FROM amazonimages WHERE state = 'active'"
+    )).scalars())
+    assert 'amazonimages_current' in plan
+    assert 'amazonimages_deleted' not in plan
+
+    pg_session.rollback()
+    with pytest.raises(ValueError):
+        reload_table(pg_session, AmazonImagesModel, [])
+    pg_session.rollback()
+
+    # Image ids stay unique across partitions
+    with pytest.raises(IntegrityError):
+        pg_session.execute(text(
+            "INSERT INTO amazonimages (id, name, state, publishedon, region) "
+            "VALUES ('ami-1', 'image1', 'active', '2024-01-01', 'us-east-1')"
+        ))
+    pg_session.rollback()
+
+    pg_session.add(AmazonImagesModel(
+        id='ami-2', name='image2', state=ImageState.active,
+        publishedon=datetime.date(2024, 1, 1), region='us-east-1'
+    ))
+    pg_session.commit()
+    with pytest.raises(IntegrityError):
+        pg_session.execute(text(
+            "UPDATE amazonimages SET id = 'ami-1' WHERE id = 'ami-2'"
+        ))
+    pg_session.rollback()
+
+
+def test_init_db_partition_images(monkeypatch, pg_engine):
+    Base.metadata.drop_all(bind=pg_engine)
+    with pg_engine.begin() as connection:
+        connection.exec_driver_sql(
+            'DROP FUNCTION IF EXISTS pint_set_changeseq, '
+            'pint_record_tombstone, pint_check_unique_key'
+        )
+
+    monkeypatch.setenv(
+        'DATABASE_URI',
+        pg_engine.url.render_as_string(hide_password=False)
+    )
+    db_session = init_db(create_all=True, partition_images=True)
+    try:
+        assert is_partitioned(db_session.connection(), 'amazonimages')
+
+        image = AmazonImagesModel(
+            id='ami-1', name='image1', state=ImageState.active,
+            publishedon=datetime.date(2024, 1, 1), region='us-east-1'
+        )
+        db_session.add(image)
+        db_session.commit()
+        assert image.changeseq is not None
+    finally:
+        db_session.remove()
+        db_session.get_bind().dispose()
@@ -0,0 +1,116 @@
+import datetime
+
+import pytest
+
+from pint_models.models import (
+    AmazonImagesModel,
+    AmazonServersModel,
+    GoogleImagesModel,
+    ImageState,
+    MicrosoftRegionMapModel,
+    OracleImagesModel,
+    ServerType,
+)
+from pint_models.queries import (
+    STATEMENT_CACHE_SIZE,
+    _build_select,
+    cached_select,
+    images_by_location,
+    region_map_by_environment,
+    servers_by_region,
+)
+
+
+def test_cached_select():
+    stmt = cached_select(AmazonImagesModel, ('region', 'state'))
+    assert stmt is cached_select(AmazonImagesModel, ('region', 'state'))
+    assert stmt is not cached_select(AmazonImagesModel, ('region',))
+    assert 'amazonimages.region = :region' in str(stmt)
+
+    # Only so many statements are kept
+    for index in range(STATEMENT_CACHE_SIZE + 1):
+        cached_select(AmazonImagesModel, ('id',) * index)
+    assert _build_select.cache_info().currsize == STATEMENT_CACHE_SIZE
+    assert stmt is not cached_select(AmazonImagesModel, ('region', 'state'))
+
+
+def _ids(images):
+    return sorted(image.id for image in images)
+
+
+def test_images_by_location(sqlite_session):
+    published = datetime.date(2024, 10, 10)
+    sqlite_session.add_all([
+        AmazonImagesModel(id='ami-%d' % index, name='image%d' % index,
+                          state=state, region=region,
+                          publishedon=published)
+        for index, (region, state) in enumerate([
+            ('us-east-1', ImageState.active),
+            ('us-east-1', ImageState.deleted),
+            ('eu-west-1', ImageState.active),
+        ])
+    ] + [
+        GoogleImagesModel(name='sles', project='suse-cloud',
+                          state=ImageState.active, publishedon=published)
+    ])
+    sqlite_session.commit()
+
+    assert _ids(images_by_location(sqlite_session, AmazonImagesModel)) == [
+        'ami-0', 'ami-1', 'ami-2'
+    ]
+    # The cached statements bind new values on every call
+    for region, state, expected in [
+        ('us-east-1', None, ['ami-0', 'ami-1']),
+        ('eu-west-1', None, ['ami-2']),
+        ('us-east-1', ImageState.deleted, ['ami-1']),
+        (None, ImageState.active, ['ami-0', 'ami-2']),
+    ]:
+        assert _ids(images_by_location(
+            sqlite_session, AmazonImagesModel, region, state
+        )) == expected
+
+    assert [image.name for image in images_by_location(
+        sqlite_session, GoogleImagesModel, 'suse-cloud', ImageState.active
+    )] == ['sles']
+
+
+def test_region_map_by_environment(sqlite_session):
+    sqlite_session.add_all([
+        MicrosoftRegionMapModel(environment=environment, region=region,
+                                canonicalname=region)
+        for environment, region in [('PublicAzure', 'eastus'),
+                                    ('PublicAzure', 'westus'),
+                                    ('USGovernment', 'usgovvirginia')]
+    ])
+    sqlite_session.commit()
+
+    assert len(region_map_by_environment(sqlite_session)) == 3
+    assert [m.region for m in region_map_by_environment(
+        sqlite_session, 'USGovernment'
+    )] == ['usgovvirginia']
+
+
+def test_servers_by_region_postgres(pg_session):
+    pg_session.add_all([
+        AmazonServersModel(type=ServerType.region, ip='10.0.0.1',
+                           region='us-east-1'),
+        AmazonServersModel(type=ServerType.update, ip='10.0.0.2',
+                           region='us-east-1', name='update1'),
+        AmazonServersModel(type=ServerType.region, ip='10.0.1.1',
+                           region='eu-west-1'),
+    ])
+    pg_session.commit()
+
+    assert len(servers_by_region(pg_session, AmazonServersModel)) == 3
+    assert sorted(str(s.ip) for s in servers_by_region(
+        pg_session, AmazonServersModel, 'us-east-1'
+    )) == ['10.0.0.1', '10.0.0.2']
+    assert [s.name for s in servers_by_region(
+        pg_session, AmazonServersModel, 'us-east-1', ServerType.update
+    )] == ['update1']
+
+
+def test_images_by_location_without_location(sqlite_session):
+    assert images_by_location(sqlite_session, OracleImagesModel) == []
+    with pytest.raises(ValueError):
+        images_by_location(sqlite_session, OracleImagesModel, 'us-ashburn-1')
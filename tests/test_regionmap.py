@@ -0,0 +1,124 @@
+import pytest
+
+from pint_models.models import (
+    MicrosoftImagesModel,
+    MicrosoftRegionMapModel,
+    MicrosoftServersModel,
+    VersionsModel,
+)
+from pint_models.regionmap import RegionMap
+from pint_models.versions import bump_version
+
+REGIONS = [
+    ('PublicAzure', 'eastus', 'eastus'),
+    ('PublicAzure', 'East US', 'eastus'),
+    ('PublicAzure', 'westeurope', 'westeurope'),
+    ('USGovernment', 'usgovvirginia', 'usgovvirginia'),
+]
+
+
+def _region_map():
+    region_map = RegionMap()
+    region_map.load_rows([
+        {'environment': e, 'region': r, 'canonicalname': c}
+        for e, r, c in REGIONS
+    ])
+    return region_map
+
+
+def test_lookups():
+    region_map = _region_map()
+    assert region_map.canonical_names('East US') == ('eastus',)
+    assert region_map.canonical_names('eastus', 'USGovernment') == ()
+    assert region_map.canonical_names('nowhere') == ()
+    assert region_map.regions('eastus') == ('East US', 'eastus')
+    assert region_map.regions('East US') == ('East US', 'eastus')
+    assert region_map.environments('usgovvirginia') == ('USGovernment',)
+    assert region_map.environment_regions('PublicAzure') == (
+        'eastus', 'westeurope'
+    )
+
+
+def test_rewrite_filters():
+    region_map = _region_map()
+    assert region_map.rewrite_filters(
+        MicrosoftServersModel, {'region': 'eastus', 'type': 'region'}
+    ) == {'region': ['East US', 'eastus'], 'type': 'region'}
+    assert region_map.rewrite_filters(
+        MicrosoftImagesModel, {'region': 'East US', 'state': 'active'}
+    ) == {'environment': 'PublicAzure', 'state': 'active'}
+    assert region_map.rewrite_filters(
+        MicrosoftImagesModel, {'region': ['eastus', 'usgovvirginia']}
+    ) == {'environment': ['PublicAzure', 'USGovernment']}
+    assert region_map.rewrite_filters(
+        MicrosoftImagesModel, {'state': 'active'}
+    ) == {'state': 'active'}
+
+    with pytest.raises(ValueError):
+        region_map.rewrite_filters(MicrosoftServersModel,
+                                   {'region': 'nowhere'})
+
+
+def test_expand():
+    region_map = _region_map()
+    assert region_map.expand_servers([
+        {'region': 'East US', 'ip': '10.0.0.1'},
+        {'region': 'elsewhere', 'ip': '10.0.0.2'},
+    ]) == [
+        {'region': 'eastus', 'ip': '10.0.0.1'},
+        {'region': 'elsewhere', 'ip': '10.0.0.2'},
+    ]
+
+    images = [{'name': 'sles', 'environment': 'PublicAzure'}]
+    assert [r['region'] for r in region_map.expand_images(images)] == [
+        'eastus', 'westeurope'
+    ]
+    assert region_map.expand_images(images, region='East US') == [
+        {'name': 'sles', 'environment': 'PublicAzure', 'region': 'eastus'}
+    ]
+    assert images == [{'name': 'sles', 'environment': 'PublicAzure'}]
+
+
+def test_refresh(sqlite_session):
+    sqlite_session.add_all([
+        MicrosoftRegionMapModel(environment=e, region=r, canonicalname=c)
+        for e, r, c in REGIONS
+    ] + [VersionsModel(tablename='microsoftregionmap', version=1)])
+    sqlite_session.commit()
+
+    region_map = RegionMap(check_interval=0)
+    assert region_map.refresh(sqlite_session)
+    assert not region_map.refresh(sqlite_session)
+    assert region_map.regions('eastus') == ('East US', 'eastus')
+
+    sqlite_session.add(MicrosoftRegionMapModel(
+        environment='PublicAzure', region='East US 1', canonicalname='eastus'
+    ))
+    bump_version(sqlite_session, 'microsoftregionmap')
+    sqlite_session.commit()
+
+    assert region_map.refresh(sqlite_session)
+    assert region_map.regions('eastus') == ('East US', 'East US 1', 'eastus')
+
+
+def test_refresh_without_version(sqlite_session):
+    sqlite_session.add_all([
+        MicrosoftRegionMapModel(environment=e, region=r, canonicalname=c)
+        for e, r, c in REGIONS
+    ])
+    sqlite_session.commit()
+
+    region_map = RegionMap()
+    assert region_map.refresh(sqlite_session)
+    # Kept until check_interval has passed
+    assert not region_map.refresh(sqlite_session)
+
+    region_map.tracker.check_interval = 0
+    assert region_map.refresh(sqlite_session)
+
+    region_map.tracker.check_interval = 30
+    bump_version(sqlite_session, 'microsoftregionmap')
+    sqlite_session.commit()
+    region_map.tracker.invalidate()
+    assert region_map.refresh(sqlite_session)
+    assert not region_map.refresh(sqlite_session)
@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import pint_models
+from pint_models.models import (
+    AmazonServersModel,
+    GoogleImagesModel,
+    MicrosoftRegionMapModel,
+)
+from pint_models.registry import (
+    get_model,
+    get_model_by_tablename,
+    models,
+    providers,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _imported_modules(statement):
+    """Return the modules imported by a statement, per -X importtime"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [ROOT] + [p for p in [env.get('PYTHONPATH')] if p]
+    )
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        env=env,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True
+    )
+    return set(
+        line.rsplit('|', 1)[1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith('import time:') and '|' in line
+    )
+
+
+def test_get_model():
+    assert get_model('google') is GoogleImagesModel
+    assert get_model('amazon', 'servers') is AmazonServersModel
+    assert get_model_by_tablename('microsoftregionmap') is \
+        MicrosoftRegionMapModel
+    assert pint_models.get_model('google') is GoogleImagesModel
+
+    with pytest.raises(ValueError):
+        get_model('oracle', 'servers')
+    with pytest.raises(ValueError):
+        get_model_by_tablename('versions')
+
+
+def test_models():
+    assert providers() == [
+        'alibaba', 'amazon', 'google', 'microsoft', 'oracle'
+    ]
+    assert len(models('images')) == 5
+    assert len(models('servers')) == 3
+    assert len(models()) == 9
+
+
+def test_lazy_attribute():
+    with pytest.raises(AttributeError):
+        pint_models.no_such_attribute
+
+
+def test_import_pint_models_is_cheap():
+    imported = _imported_modules(
+        'import pint_models, pint_models.registry'
+    )
+    assert 'pint_models.registry' in imported
+    assert 'sqlalchemy' not in imported
+
+
+def test_import_database_defers_orm():
+    imported = _imported_modules('import pint_models.database')
+    assert 'sqlalchemy' in imported
+    assert 'sqlalchemy.orm' not in imported
+    assert 'pint_models.models' not in imported
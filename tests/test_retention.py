@@ -0,0 +1,167 @@
+import datetime
+
+import pytest
+from sqlalchemy import Select, select, text
+from sqlalchemy.exc import DataError, OperationalError
+
+from pint_models.models import (
+    AmazonImagesModel,
+    GoogleImagesModel,
+    ImageArchiveModel,
+    ImageState,
+    VersionsModel,
+)
+from pint_models.retention import (
+    archive_all_deleted_images,
+    archive_deleted_images,
+)
+
+
+def _deleted(deletedon):
+    """Values of an image deleted on the given date"""
+    return {
+        'state': ImageState.deleted,
+        'publishedon': datetime.date(2020, 1, 1),
+        'deletedon': deletedon,
+    }
+
+
+def test_archive_deleted_images(pg_session, add_images):
+    old = datetime.date(2021, 1, 1)
+    images = {'ami-%d' % index: _deleted(old) for index in range(5)}
+    images['ami-5'] = _deleted(datetime.date(2024, 1, 1))
+    images['ami-6'] = {}
+    add_images(pg_session, {AmazonImagesModel: images})
+    pg_session.add(VersionsModel(tablename='amazonimages', version=1))
+    pg_session.commit()
+
+    result = archive_deleted_images(
+        pg_session, AmazonImagesModel, datetime.date(2023, 1, 1),
+        batch_size=2, pause=0
+    )
+    assert result['archived'] == 5
+    assert result['batches'] == 3
+    assert result['rows_per_second'] > 0
+
+    assert sorted(pg_session.scalars(select(AmazonImagesModel.id))) == [
+        'ami-5', 'ami-6'
+    ]
+    archive = pg_session.scalars(
+        select(ImageArchiveModel).order_by(ImageArchiveModel.imageid)
+    ).all()
+    assert [a.imageid for a in archive] == [
+        'ami-%d' % index for index in range(5)
+    ]
+    assert archive[0].tablename == 'amazonimages'
+    assert archive[0].deletedon == old
+    assert archive[0].archivedon is not None
+    assert archive[0].data['state'] == 'deleted'
+    assert archive[0].data['region'] == 'us-east-1'
+
+    # Bumped once for all the batches
+    assert pg_session.get(VersionsModel, 'amazonimages').version == 2
+
+    # Nothing left to archive, so the version stays put
+    results = archive_all_deleted_images(
+        pg_session, datetime.date(2023, 1, 1),
+        models=[AmazonImagesModel, GoogleImagesModel]
+    )
+    assert [r['archived'] for r in results] == [0, 0]
+    pg_session.expire_all()
+    assert pg_session.get(VersionsModel, 'amazonimages').version == 2
+
+
+class _DBError(Exception):
+    def __init__(self, sqlstate):
+        super(_DBError, self).__init__(sqlstate)
+        self.sqlstate = sqlstate
+
+
+def _failing_batches(monkeypatch, session, sqlstate, after):
+    """Make the archive batches after the first few fail"""
+    execute = session.execute
+    attempts = []
+
+    def failing_execute(statement, *args, **kwargs):
+        if isinstance(statement, Select) and \
+                statement.selected_columns[0].name == 'count':
+            attempts.append(statement)
+            if len(attempts) > after:
+                raise OperationalError('archive', {}, _DBError(sqlstate))
+        return execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(session, 'execute', failing_execute)
+    return attempts
+
+
+def test_archive_deleted_images_failures(monkeypatch, pg_session,
+                                         add_images):
+    add_images(pg_session, {AmazonImagesModel: {
+        'ami-%d' % index: _deleted(datetime.date(2021, 1, 1))
+        for index in range(5)
+    }})
+    pg_session.add(VersionsModel(tablename='amazonimages', version=1))
+    pg_session.commit()
+
+    # Lock timeouts are retried, and the batches done before running
+    # out of retries are visible in the version
+    attempts = _failing_batches(monkeypatch, pg_session, '55P03', 1)
+    with pytest.raises(OperationalError):
+        archive_deleted_images(
+            pg_session, AmazonImagesModel, datetime.date(2023, 1, 1),
+            batch_size=2, pause=0, retries=2
+        )
+    assert len(attempts) == 4
+    monkeypatch.undo()
+    pg_session.expire_all()
+    assert pg_session.get(VersionsModel, 'amazonimages').version == 2
+    assert len(pg_session.scalars(select(ImageArchiveModel)).all()) == 2
+
+    # Other errors aren't retried
+    attempts = _failing_batches(monkeypatch, pg_session, '08006', 0)
+    with pytest.raises(OperationalError):
+        archive_deleted_images(
+            pg_session, AmazonImagesModel, datetime.date(2023, 1, 1),
+            pause=0
+        )
+    assert len(attempts) == 1
+
+
+def test_archive_deleted_images_statement_error(monkeypatch, pg_session,
+                                                add_images):
+    add_images(pg_session, {AmazonImagesModel: {
+        'ami-%d' % index: _deleted(datetime.date(2021, 1, 1))
+        for index in range(3)
+    }})
+    pg_session.add(VersionsModel(tablename='amazonimages', version=1))
+    pg_session.commit()
+
+    # A batch failing in the DB, with other than an OperationalError,
+    # aborts the transaction, which must not hide the error
+    execute = pg_session.execute
+    attempts = []
+
+    def failing_execute(statement, *args, **kwargs):
+        if isinstance(statement, Select) and \
+                statement.selected_columns[0].name == 'count':
+            attempts.append(statement)
+            if len(attempts) > 1:
+                statement = text('SELECT 1 / 0')
+        return execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(pg_session, 'execute', failing_execute)
+    with pytest.raises(DataError, match='division by zero'):
+        archive_deleted_images(
+            pg_session, AmazonImagesModel, datetime.date(2023, 1, 1),
+            batch_size=2, pause=0
+        )
+    monkeypatch.undo()
+    pg_session.expire_all()
+    assert pg_session.get(VersionsModel, 'amazonimages').version == 2
+    assert len(pg_session.scalars(select(ImageArchiveModel)).all()) == 2
+
+
+def test_archive_deleted_images_invalid_batch_size(pg_session):
+    with pytest.raises(ValueError):
+        archive_deleted_images(pg_session, AmazonImagesModel,
+                               datetime.date(2023, 1, 1), batch_size=0)
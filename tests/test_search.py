@@ -0,0 +1,90 @@
+import datetime
+
+import pytest
+from sqlalchemy import text
+
+from pint_models.indexes import create_trigram_indexes, missing_indexes
+from pint_models.models import (
+    AmazonImagesModel,
+    GoogleImagesModel,
+    has_trigram_extension,
+)
+from pint_models.search import (
+    clear_trigram_cache,
+    search_images,
+    trigram_available,
+)
+
+
+# The images added by the tests
+IMAGES = {
+    AmazonImagesModel: {
+        'ami-1': {
+            'name': 'suse-sles-15-sp6-byos-v20240601',
+            'publishedon': datetime.date(2024, 6, 1),
+        },
+        'ami-2': {
+            'name': 'suse-sles-15-sp6-v20240601',
+            'publishedon': datetime.date(2024, 6, 1),
+        },
+        'ami-3': {
+            'name': 'suse-sles-15-sp5-v20240101',
+            'state': 'deprecated',
+            'publishedon': datetime.date(2024, 1, 1),
+            'replacementname': 'suse-sles-15-sp6-v20240601',
+        },
+    },
+    GoogleImagesModel: {
+        'sles-15-sp6-byos-v20240601': {
+            'publishedon': datetime.date(2024, 6, 1),
+            'project': 'suse-byos',
+        },
+    },
+}
+
+
+def test_search_images_fallback(sqlite_session, add_images):
+    add_images(sqlite_session, IMAGES)
+    clear_trigram_cache()
+    assert not trigram_available(sqlite_session)
+
+    assert [i.id for i in search_images(sqlite_session, 'SLES-15-SP6')] == [
+        'sles-15-sp6-byos-v20240601', 'ami-2', 'ami-1'
+    ]
+    assert [i.id for i in search_images(
+        sqlite_session, 'sp6', columns=('name', 'replacementname'),
+        provider='amazon', limit=2
+    )] == ['ami-2', 'ami-3']
+    assert [i.id for i in search_images(
+        sqlite_session, 'byos', model=AmazonImagesModel
+    )] == ['ami-1']
+    assert search_images(sqlite_session, 'sles_15') == []
+
+
+def test_search_images_invalid_column(sqlite_session):
+    with pytest.raises(ValueError):
+        search_images(sqlite_session, 'sles', columns=('changeinfo',))
+
+
+def test_search_images_postgres(pg_engine, pg_session, add_images):
+    with pg_engine.connect() as connection:
+        trigram = has_trigram_extension(connection)
+
+    assert not [i for i in missing_indexes(pg_engine)
+                if i.info.get('trigram')]
+    if trigram:
+        assert create_trigram_indexes(pg_engine) == []
+        assert pg_session.execute(text(
+            "SELECT 1 FROM pg_indexes "
+            "WHERE indexname = 'ix_amazonimages_name_trgm'"
+        )).scalar() == 1
+
+    add_images(pg_session, IMAGES)
+    clear_trigram_cache()
+    assert trigram_available(pg_session) == trigram
+
+    images = search_images(pg_session, 'sles-15-sp6-byos')
+    assert sorted(i.id for i in images) == [
+        'ami-1', 'sles-15-sp6-byos-v20240601'
+    ]
+    assert images[0].id == 'sles-15-sp6-byos-v20240601'
@@ -0,0 +1,113 @@
+import ipaddress
+
+import pytest
+from sqlalchemy import text
+
+from pint_models.models import (
+    AmazonServersModel,
+    ServerType,
+    VersionsModel,
+)
+from pint_models.serversync import diff_servers, sync_region_servers
+
+
+def _server(ip=None, ipv6=None, server_type='region', name=None,
+            server_id=None):
+    server = {'type': server_type, 'ip': ip, 'ipv6': ipv6, 'name': name}
+    if server_id is not None:
+        server['id'] = server_id
+    return server
+
+
+def test_diff_servers():
+    current = [
+        _server(ipaddress.ip_address('10.0.0.1'), server_id=1),
+        _server('10.0.0.2', '2001:db8::2', server_id=2),
+        _server('10.0.0.3', server_type=ServerType.update, name='u1',
+                server_id=3),
+        _server('10.0.0.4', server_id=4),
+    ]
+    desired = [
+        _server('10.0.0.1/32'),
+        _server('10.0.0.9', '2001:db8:0:0:0:0:0:2'),
+        _server('10.0.0.3', server_type='update', name='u2'),
+        _server('10.0.0.5'),
+        _server('10.0.0.5'),
+    ]
+
+    diff = diff_servers(AmazonServersModel, current, desired)
+    assert diff.unchanged == 1
+    assert diff.deletes == [4]
+    assert [(u['id'], u['ip'], u['name']) for u in diff.updates] == [
+        (2, '10.0.0.9', None), (3, '10.0.0.3', 'u2')
+    ]
+    assert diff.inserts == [{
+        'type': ServerType.region, 'ip': '10.0.0.5', 'ipv6': None,
+        'name': None, 'shape': None
+    }]
+
+
+def test_diff_servers_invalid():
+    with pytest.raises(ValueError):
+        diff_servers(AmazonServersModel, [],
+                     [_server('10.0.0.1', server_type='update')])
+    with pytest.raises(ValueError):
+        diff_servers(AmazonServersModel, [], [_server('10.0.0.300')])
+
+
+def test_sync_region_servers_postgres(pg_session):
+    pg_session.add_all([
+        AmazonServersModel(region=region, **_server(ip))
+        for region, ip in [('us-east-1', '10.0.0.1'),
+                           ('us-east-1', '10.0.0.2'),
+                           ('us-west-1', '10.0.1.1')]
+    ])
+    pg_session.commit()
+    ids = dict(pg_session.execute(text(
+        "SELECT host(ip), id FROM amazonservers"
+    )).all())
+
+    desired = [_server('10.0.0.1'), _server('10.0.0.2', '2001:db8::2'),
+               _server('10.0.0.3', server_type='update', name='u1')]
+    assert sync_region_servers(
+        pg_session, AmazonServersModel, 'us-east-1', desired
+    ) == {'inserted': 1, 'updated': 1, 'deleted': 0, 'unchanged': 1}
+    assert pg_session.get(VersionsModel, 'amazonservers').version == 1
+
+    servers = dict(pg_session.execute(text(
+        "SELECT host(ip), id FROM amazonservers"
+    )).all())
+    assert servers['10.0.0.1'] == ids['10.0.0.1']
+    assert servers['10.0.0.2'] == ids['10.0.0.2']
+    assert servers['10.0.1.1'] == ids['10.0.1.1']
+
+    assert sync_region_servers(
+        pg_session, AmazonServersModel, 'us-east-1', desired
+    ) == {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 3}
+    assert pg_session.get(VersionsModel, 'amazonservers').version == 1
+
+    assert sync_region_servers(
+        pg_session, AmazonServersModel, 'us-east-1', desired[:1]
+    )['deleted'] == 2
+    assert pg_session.execute(text(
+        "SELECT count(*) FROM amazonservers"
+    )).scalar() == 2
+
+
+def test_sync_region_servers_swap_postgres(pg_session):
+    pg_session.add_all([
+        AmazonServersModel(region='us-east-1', **_server(ip, ipv6))
+        for ip, ipv6 in [('10.0.0.1', '2001:db8::1'),
+                         ('10.0.0.2', '2001:db8::2')]
+    ])
+    pg_session.commit()
+
+    # Each server takes over the IPv6 address of the other
+    desired = [_server('10.0.0.1', '2001:db8::2'),
+               _server('10.0.0.2', '2001:db8::1')]
+    assert sync_region_servers(
+        pg_session, AmazonServersModel, 'us-east-1', desired
+    ) == {'inserted': 0, 'updated': 2, 'deleted': 0, 'unchanged': 0}
+    assert pg_session.execute(text(
+        "SELECT host(ip), host(ipv6) FROM amazonservers ORDER BY ip"
+    )).all() == [('10.0.0.1', '2001:db8::2'), ('10.0.0.2', '2001:db8::1')]
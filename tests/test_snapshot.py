@@ -0,0 +1,159 @@
+import datetime
+
+import pytest
+
+from pint_models.models import (
+    AmazonImagesModel,
+    AmazonServersModel,
+    GoogleImagesModel,
+    MicrosoftImagesModel,
+    MicrosoftServersModel,
+    OracleImagesModel,
+    ServerType,
+    VersionsModel,
+)
+from pint_models import registry
+from pint_models.snapshot import SnapshotReader, export_snapshot
+from tests.test_registry import _imported_modules
+
+
+# The images added by the tests
+IMAGES = {
+    AmazonImagesModel: {
+        'ami-1': {
+            'name': 'sles-15-sp6',
+            'publishedon': datetime.date(2024, 6, 1),
+        },
+        'ami-2': {
+            'name': 'sles-15-sp5',
+            'state': 'deprecated',
+            'publishedon': datetime.date(2024, 1, 1),
+            'region': 'eu-west-1',
+        },
+    },
+    GoogleImagesModel: {
+        'sles-15-sp6-v20240601': {'publishedon': datetime.date(2024, 6, 2)},
+    },
+    MicrosoftImagesModel: {
+        'sles_15_sp6': {'publishedon': datetime.date(2024, 5, 1)},
+    },
+    OracleImagesModel: {
+        'ocid-1': {
+            'name': 'sles-15-sp6',
+            'publishedon': datetime.date(2024, 2, 1),
+        },
+    },
+}
+
+
+def test_snapshot(sqlite_session, tmp_path, add_images):
+    add_images(sqlite_session, IMAGES)
+    sqlite_session.add(VersionsModel(tablename='amazonimages', version=7))
+    sqlite_session.commit()
+    path = str(tmp_path / 'catalog.db')
+
+    counts = export_snapshot(sqlite_session, path,
+                             models=registry.models('images'))
+    assert counts['amazonimages'] == 2
+    assert counts['versions'] == 1
+
+    with SnapshotReader(path) as reader:
+        assert float(reader.versions()['amazonimages']) == 7
+        assert reader.created
+        assert reader.providers() == [
+            'alibaba', 'amazon', 'google', 'microsoft', 'oracle'
+        ]
+
+        images = reader.images(name='SP6')
+        assert [(i['provider'], i['name']) for i in images] == [
+            ('amazon', 'sles-15-sp6'),
+            ('google', 'sles-15-sp6-v20240601'),
+            ('microsoft', 'sles_15_sp6'),
+            ('oracle', 'sles-15-sp6'),
+        ]
+        assert images[0]['publishedon'] == '2024-06-01'
+
+        assert [i['id'] for i in reader.images(
+            provider='amazon', region='eu-west-1', state='deprecated'
+        )] == ['ami-2']
+        assert [i['provider'] for i in reader.images(region='suse-cloud')] \
+            == ['google']
+        assert [i['name'] for i in reader.images(name='s_15')] == [
+            'sles_15_sp6'
+        ]
+        assert len(reader.images(state='active', limit=2)) == 2
+        assert reader.servers() == []
+
+
+def test_snapshot_invalid_format(tmp_path):
+    path = str(tmp_path / 'catalog.db')
+    with pytest.raises(Exception):
+        SnapshotReader(path)
+
+
+def test_snapshot_reader_needs_no_sqlalchemy():
+    imported = _imported_modules('import pint_models.snapshot')
+    assert 'pint_models.snapshot' in imported
+    assert 'sqlalchemy' not in imported
+
+
+def test_snapshot_postgres(pg_session, tmp_path, add_images):
+    add_images(pg_session, IMAGES)
+    pg_session.add_all([
+        VersionsModel(tablename='amazonimages', version=7),
+        AmazonServersModel(
+            type=ServerType.region, name='smt1', ip='10.0.0.1',
+            ipv6='2001:db8::1', region='us-east-1'
+        ),
+        AmazonServersModel(
+            type=ServerType.update, name='smt2', ip='10.0.1.0/24',
+            region='eu-west-1'
+        ),
+    ])
+    pg_session.commit()
+
+    path = str(tmp_path / 'catalog.db')
+    export_snapshot(pg_session.get_bind(), path)
+
+    with SnapshotReader(path) as reader:
+        assert [s['name'] for s in reader.servers(provider='amazon')] == [
+            'smt2', 'smt1'
+        ]
+        assert reader.servers(type='update')[0]['ip'] == '10.0.1.0/24'
+        assert reader.lookup_ip('10.0.1.77') == {
+            'provider': 'amazon',
+            'region': 'eu-west-1',
+            'type': 'update',
+            'name': 'smt2',
+        }
+        assert reader.lookup_ip('2001:db8::1')['name'] == 'smt1'
+        assert reader.lookup_ip('10.0.2.1') is None
+
+
+def test_snapshot_nested_ranges(pg_session, tmp_path):
+    pg_session.add_all([
+        AmazonServersModel(
+            type=ServerType.region, name='smt1', ip='10.0.0.0/24',
+            region='us-east-1'
+        ),
+        MicrosoftServersModel(
+            type=ServerType.update, name='smt2', ip='10.0.0.10',
+            region='eastus'
+        ),
+    ])
+    pg_session.commit()
+
+    path = str(tmp_path / 'catalog.db')
+    export_snapshot(pg_session.get_bind(), path)
+
+    # The narrowest network holding the address wins
+    with SnapshotReader(path) as reader:
+        assert reader.lookup_ip('10.0.0.10')['name'] == 'smt2'
+        assert reader.lookup_ip('10.0.0.20') == {
+            'provider': 'amazon',
+            'region': 'us-east-1',
+            'type': 'region',
+            'name': 'smt1',
+        }
+        assert reader.lookup_ip('10.0.0.0')['name'] == 'smt1'
+        assert reader.lookup_ip('10.0.1.0') is None
@@ -0,0 +1,67 @@
+from sqlalchemy import text
+
+from pint_models.loader import copy_rows
+from pint_models.models import (
+    AmazonImagesModel,
+    GoogleServersModel,
+    ImageState,
+    OracleImagesModel,
+)
+from pint_models.registry import models
+# From benchmarks/, which is on the pytest pythonpath
+from synthetic import (
+    synthetic_catalog,
+    synthetic_images,
+    synthetic_servers,
+)
+
+
+def test_synthetic_images(sqlite_session):
+    rows = list(synthetic_images(AmazonImagesModel, per_location=50,
+                                 locations=['us-east-1', 'eu-west-1']))
+    assert len(rows) == 100
+    assert rows == list(synthetic_images(
+        AmazonImagesModel, per_location=50,
+        locations=['us-east-1', 'eu-west-1']
+    ))
+    assert len(set(row['id'] for row in rows)) == 100
+    assert set(row['state'] for row in rows) == set(ImageState)
+
+    for row in rows:
+        if row['state'] == ImageState.deleted:
+            assert row['deletedon'] >= row['deprecatedon']
+        elif row['state'] == ImageState.active:
+            assert row['deprecatedon'] is None
+
+    # The rows pass the model validators
+    sqlite_session.add_all(AmazonImagesModel(**row) for row in rows)
+    sqlite_session.commit()
+
+    rows = list(synthetic_images(OracleImagesModel, per_location=5,
+                                 state_mix={ImageState.active: 1}))
+    assert [row['state'] for row in rows] == [ImageState.active] * 5
+
+
+def test_synthetic_servers():
+    rows = list(synthetic_servers(GoogleServersModel, per_region=20,
+                                  update_share=0.5))
+    assert len(rows) == 60
+    assert len(set((row['region'], row['ip']) for row in rows)) == 60
+    assert all(row['name'] for row in rows if row['type'].name == 'update')
+    assert any(row['ipv6'] for row in rows)
+
+
+def test_synthetic_catalog_postgres(pg_session):
+    catalog = synthetic_catalog(per_location=20, servers_per_region=4)
+    assert set(models()) < set(catalog)
+
+    for model, rows in catalog.items():
+        copy_rows(pg_session, model, rows)
+    pg_session.commit()
+
+    assert pg_session.execute(text(
+        'SELECT count(*) FROM amazonimages'
+    )).scalar() == 100
+    assert pg_session.execute(text(
+        'SELECT count(*) FROM versions'
+    )).scalar() == len(catalog) - 1
@@ -0,0 +1,147 @@
+import datetime
+
+import pytest
+
+from pint_models.models import (
+    AmazonImagesModel,
+    GoogleImagesModel,
+    ImageState,
+    MicrosoftImagesModel,
+    OracleImagesModel,
+)
+from pint_models.unified import (
+    UnifiedImagesModel,
+    escape_like,
+    unified_counts,
+    unified_latest,
+    unified_search,
+)
+
+
+# The images added by the tests
+IMAGES = {
+    AmazonImagesModel: {
+        'ami-1': {
+            'name': 'sles-15-sp5',
+            'publishedon': datetime.date(2024, 1, 1),
+        },
+        'ami-2': {
+            'name': 'sles-15-sp6',
+            'publishedon': datetime.date(2024, 6, 1),
+        },
+        'ami-3': {
+            'name': 'sles-15-sp6',
+            'publishedon': datetime.date(2024, 6, 1),
+            'region': 'eu-west-1',
+        },
+    },
+    GoogleImagesModel: {
+        'sles-15-sp6-v20240601': {
+            'state': 'deprecated',
+            'publishedon': datetime.date(2024, 6, 1),
+            'deprecatedon': datetime.date(2024, 7, 1),
+        },
+    },
+    MicrosoftImagesModel: {
+        'sles-15-sp6_v2': {'publishedon': datetime.date(2024, 5, 1)},
+    },
+    OracleImagesModel: {
+        'ocid-1': {
+            'name': 'SLES%15',
+            'publishedon': datetime.date(2024, 2, 1),
+        },
+    },
+}
+
+
+def test_unified_search(sqlite_session, add_images):
+    add_images(sqlite_session, IMAGES)
+
+    images = unified_search(sqlite_session, name='SP6')
+    assert [(i.provider, i.id) for i in images] == [
+        ('amazon', 'ami-2'),
+        ('amazon', 'ami-3'),
+        ('google', 'sles-15-sp6-v20240601'),
+        ('microsoft', '1'),
+    ]
+    assert images[2].location == 'suse-cloud'
+    assert images[2].state == ImageState.deprecated
+    assert images[2].tablename == 'googleimages'
+    assert images[3].to_dict()['publishedon'] == '2024-05-01'
+
+    assert [i.id for i in unified_search(
+        sqlite_session, provider=['amazon', 'oracle'], state='active',
+        location='us-east-1', limit=1
+    )] == ['ami-2']
+
+    # Wildcards in the name match literally
+    assert [i.id for i in unified_search(sqlite_session, name='s%1')] == [
+        'ocid-1'
+    ]
+
+
+def test_unified_search_unknown_column(sqlite_session):
+    with pytest.raises(ValueError):
+        unified_search(sqlite_session, size=1)
+
+
+def test_unified_counts(sqlite_session, add_images):
+    add_images(sqlite_session, IMAGES)
+
+    assert unified_counts(sqlite_session) == {
+        'amazon': {'active': 3},
+        'google': {'deprecated': 1},
+        'microsoft': {'active': 1},
+        'oracle': {'active': 1},
+    }
+    assert unified_counts(sqlite_session, name='sp5') == {
+        'amazon': {'active': 1},
+    }
+
+
+def test_unified_latest(sqlite_session, add_images):
+    add_images(sqlite_session, IMAGES)
+
+    latest = unified_latest(sqlite_session)
+    assert {p: i.id for p, i in latest.items()} == {
+        'amazon': 'ami-3',
+        'google': 'sles-15-sp6-v20240601',
+        'microsoft': '1',
+        'oracle': 'ocid-1',
+    }
+
+    latest = unified_latest(sqlite_session, per_location=True,
+                            provider='amazon')
+    assert {k: i.id for k, i in latest.items()} == {
+        ('amazon', 'us-east-1'): 'ami-2',
+        ('amazon', 'eu-west-1'): 'ami-3',
+    }
+
+
+def test_unified_images_read_only(sqlite_session, add_images):
+    add_images(sqlite_session, IMAGES)
+
+    image = unified_search(sqlite_session, provider='oracle')[0]
+    image.name = 'changed'
+    with pytest.raises(ValueError):
+        sqlite_session.commit()
+
+
+def test_unified_images_postgres(pg_session, add_images):
+    add_images(pg_session, IMAGES)
+
+    assert len(unified_search(pg_session, name='sles')) == 6
+    assert unified_counts(pg_session, state='active') == {
+        'amazon': {'active': 3},
+        'microsoft': {'active': 1},
+        'oracle': {'active': 1},
+    }
+
+
+def test_escape_like():
+    assert escape_like('a_b%c\\') == 'a\\_b\\%c\\\\'
+
+
+def test_unified_images_model():
+    assert UnifiedImagesModel.__table__.name == 'unifiedimages'
+    assert 'unifiedimages' not in UnifiedImagesModel.metadata.tables
@@ -0,0 +1,72 @@
+import datetime
+
+import pytest
+
+from pint_models.models import (
+    AmazonImagesModel,
+    AmazonServersModel,
+    ImageState,
+    MicrosoftImagesModel,
+)
+from pint_models.validation import validate_image_rows
+
+
+def test_validate_image_rows(image_row):
+    valid, errors = validate_image_rows(AmazonImagesModel, [
+        image_row('ami-1', publishedon='20241010',
+                  changeinfo='https://image123.info'),
+        image_row('ami-2', state=ImageState.deprecated,
+                  deprecatedon='2024-09-01'),
+        image_row('ami-3', deletedon='2024-10-09', deprecatedon='20241011'),
+        image_row('ami-4', state='gone', region=None),
+        image_row('ami-5', publishedon='yesterday'),
+        image_row('ami-6', name='x' * 256),
+    ])
+
+    assert valid == [image_row(
+        'ami-1',
+        changeinfo='https://image123.info/',
+        deprecatedon=None,
+        deletedon=None
+    )]
+    assert [index for index, _ in errors] == [1, 2, 3, 4, 5]
+    assert 'should not be after deprecatedon(2024-09-01)' in errors[0][1]
+    assert 'should not be after deletedon(2024-10-09)' in errors[1][1]
+    assert errors[2][1] == (
+        "region is required; state invalid value 'gone'"
+    )
+    assert errors[3][1] == "publishedon invalid date 'yesterday'"
+    assert errors[4][1] == 'name longer than 255 characters'
+
+
+def test_validate_image_rows_columnar():
+    valid, errors = validate_image_rows(MicrosoftImagesModel, {
+        'name': ['image1', 'image2'],
+        'environment': ['PublicAzure', None],
+        'state': ['active', 'active'],
+        'publishedon': [datetime.date(2024, 10, 10)] * 2,
+    })
+    assert [row['name'] for row in valid] == ['image1']
+    assert errors == [(1, 'environment is required')]
+
+    with pytest.raises(ValueError):
+        validate_image_rows(MicrosoftImagesModel, {
+            'name': ['image1', 'image2'],
+            'environment': ['PublicAzure'],
+        })
+
+
+def test_validate_image_rows_not_an_image_model():
+    with pytest.raises(ValueError):
+        validate_image_rows(AmazonServersModel, [])
+
+
+def test_image_check_constraints():
+    names = set(c.name for c in AmazonImagesModel.__table__.constraints)
+    assert {
+        'ck_amazonimages_deprecatedon',
+        'ck_amazonimages_deletedon',
+        'ck_amazonimages_deletedon_deprecatedon',
+        'ck_amazonimages_changeinfo',
+    } <= names
+    assert MicrosoftImagesModel.unique_constraints()
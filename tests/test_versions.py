@@ -0,0 +1,45 @@
+import threading
+
+from sqlalchemy.orm import sessionmaker
+
+from pint_models.models import VersionsModel
+from pint_models.versions import VersionTracker, bump_version
+
+
+def test_bump_version(sqlite_session):
+    sqlite_session.add(VersionsModel(tablename='amazonimages', version=3))
+    sqlite_session.commit()
+
+    assert bump_version(sqlite_session, 'amazonimages') == 4
+    assert bump_version(sqlite_session, 'googleimages') == 1
+    sqlite_session.commit()
+
+    assert VersionTracker().versions(sqlite_session) == {
+        'amazonimages': 4,
+        'googleimages': 1,
+    }
+
+
+def test_bump_version_concurrent(pg_engine, pg_session):
+    # The first bump's entry isn't committed yet when the second one
+    # runs, which waits for it and then increments it
+    assert bump_version(pg_session, 'amazonimages') == 1
+
+    versions = []
+
+    def bump():
+        session = sessionmaker(bind=pg_engine)()
+        try:
+            versions.append(bump_version(session, 'amazonimages'))
+            session.commit()
+        finally:
+            session.close()
+
+    thread = threading.Thread(target=bump)
+    thread.start()
+    thread.join(0.2)
+    pg_session.commit()
+    thread.join()
+
+    assert versions == [2]
+    assert pg_session.get(VersionsModel, 'amazonimages').version == 2